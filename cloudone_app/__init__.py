@@ -17,9 +17,38 @@ def create_app(config_object='cloudone_app.config.Config'):
     # Configure logging
     logging.basicConfig(level=logging.INFO)
     app.logger.setLevel(logging.INFO)
+    # Once per process: azure.identity propagates to the root handler above
+    logging.getLogger("azure.identity").setLevel(app.config["AZURE_IDENTITY_LOG_LEVEL"])
     
     app.logger.info(f"Flask app created with DEBUG={app.config['DEBUG']}")
 
+    # --- Shared Azure credential / SDK client pool ---
+    from .services import azure_clients, arm_rest, executor, advisor_store, inventory_snapshot, coalesce, cache, warmer, directory, ai_clients, remediation_store, jobs
+    azure_clients.init_app(app)
+    # --- Single-flight coalescing of identical upstream calls ---
+    coalesce.init_app(app)
+    # --- Bounded in-memory caches (LRU, TTL sweeper) ---
+    cache.init_app(app)
+    arm_rest.init_app(app)
+    advisor_store.init_app(app)
+    # --- Gemini client, configured once (models cached per system prompt) ---
+    ai_clients.init_app(app)
+    remediation_store.init_app(app)
+    # --- Background job queue for the LLM-backed endpoints ---
+    jobs.init_app(app)
+
+    # --- Shared worker pool (runs tasks inside the app context) ---
+    executor.init_app(app)
+
+    # --- Cached subscription / tenant directory (refreshed on the worker pool) ---
+    directory.init_app(app)
+
+    # --- Local inventory snapshot (synced in the background on the worker pool) ---
+    inventory_snapshot.init_app(app)
+
+    # --- Background cache warming for all known subscriptions ---
+    warmer.init_app(app)
+
     # --- Register Blueprints ---
     
     # Import View Blueprint
@@ -39,6 +68,9 @@ def create_app(config_object='cloudone_app.config.Config'):
     from .blueprints.api.dashboard import dashboard_bp
     from .blueprints.api.monitoring import monitoring_bp
     from .blueprints.api.iac import iac_bp # <-- ADD THIS
+    from .blueprints.api.admin import admin_bp
+    from .blueprints.api.bootstrap import bootstrap_bp
+    from .blueprints.api.jobs import jobs_bp
 
     # Register ALL new API Blueprints
     app.register_blueprint(account_bp)
@@ -53,5 +85,8 @@ def create_app(config_object='cloudone_app.config.Config'):
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(monitoring_bp)
     app.register_blueprint(iac_bp) # <-- ADD THIS
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(bootstrap_bp)
+    app.register_blueprint(jobs_bp)
 
     return app
\ No newline at end of file
@@ -1,8 +1,7 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from dotenv import load_dotenv
-import logging
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.resource import SubscriptionClient
+from cloudone_app.services.azure_clients import get_clients
+from cloudone_app.services.directory import get_directory
 
 # Load .env file
 load_dotenv()
@@ -10,32 +9,22 @@ load_dotenv()
 # Blueprint
 account_bp = Blueprint('api_account', __name__, url_prefix='/api/azure')
 
+def _directory_response(kind):
+    """
+    Serves a cached directory listing with its ETag. Browsers revalidate on
+    every page load and get an empty 304 while the listing is unchanged.
+    """
+    entry = get_directory().get(kind, get_clients())
+    response = jsonify({kind: entry["items"]})
+    response.set_etag(entry["etag"])
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
+
 @account_bp.route("/subscriptions/", methods=["GET"])
 def get_subscriptions():
-    logger = logging.getLogger("azure.identity")
-    logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
-    handler.setLevel(logging.INFO)
-    logger.addHandler(handler)
-    
-    credential = DefaultAzureCredential()
-    subscription_client = SubscriptionClient(credential=credential)
-    results = []
-    for sub in subscription_client.subscriptions.list():
-        results.append({
-            "display_name": sub.display_name,
-            "subscription_id": sub.subscription_id
-        })
-    return jsonify({"subscriptions": results})
+    # Every page asks for this at load time
+    return _directory_response("subscriptions")
 
 @account_bp.route("/tenants/", methods=["GET"])
 def get_tenants():
-    credential = DefaultAzureCredential()
-    subscription_client = SubscriptionClient(credential=credential)
-    tenants = []
-    for tenant in subscription_client.tenants.list():
-        tenants.append({
-            "tenant_id": tenant.tenant_id,
-            "display_name": tenant.display_name if hasattr(tenant, 'display_name') else tenant.tenant_id
-        })
-    return jsonify({"tenants": tenants})
\ No newline at end of file
+    return _directory_response("tenants")
@@ -0,0 +1,118 @@
+from flask import Blueprint, jsonify, request, current_app
+import hmac
+from cloudone_app.services.azure_clients import get_clients
+from cloudone_app.services.executor import get_executor, get_paging_executor, get_bootstrap_executor
+from cloudone_app.services.advisor_store import get_advisor_store
+from cloudone_app.services.inventory_snapshot import get_snapshot
+from cloudone_app.services.coalesce import get_coalescer
+from cloudone_app.services.cache import get_caches
+from cloudone_app.services.warmer import get_warmer
+from cloudone_app.services.directory import get_directory
+from cloudone_app.services.ai_clients import get_ai_clients
+from cloudone_app.services.remediation_store import advisor_problems, get_remediation_store
+from cloudone_app.services.scope import resolve_scope
+from cloudone_app.services.jobs import get_job_queue
+from .dashboard import get_widget_stats
+
+# Blueprint
+admin_bp = Blueprint('api_admin', __name__, url_prefix='/api/admin')
+
+# Shared secret every admin request must carry (Config.ADMIN_TOKEN)
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+@admin_bp.before_request
+def require_admin_token():
+    """
+    The admin API exposes internals and can start paid Gemini calls, so it
+    answers only requests carrying ADMIN_TOKEN; without one configured it is off.
+    """
+    token = current_app.config["ADMIN_TOKEN"]
+    if not token:
+        return jsonify({"error": "Admin API is disabled (set ADMIN_TOKEN)"}), 404
+    if not hmac.compare_digest(request.headers.get(ADMIN_TOKEN_HEADER, "").encode(), token.encode()):
+        return jsonify({"error": f"Missing or invalid {ADMIN_TOKEN_HEADER} header"}), 401
+
+@admin_bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Exposes internal pool and cache metrics for operators.
+    """
+    snapshot = get_snapshot()
+    warmer = get_warmer()
+    return jsonify({
+        "azure_clients": get_clients().stats(),
+        "executor": get_executor().stats(),
+        "paging_executor": get_paging_executor().stats(),
+        "bootstrap_executor": get_bootstrap_executor().stats(),
+        "coalescer": get_coalescer().stats(),
+        "directory": get_directory().stats(),
+        "caches": get_caches().stats(),
+        "advisor_store": get_advisor_store().stats(),
+        "dashboard_widgets": get_widget_stats(),
+        "ai_clients": get_ai_clients().stats(),
+        "remediation_store": get_remediation_store().stats(),
+        "jobs": get_job_queue().stats(),
+        "inventory_snapshot": snapshot.stats() if snapshot else None,
+        "cache_warmer": warmer.stats() if warmer else None
+    })
+
+@admin_bp.route("/warmer", methods=["GET"])
+def get_warmer_jobs():
+    """
+    Lists the cache warmer's jobs (one per subscription and kind) with their
+    next run, last run, last duration and last error.
+    """
+    warmer = get_warmer()
+    if warmer is None:
+        return jsonify({"enabled": False, "jobs": []})
+    return jsonify({"enabled": True, **warmer.stats(), "jobs": warmer.jobs()})
+
+@admin_bp.route("/warmer/run", methods=["POST"])
+def run_warmer_now():
+    """
+    Makes every cache warmer job due now, in whichever worker process
+    currently holds the warmer's leader lease.
+    """
+    warmer = get_warmer()
+    if warmer is None:
+        return jsonify({"error": "Cache warmer is disabled"}), 409
+    warmer.run_all_now()
+    return jsonify({"status": "scheduled"}), 202
+
+
+def _pregenerate_remediations(clients, subscription_ids, limit):
+    store = get_remediation_store()
+    advisor = get_advisor_store()
+    problems = []
+    for subscription_id in subscription_ids:
+        try:
+            problems.extend(advisor_problems(advisor, subscription_id))
+        except Exception as e:
+            current_app.logger.error(f"Remediation pre-generation: Advisor fetch for sub {subscription_id} failed: {e}")
+    return store.pregenerate(problems, limit=limit)
+
+@admin_bp.route("/remediations/pregenerate", methods=["POST"])
+def pregenerate_remediations():
+    """
+    Starts a background batch that generates AI remediation guides for the
+    distinct Advisor problems of a scope (?scope=all, the default, or a
+    comma-separated list of subscription ids). ?limit caps the new guides and
+    is itself capped at REMEDIATION_PREGEN_MAX_PER_RUN (the default). The batch
+    runs on the remediation store's own pool; progress shows up under
+    remediation_store in /api/admin/metrics.
+    """
+    if not get_ai_clients().configured:
+        return jsonify({"error": "AI client is not configured"}), 409
+    store = get_remediation_store()
+    limit = request.args.get("limit", store.max_per_run, type=int)
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 400
+    limit = min(limit, store.max_per_run)
+    try:
+        clients = get_clients()
+        subscription_ids = resolve_scope(clients, request.args.get("scope", "all"))
+        store.submit(_pregenerate_remediations, clients, subscription_ids, limit)
+        return jsonify({"status": "started", "subscriptions": len(subscription_ids), "limit": limit}), 202
+    except Exception as e:
+        current_app.logger.error(f"Failed to start remediation pre-generation: {e}")
+        return jsonify({"error": str(e)}), 500
@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify, current_app
 from dotenv import load_dotenv
-import requests
-from azure.identity import DefaultAzureCredential
+from cloudone_app.services.arm_rest import get_arm_client
+from cloudone_app.services.advisor_store import get_advisor_store, total_savings
 
 # Load .env file
 load_dotenv()
@@ -11,19 +11,11 @@ advisor_bp = Blueprint('api_advisor', __name__, url_prefix='/api/azure/advisor')
 
 @advisor_bp.route("/scores/<subscription_id>", methods=["GET"])
 def get_advisor_scores(subscription_id):
-    credential = DefaultAzureCredential()
     try:
-        token = credential.get_token("https://management.azure.com/.default")
-        url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.Advisor/advisorScore?api-version=2023-01-01"
-        headers = {
-            "Authorization": f"Bearer {token.token}",
-            "Content-Type": "application/json"
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status() 
-
-        data = response.json()
-        scores_list = data.get('value', [])
+        scores_list = get_arm_client().get_all(
+            f"/subscriptions/{subscription_id}/providers/Microsoft.Advisor/advisorScore",
+            params={"api-version": "2023-01-01"}
+        )
         results = {}
         if not scores_list:
             current_app.logger.warning(f"No Advisor Scores found for subscription {subscription_id}.")
@@ -56,50 +48,42 @@ def get_advisor_scores(subscription_id):
 
 @advisor_bp.route("/recommendations/<subscription_id>/<category>", methods=["GET"])
 def get_advisor_recommendations_by_category(subscription_id, category):
-    credential = DefaultAzureCredential()
+    """
+    Returns the active recommendations of one category plus their total
+    potential savings. Served from the shared Advisor store, so requesting
+    several categories costs a single upstream fetch.
+    """
     try:
-        token = credential.get_token("https://management.azure.com/.default")
-
         if category.lower() == 'reliability':
             api_category = 'HighAvailability'
         else:
             api_category = category.capitalize()
 
-        url = (
-            f"https://management.azure.com/subscriptions/{subscription_id}"
-            f"/providers/Microsoft.Advisor/recommendations"
-            f"?api-version=2023-01-01"
-            f"&$filter=Category eq '{api_category}'"
-        )
-        headers = {
-            "Authorization": f"Bearer {token.token}",
-            "Content-Type": "application/json"
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-
-        data = response.json()
-        recommendations_list = data.get('value', [])
+        recommendations_list = get_advisor_store().get_category(subscription_id, api_category)
+        active = [rec for rec in recommendations_list if not rec.get('properties', {}).get('suppressionId')]
         results = []
-        for rec in recommendations_list:
+        for rec in active:
             properties = rec.get('properties', {})
-            if not properties.get('suppressionId'):
-
-                # --- NEW LOGIC: Get extended details ---
-                extended_props = properties.get('extendedProperties', {})
-
-                results.append({
-                    "impact": properties.get('impact'),
-                    "description": properties.get('shortDescription', {}).get('problem', 'No description available'),
-                    "impacted_resource": properties.get('impactedField'),
-                    "learn_more_link": properties.get('learnMoreLink'),
-                    # --- NEW FIELDS FOR OPTIMIZATION ---
-                    "resource_group": properties.get('resourceGroup', 'N/A'),
-                    "potential_savings": extended_props.get('savingsAmount', '0'),
-                    "savings_currency": extended_props.get('savingsCurrency', 'USD')
-                })
 
-        return jsonify({"recommendations": results})
+            # --- NEW LOGIC: Get extended details ---
+            extended_props = properties.get('extendedProperties', {})
+
+            results.append({
+                "impact": properties.get('impact'),
+                "description": properties.get('shortDescription', {}).get('problem', 'No description available'),
+                "impacted_resource": properties.get('impactedField'),
+                "learn_more_link": properties.get('learnMoreLink'),
+                # --- NEW FIELDS FOR OPTIMIZATION ---
+                "resource_group": properties.get('resourceGroup', 'N/A'),
+                "potential_savings": extended_props.get('savingsAmount', '0'),
+                "savings_currency": extended_props.get('savingsCurrency', 'USD')
+            })
+
+        return jsonify({
+            "recommendations": results,
+            "total_savings": total_savings(active),
+            "savings_currency": results[0]["savings_currency"] if results else "USD"
+        })
 
     except Exception as e:
         current_app.logger.error(f"Failed to fetch advisor recommendations: {str(e)}")
@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, request, current_app
 from dotenv import load_dotenv
-from cloudone_app.services.ai_service import get_ai_remediation
+from cloudone_app.services.ai_service import stream_ai_remediation
+from cloudone_app.services.remediation_store import get_remediation_store
+from cloudone_app.services.streaming import sse_event, sse_response
+from .jobs import submit_job
 
 # Load .env file
 load_dotenv()
@@ -19,11 +22,56 @@ def get_remediation_steps():
     if not problem:
         return jsonify({"error": "No problem_description provided"}), 400
     
+    # ?fresh=1 skips the stored guide and regenerates it
+    fresh = request.args.get("fresh", "").lower() in ("1", "true")
+
     try:
-        remediation = get_ai_remediation(problem)
-        if "error" in remediation:
-            return jsonify(remediation), 500
-        return jsonify(remediation)
+        # Guides are stored per normalized problem text and mostly pre-generated
+        cached = None if fresh else get_remediation_store().lookup(problem)
+        if cached is not None:
+            response = jsonify(cached[0])
+            response.headers["X-Cache-Status"] = "HIT"
+            response.headers["Age"] = str(cached[1])
+            return response
+
+        # Not stored yet: generate it as a background job (202 + job id)
+        return submit_job("remediation", _generate_remediation, problem, fresh)
     except Exception as e:
         current_app.logger.error(f"Failed to get remediation: {str(e)}")
         return jsonify({"error": str(e)}), 500
+
+def _generate_remediation(problem, fresh):
+    """Job body: returns (guide, http_status) like the synchronous endpoint did."""
+    remediation, _, _ = get_remediation_store().get(problem, fresh=fresh)
+    if "error" in remediation:
+        return remediation, 500
+    return remediation, 200
+
+@ai_bp.route("/remediate/stream", methods=["POST"])
+def stream_remediation_steps():
+    """
+    Streaming variant of /remediate: forwards the guide as Server-Sent Events,
+    a 'delta' per chunk of markdown and a final 'done' with the full guide
+    (which is then stored like any other). Stored guides arrive as one delta.
+    """
+    data = request.get_json()
+    problem = data.get("problem_description")
+
+    if not problem:
+        return jsonify({"error": "No problem_description provided"}), 400
+
+    fresh = request.args.get("fresh", "").lower() in ("1", "true")
+    store = get_remediation_store()
+
+    def generate():
+        cached = None if fresh else store.lookup(problem)
+        if cached is not None:
+            yield sse_event("delta", {"text": cached[0]["remediation_steps"]})
+            yield sse_event("done", cached[0])
+            return
+        for event, payload in stream_ai_remediation(problem):
+            if event == "done":
+                store.store(problem, payload)
+            yield sse_event(event, payload)
+
+    return sse_response(generate())
@@ -0,0 +1,150 @@
+from flask import Blueprint, jsonify, current_app, request
+from dotenv import load_dotenv
+from urllib.parse import quote
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from cloudone_app.services.azure_clients import get_clients
+from cloudone_app.services.executor import get_executor, get_bootstrap_executor
+from cloudone_app.services.deadline import Deadline
+from cloudone_app.services.directory import list_subscriptions, list_tenants
+from cloudone_app.services.inventory_snapshot import AS_OF_HEADER
+
+# Load .env file
+load_dotenv()
+
+# Blueprint
+bootstrap_bp = Blueprint('api_bootstrap', __name__, url_prefix='/api')
+
+# Primary payload of each page: the exact URL its script fetches first for the
+# selected subscription, so the inlined response can stand in for that fetch.
+# {category} is taken from the page's query string. None = directory only.
+BOOTSTRAP_PAGES = {
+    "azure_landing": "/api/azure/dashboard/{subscription_id}",
+    "my_resources": "/api/azure/resources/{subscription_id}?sort=name",
+    "environment_security_score": "/api/azure/security/score/{subscription_id}",
+    "advisor_recommendations": "/api/azure/advisor/recommendations/{subscription_id}/{category}",
+    "resource_optimization": "/api/azure/advisor/recommendations/{subscription_id}/Cost",
+    "carbon_footprint": "/api/azure/carbon/summary/{subscription_id}",
+    "smart_monitoring": "/api/azure/monitoring/status/{subscription_id}",
+    "policy_manager": "/api/azure/policy/assignments/{subscription_id}",
+    # Streams its results as NDJSON, which already renders progressively
+    "orphaned_resources": None,
+    "migration_bot": None,
+}
+
+# Response headers the page scripts read (freshness labels)
+FORWARDED_HEADERS = ("Age", "X-Cache-Status", AS_OF_HEADER)
+
+
+def _page_url(page, subscription_id, args):
+    template = BOOTSTRAP_PAGES.get(page)
+    if not template or not subscription_id:
+        return None
+    values = {"subscription_id": quote(subscription_id, safe="")}
+    if "{category}" in template:
+        if not args.get("category"):
+            return None
+        values["category"] = quote(args["category"], safe="")
+    return template.format(**values)
+
+
+def _dispatch_json(url):
+    """
+    Runs the API route behind url in-process (same handlers, caches and
+    error handling as a browser request) and returns
+    {"url", "status", "headers", "body"}, or None for a non-JSON response.
+    """
+    with current_app.test_request_context(url, method="GET"):
+        response = current_app.full_dispatch_request()
+    if response.is_streamed or not response.is_json:
+        return None
+    return {
+        "url": url,
+        "status": response.status_code,
+        "headers": {name: response.headers[name] for name in FORWARDED_HEADERS if name in response.headers},
+        "body": response.get_json()
+    }
+
+
+def _result(future, deadline, what):
+    """A future's result, or None (logged) if it failed or missed the deadline."""
+    try:
+        return future.result(timeout=deadline.remaining())
+    except FuturesTimeoutError:
+        # A dispatch already running finishes on its own pool and fills the caches for the page's own fetch
+        current_app.logger.warning(f"Bootstrap: {what} missed the {deadline.seconds}s deadline")
+        future.cancel()
+    except Exception as e:
+        current_app.logger.error(f"Bootstrap: {what} failed: {e}")
+    return None
+
+
+def _submit_page(page, subscription_id, args):
+    """
+    Dispatches the page's primary payload on the bootstrap pool, never the
+    shared executor: the route submits its own work to the shared executor
+    and waits on it. Returns None (the page fetches it itself) when there is
+    no payload or every bootstrap worker is already busy, so page loads never
+    queue behind dispatches that outlived their deadline.
+    """
+    url = _page_url(page, subscription_id, args)
+    if not url:
+        return None
+    pool = get_bootstrap_executor()
+    if pool.stats()["active"] >= pool.max_workers:
+        current_app.logger.warning(f"Bootstrap: pool busy, skipping the {page} payload")
+        return None
+    return pool.submit(_dispatch_json, url)
+
+
+def build_bootstrap(page, subscription_id=None, args=None, include_page_data=True):
+    """
+    Collects what a page needs on load: the subscription and tenant
+    directories and, if include_page_data, the page's primary payload for
+    subscription_id (default: the first subscription, which is what the
+    dropdown selects). The directories are fetched on the shared executor and
+    the payload on the bootstrap pool, in parallel, within
+    BOOTSTRAP_DEADLINE_SECONDS; parts that fail or miss the deadline are null
+    and the page fetches them itself. Views call this before rendering, so a
+    page view can take up to BOOTSTRAP_DEADLINE_SECONDS.
+    """
+    clients = get_clients()
+    executor = get_executor()
+    deadline = Deadline(current_app.config["BOOTSTRAP_DEADLINE_SECONDS"])
+    args = args or {}
+
+    subscriptions_future = executor.submit(list_subscriptions, clients)
+    tenants_future = executor.submit(list_tenants, clients)
+
+    page_future = None
+    if include_page_data and subscription_id:
+        page_future = _submit_page(page, subscription_id, args)
+
+    subscriptions = _result(subscriptions_future, deadline, "subscriptions")
+    if include_page_data and not subscription_id and subscriptions:
+        subscription_id = subscriptions[0]["subscription_id"]
+        page_future = _submit_page(page, subscription_id, args)
+
+    return {
+        "page": page,
+        "subscription_id": subscription_id,
+        "subscriptions": subscriptions,
+        "tenants": _result(tenants_future, deadline, "tenants"),
+        "page_data": _result(page_future, deadline, f"{page} payload") if page_future else None
+    }
+
+
+@bootstrap_bp.route("/bootstrap", methods=["GET"])
+def get_bootstrap():
+    """
+    One round trip for everything a page needs on load.
+    Query parameters: page (a key of BOOTSTRAP_PAGES), optional
+    subscription_id, and the page's own parameters (e.g. category).
+    """
+    page = request.args.get("page", "")
+    if page not in BOOTSTRAP_PAGES:
+        return jsonify({"error": f"Unknown page '{page}'"}), 400
+    try:
+        return jsonify(build_bootstrap(page, request.args.get("subscription_id"), request.args))
+    except Exception as e:
+        current_app.logger.error(f"Error building bootstrap for {page}: {e}")
+        return jsonify({"error": str(e)}), 500
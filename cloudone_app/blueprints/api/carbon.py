@@ -1,6 +1,5 @@
 from flask import Blueprint, jsonify, current_app
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
 from azure.mgmt.carbonoptimization import CarbonOptimizationMgmtClient
 from azure.mgmt.carbonoptimization.models import (
     DateRange,
@@ -8,6 +7,7 @@ from azure.mgmt.carbonoptimization.models import (
     OverallSummaryReportQueryFilter
 )
 import logging
+from cloudone_app.services.azure_clients import get_clients
 
 # Load .env file
 load_dotenv()
@@ -20,9 +20,8 @@ def get_carbon_summary(subscription_id):
     """
     Fetches the latest overall carbon emission summary for a subscription.
     """
-    credential = DefaultAzureCredential()
     try:
-        carbon_client = CarbonOptimizationMgmtClient(credential=credential)
+        carbon_client = get_clients().get_client(CarbonOptimizationMgmtClient)
         
         # 1. Get the latest available date range from the service
         # Data is typically available for the previous full month.
@@ -1,6 +1,5 @@
 from flask import Blueprint, jsonify, current_app
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
 from azure.mgmt.security import SecurityCenter
 from azure.mgmt.carbonoptimization import CarbonOptimizationMgmtClient
 from azure.mgmt.carbonoptimization.models import (
@@ -9,17 +8,27 @@ from azure.mgmt.carbonoptimization.models import (
     OverallSummaryReportQueryFilter
 )
 from azure.mgmt.resourcegraph import ResourceGraphClient
-from azure.mgmt.resourcegraph.models import QueryRequest
-import requests
-import logging
+import copy
 import time
 from threading import Lock
+from cloudone_app.services.azure_clients import get_clients
+from cloudone_app.services.arm_rest import get_arm_client
+from cloudone_app.services.deadline import Deadline, DeadlineExceeded, sdk_timeouts
+from cloudone_app.services.resource_graph import query_rows_shared, RESOURCE_CATEGORY_KQL
+from cloudone_app.services.executor import get_executor
+from cloudone_app.services.inventory_snapshot import get_snapshot
+from cloudone_app.services.scope import is_multi_scope, resolve_scope
+from cloudone_app.services.cache import get_cache, wait_for_refresh
+from cloudone_app.services.streaming import sse_event, sse_response
+from cloudone_app.services.advisor_store import get_advisor_store, total_savings
 
-# Import the monitoring function
-from .monitoring import _get_monitoring_status_data
+# Import the monitoring function and the shared orphan scan
+from .monitoring import _get_monitoring_status_data, _get_monitoring_status_batch
+from .resources import _get_orphan_scan, _get_orphan_scans, _get_resource_counts_batch
 
 # Import the concurrency tool
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
 # Load .env file
 load_dotenv()
@@ -28,22 +37,38 @@ load_dotenv()
 dashboard_bp = Blueprint('api_dashboard', __name__, url_prefix='/api/azure/dashboard')
 
 # --- NEW CACHING MECHANISM ---
-# This is a simple, thread-safe, in-memory cache.
-# This is NOT a file. This lives in the server's memory.
-_cache = {}
-_cache_lock = Lock()
-CACHE_TTL_SECONDS = 60 # Cache data for 60 seconds
+# Widget values live in the app's bounded "dashboard" cache (services/cache.py):
+# LRU-evicted past DASHBOARD_CACHE_MAX_ENTRIES / DASHBOARD_CACHE_MAX_BYTES, and
+# shared by all worker processes when CACHE_BACKEND is "sqlite".
+# Entries are keyed by (widget, subscription_id); each widget has its own TTL
+# (see Config.DASHBOARD_WIDGET_TTLS).
+# Past the TTL we still serve the old value (and refresh in the background)
+# for this long. Older entries expire from the cache and count as a miss.
+CACHE_MAX_STALE_SECONDS = 600
+
+# --- SINGLE-FLIGHT ---
+# One refresh per key at a time. Concurrent callers share its Future
+# instead of each launching their own fan-out against Azure.
+_inflight = {}
+_inflight_lock = Lock()
+
+# --- WIDGET METRICS ---
+# Per-widget upstream latency, error and deadline-miss counters (see /api/admin/metrics)
+_widget_stats = {}
+_stats_lock = Lock()
 
 # --- Internal Helper Functions ---
 # (All helper functions: _get_security_score, _get_advisor_scores, _get_carbon_summary,
-# _get_orphan_counts, _get_resource_counts, _get_top_recommendations remain UNCHANGED.
-# They are synchronous, which is what the ThreadPoolExecutor wants.)
+# _get_orphan_counts, _get_resource_counts, _get_top_recommendations are synchronous,
+# which is what the shared executor wants. They log and re-raise on failure so a
+# failed refresh never overwrites a good cached value; the dashboard falls back to
+# the last known value or a placeholder instead.)
 
-def _get_security_score(credential, subscription_id):
+def _get_security_score(clients, subscription_id, deadline=None):
     """Fetches the main security score."""
     try:
-        security_client = SecurityCenter(credential=credential, subscription_id=subscription_id)
-        scores_list = list(security_client.secure_scores.list())
+        security_client = clients.get_client(SecurityCenter, subscription_id)
+        scores_list = list(security_client.secure_scores.list(**sdk_timeouts(deadline)))
         score = next((s for s in scores_list if s.name == "ascScore"), scores_list[0] if scores_list else None)
         if score and score.max > 0:
             return {
@@ -53,18 +78,18 @@ def _get_security_score(credential, subscription_id):
             }
     except Exception as e:
         current_app.logger.error(f"Dashboard: Failed to get security score: {e}")
+        raise
     return {"current": 0, "max": 0, "percentage": 0}
 
-def _get_advisor_scores(credential, subscription_id):
+def _get_advisor_scores(arm, subscription_id, deadline=None):
     """Fetches all advisor scores."""
     scores = {}
     try:
-        token = credential.get_token("https://management.azure.com/.default")
-        url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.Advisor/advisorScore?api-version=2023-01-01"
-        headers = {"Authorization": f"Bearer {token.token}", "Content-Type": "application/json"}
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json().get('value', [])
+        data = arm.get_all(
+            f"/subscriptions/{subscription_id}/providers/Microsoft.Advisor/advisorScore",
+            params={"api-version": "2023-01-01"},
+            deadline=deadline
+        )
         
         for score_entity in data:
             pillar = score_entity.get('name').lower()
@@ -75,130 +100,91 @@ def _get_advisor_scores(credential, subscription_id):
             }
     except Exception as e:
         current_app.logger.error(f"Dashboard: Failed to get advisor scores: {e}")
+        raise
     
-    # Ensure all pillars exist, even if API call fails
+    # Ensure all pillars exist, even if the API omits some
     for pillar in ["cost", "security", "reliability", "operationalexcellence", "performance"]:
         if pillar not in scores:
             scores[pillar] = {"score": 0}
             
     return scores
 
-def _get_carbon_summary(credential, subscription_id):
+def _get_carbon_summary(clients, subscription_id, deadline=None):
     """Fetches the latest carbon summary."""
     try:
-        carbon_client = CarbonOptimizationMgmtClient(credential=credential)
-        available_date_range = carbon_client.carbon_service.query_carbon_emission_data_available_date_range()
+        carbon_client = clients.get_client(CarbonOptimizationMgmtClient)
+        available_date_range = carbon_client.carbon_service.query_carbon_emission_data_available_date_range(**sdk_timeouts(deadline))
         if available_date_range and available_date_range.end_date:
             query_filter = OverallSummaryReportQueryFilter(
                 date_range=DateRange(start=available_date_range.start_date, end=available_date_range.end_date),
                 subscription_list=[subscription_id],
                 carbon_scope_list=[EmissionScopeEnum.SCOPE1, EmissionScopeEnum.SCOPE2, EmissionScopeEnum.SCOPE3]
             )
-            result = carbon_client.carbon_service.query_carbon_emission_reports(query_filter)
+            result = carbon_client.carbon_service.query_carbon_emission_reports(query_filter, **sdk_timeouts(deadline))
             if result and result.value:
                 summary = result.value[0].as_dict()
                 return {"total_emissions": summary.get("total_carbon_emission", 0)}
     except Exception as e:
         current_app.logger.error(f"Dashboard: Failed to get carbon summary: {e}")
+        raise
     return {"total_emissions": 0}
 
-def _get_orphan_counts(credential, subscription_id):
-    """Fetches counts of orphaned resources."""
-    total_orphans = 0
+def _get_orphan_counts(clients, subscription_id, deadline=None):
+    """Counts orphaned resources from the shared (cached) orphan scan."""
     try:
-        resource_graph_client = ResourceGraphClient(credential)
-        query_str = f"""
-        Resources
-        | where subscriptionId == '{subscription_id}'
-        | where type == 'microsoft.compute/disks' and isnull(managedBy) and properties.diskState == 'Unattached'
-        | summarize count() by type='Orphaned Disks'
-        | union (
-            Resources
-            | where subscriptionId == '{subscription_id}'
-            | where type == 'microsoft.network/networkinterfaces' and isnull(properties.virtualMachine.id)
-            | summarize count() by type='Orphaned NICs'
-        )
-        | union (
-            Resources
-            | where subscriptionId == '{subscription_id}'
-            | where type == 'microsoft.network/publicipaddresses' and isnull(properties.ipConfiguration.id)
-            | summarize count() by type='Orphaned PIPs'
-        )
-        | union (
-            ResourceContainers
-            | where type == 'microsoft.resources/subscriptions/resourcegroups' and subscriptionId == '{subscription_id}'
-            | join kind=leftouter (
-                Resources | where subscriptionId == '{subscription_id}' | project resourceGroup
-            ) on $left.name == $right.resourceGroup
-            | where isnull(resourceGroup1)
-            | summarize count() by type='Empty RGs'
-        )
-        | summarize total_orphans = sum(count_)
-        """
-        query = QueryRequest(subscriptions=[subscription_id], query=query_str)
-        query_response = resource_graph_client.resources(query)
-        if query_response.data and len(query_response.data) > 0:
-            total_orphans = query_response.data[0].get('total_orphans', 0)
+        scan = _get_orphan_scan(clients, subscription_id, deadline=deadline)
+        return {"count": sum(len(items) for items in scan.values())}
     except Exception as e:
         current_app.logger.error(f"Dashboard: Failed to get orphan counts: {e}")
-    return {"count": total_orphans}
+        raise
 
-def _get_resource_counts(credential, subscription_id):
-    """Fetches resource counts by category."""
+def _get_resource_counts(clients, subscription_id, deadline=None):
+    """Fetches resource counts by category (from the local inventory snapshot when it has the subscription)."""
     counts = {"Compute": 0, "Storage": 0, "Network": 0, "Database": 0, "Other": 0}
     try:
-        resource_graph_client = ResourceGraphClient(credential)
+        snapshot = get_snapshot()
+        if snapshot and snapshot.ready(subscription_id) is not None:
+            return snapshot.category_counts(subscription_id)
+        resource_graph_client = clients.get_client(ResourceGraphClient)
         query_str = f"""
         Resources
         | where subscriptionId == '{subscription_id}'
-        | extend category = case(
-            type has 'microsoft.compute/virtualmachines', 'Compute',
-            type has 'microsoft.storage', 'Storage',
-            type has 'microsoft.network', 'Network',
-            type has 'microsoft.sql' or type has 'microsoft.documentdb', 'Database',
-            'Other'
-        )
+        {RESOURCE_CATEGORY_KQL}
         | summarize count() by category
         """
-        query = QueryRequest(subscriptions=[subscription_id], query=query_str)
-        query_response = resource_graph_client.resources(query)
-        for item in query_response.data:
+        for item in query_rows_shared(resource_graph_client, [subscription_id], query_str, deadline=deadline):
             if item.get('category') in counts:
                 counts[item.get('category')] = item.get('count_')
     except Exception as e:
         current_app.logger.error(f"Dashboard: Failed to get resource counts: {e}")
+        raise
     return counts
 
-def _get_top_recommendations(credential, subscription_id):
-    """Fetches top recommendations and counts by category."""
+def _get_top_recommendations(advisor, subscription_id, deadline=None):
+    """Fetches top recommendations and counts by category (from the shared Advisor store)."""
     insights = {
-        "Cost": {"count": 0, "top_item": "No cost savings found."},
+        "Cost": {"count": 0, "top_item": "No cost savings found.", "total_savings": 0},
         "Security": {"count": 0, "top_item": "No security issues found."},
         "Reliability": {"count": 0, "top_item": "No reliability issues found."}
     }
     try:
-        token = credential.get_token("https://management.azure.com/.default")
-        headers = {"Authorization": f"Bearer {token.token}", "Content-Type": "application/json"}
-        
-        cost_url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.Advisor/recommendations?api-version=2023-01-01&$filter=Category eq 'Cost'"
-        cost_res = requests.get(cost_url, headers=headers).json().get('value', [])
+        cost_res = advisor.get_category(subscription_id, "Cost", deadline)
         if cost_res:
             insights["Cost"]["count"] = len(cost_res)
+            insights["Cost"]["total_savings"] = total_savings(cost_res)
             top_cost = next((r for r in cost_res if r.get('properties', {}).get('extendedProperties', {}).get('savingsAmount', '0') != '0'), cost_res[0])
             props = top_cost.get('properties', {})
             savings = props.get('extendedProperties', {}).get('savingsAmount', '0')
             desc = props.get('shortDescription', {}).get('problem', 'N_A')
             insights["Cost"]["top_item"] = f"{desc} (Est. ${savings})"
 
-        sec_url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.Advisor/recommendations?api-version=2023-01-01&$filter=Category eq 'Security'"
-        sec_res = requests.get(sec_url, headers=headers).json().get('value', [])
+        sec_res = advisor.get_category(subscription_id, "Security", deadline)
         if sec_res:
             insights["Security"]["count"] = len(sec_res)
             desc = sec_res[0].get('properties', {}).get('shortDescription', {}).get('problem', 'N/A')
             insights["Security"]["top_item"] = desc
             
-        rel_url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.Advisor/recommendations?api-version=2023-01-01&$filter=Category eq 'HighAvailability'"
-        rel_res = requests.get(rel_url, headers=headers).json().get('value', [])
+        rel_res = advisor.get_category(subscription_id, "HighAvailability", deadline)
         if rel_res:
             insights["Reliability"]["count"] = len(rel_res)
             desc = rel_res[0].get('properties', {}).get('shortDescription', {}).get('problem', 'N/A')
@@ -206,56 +192,441 @@ def _get_top_recommendations(credential, subscription_id):
             
     except Exception as e:
         current_app.logger.error(f"Dashboard: Failed to get top recommendations: {e}")
+        raise
     
     return insights
 
-# --- NEW FUNCTION TO RUN THE PARALLEL CALLS ---
-def _fetch_all_dashboard_data(credential, subscription_id):
+# --- WIDGETS ---
+# Each widget is cached on its own, so a refresh only recomputes
+# the widgets whose TTL has expired. Loaders take the Deadline of the refresh.
+def _widget_loaders(clients, arm, advisor, subscription_id):
+    """Returns {widget_name: loader(deadline)} for one subscription."""
+    return {
+        "advisor_scores": lambda deadline: _get_advisor_scores(arm, subscription_id, deadline),
+        "security_score": lambda deadline: _get_security_score(clients, subscription_id, deadline),
+        "carbon": lambda deadline: _get_carbon_summary(clients, subscription_id, deadline),
+        "orphans": lambda deadline: _get_orphan_counts(clients, subscription_id, deadline),
+        "resource_counts": lambda deadline: _get_resource_counts(clients, subscription_id, deadline),
+        "insights": lambda deadline: _get_top_recommendations(advisor, subscription_id, deadline),
+        "monitoring": lambda deadline: _get_monitoring_status_data(clients, subscription_id, deadline).get("alerts", [])
+    }
+
+# Widgets backed by Resource Graph also have batch loaders for 'all' / list scopes:
+# one query per batch of subscriptions instead of one per subscription.
+# Batch loaders take (subscription_ids, deadline) and return {subscription_id: value}.
+def _batch_widget_loaders(clients):
+    return {
+        "orphans": lambda subscription_ids, deadline: {
+            sub: {"count": sum(len(items) for items in scan.values())}
+            for sub, (scan, _) in _get_orphan_scans(clients, subscription_ids, deadline).items()
+        },
+        "resource_counts": lambda subscription_ids, deadline: _get_resource_counts_batch(clients, subscription_ids, deadline),
+        "monitoring": lambda subscription_ids, deadline: {
+            sub: data.get("alerts", [])
+            for sub, data in _get_monitoring_status_batch(clients, subscription_ids, deadline).items()
+        }
+    }
+
+# Served when a widget has no cached value and misses the deadline (or fails)
+WIDGET_PLACEHOLDERS = {
+    "advisor_scores": {pillar: {"score": 0} for pillar in ["cost", "security", "reliability", "operationalexcellence", "performance"]},
+    "security_score": {"current": 0, "max": 0, "percentage": 0},
+    "carbon": {"total_emissions": 0},
+    "orphans": {"count": 0},
+    "resource_counts": {"Compute": 0, "Storage": 0, "Network": 0, "Database": 0, "Other": 0},
+    "insights": {
+        "Cost": {"count": 0, "top_item": "Not available yet.", "total_savings": 0},
+        "Security": {"count": 0, "top_item": "Not available yet."},
+        "Reliability": {"count": 0, "top_item": "Not available yet."}
+    },
+    "monitoring": []
+}
+
+# The sections of the dashboard payload and the cached widgets each one needs
+DASHBOARD_SECTIONS = {
+    "waf_scores": ("advisor_scores", "security_score"),
+    "kpis": ("carbon", "orphans"),
+    "insights": ("insights",),
+    "resource_counts": ("resource_counts",),
+    "monitoring_alerts": ("monitoring",)
+}
+
+def _build_section(section, widgets):
+    """Builds one section of the dashboard payload from the widget values."""
+    if section == "waf_scores":
+        # Copy before merging so the cached advisor scores are not mutated
+        waf_scores = {pillar: dict(value) for pillar, value in widgets["advisor_scores"].items()}
+        # Combine the two security scores
+        waf_scores["security"]["score"] = widgets["security_score"].get("percentage", 0)
+        return waf_scores
+    if section == "kpis":
+        return {
+            "carbon": widgets["carbon"],
+            "orphans": widgets["orphans"]
+        }
+    return widgets[DASHBOARD_SECTIONS[section][0]]
+
+def _assemble_dashboard(widgets):
+    """Builds the dashboard payload from the individual widget values."""
+    return {section: _build_section(section, widgets) for section in DASHBOARD_SECTIONS}
+
+def _widget_cache():
+    return get_cache("dashboard")
+
+def _store_widget(name, subscription_id, data):
+    """Caches a widget value until its TTL plus the stale window has passed."""
+    ttl = current_app.config["DASHBOARD_WIDGET_TTLS"][name] + CACHE_MAX_STALE_SECONDS
+    _widget_cache().set((name, subscription_id), data, ttl=ttl)
+
+def _fallback_value(name, subscription_id):
+    """Last known value of a widget (stale or not), else its placeholder."""
+    cached_entry = _widget_cache().get((name, subscription_id))
+    if cached_entry:
+        return cached_entry["data"]
+    return copy.deepcopy(WIDGET_PLACEHOLDERS[name])
+
+
+# --- Widget Metrics ---
+def _record_widget(name, elapsed=None, error=False, timeout=False):
+    with _stats_lock:
+        stats = _widget_stats.setdefault(name, {"calls": 0, "errors": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0})
+        if elapsed is not None:
+            elapsed_ms = elapsed * 1000
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if error:
+            stats["errors"] += 1
+        if timeout:
+            stats["timeouts"] += 1
+
+def get_widget_stats():
+    """Returns per-widget upstream latency, error and timeout counters."""
+    with _stats_lock:
+        return {
+            name: {
+                "calls": s["calls"],
+                "errors": s["errors"],
+                "timeouts": s["timeouts"],
+                "avg_ms": round(s["total_ms"] / s["calls"], 1) if s["calls"] else 0,
+                "max_ms": round(s["max_ms"], 1)
+            }
+            for name, s in _widget_stats.items()
+        }
+
+
+# --- Refresh Helpers (single-flight + stale-while-revalidate) ---
+def _claim_refresh(key):
     """
-    This is the core logic that runs all 7 API calls in parallel.
-    This is what we will cache.
+    Returns (future, is_leader). Only the leader runs the refresh;
+    everyone else waits on the same future.
     """
-    current_app.logger.info(f"CACHE MISS. Re-fetching all dashboard data for sub {subscription_id}")
-    with ThreadPoolExecutor(max_workers=7) as executor:
-        f_advisor_scores = executor.submit(_get_advisor_scores, credential, subscription_id)
-        f_defender_score = executor.submit(_get_security_score, credential, subscription_id)
-        f_carbon = executor.submit(_get_carbon_summary, credential, subscription_id)
-        f_orphans = executor.submit(_get_orphan_counts, credential, subscription_id)
-        f_res_counts = executor.submit(_get_resource_counts, credential, subscription_id)
-        f_insights = executor.submit(_get_top_recommendations, credential, subscription_id)
-        f_monitoring = executor.submit(_get_monitoring_status_data, subscription_id)
-
-        # Retrieve the results
-        waf_scores = f_advisor_scores.result()
-        defender_score = f_defender_score.result()
-        carbon_summary = f_carbon.result()
-        orphan_counts = f_orphans.result()
-        resource_counts = f_res_counts.result()
-        top_insights = f_insights.result()
-        monitoring_data = f_monitoring.result()
-
-    # Combine the two security scores
-    waf_scores["security"]["score"] = defender_score.get("percentage", 0)
-    
-    dashboard_data = {
-        "waf_scores": waf_scores,
-        "kpis": {
-            "carbon": carbon_summary,
-            "orphans": orphan_counts
-        },
-        "insights": top_insights,
-        "resource_counts": resource_counts,
-        "monitoring_alerts": monitoring_data.get("alerts", [])
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        _inflight[key] = future
+        return future, True
+
+def _run_refresh(key, loader, future):
+    """
+    Runs the loader under its own upstream Deadline, stores the result and
+    resolves the future. Runs on the shared executor (inside the app context).
+    With a shared cache backend, a refresh lock keeps other worker processes
+    from refreshing the same key; while another process holds it we wait for
+    its result instead of calling Azure again.
+    """
+    start = time.perf_counter()
+    cache = _widget_cache()
+    lease = current_app.config["DASHBOARD_UPSTREAM_TIMEOUT_SECONDS"]
+    since = time.time()
+    token = cache.try_lock(key, lease)
+    try:
+        if token is None:
+            entry = wait_for_refresh(cache, key, since=since, timeout=lease)
+            if entry is not None:
+                future.set_result(entry["data"])
+                return
+            current_app.logger.warning(f"Dashboard: peer refresh of {key} did not finish, refreshing here")
+
+        data = loader(Deadline(lease))
+        _store_widget(key[0], key[1], data)
+        _record_widget(key[0], elapsed=time.perf_counter() - start)
+        future.set_result(data)
+    except Exception as e:
+        _record_widget(key[0], elapsed=time.perf_counter() - start, error=True)
+        current_app.logger.error(f"Dashboard refresh failed for {key}: {e}")
+        future.set_exception(e)
+    finally:
+        if token is not None:
+            cache.release(key, token)
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def _get_cached(key, ttl, loader, executor):
+    """
+    Returns (future, age_seconds, status) for one cache key, where status is one
+    of 'fresh', 'stale', 'miss' or 'coalesced'. Fresh and stale values come back
+    as already-resolved futures; misses and background revalidations run on the
+    given executor.
+    """
+    cached_entry = _widget_cache().get(key)
+    age = time.time() - cached_entry["timestamp"] if cached_entry else None
+
+    if cached_entry and age < ttl:
+        done = Future()
+        done.set_result(cached_entry["data"])
+        return done, age, "fresh"
+
+    if cached_entry and age < ttl + CACHE_MAX_STALE_SECONDS:
+        # Serve the previous value now, revalidate behind the scenes
+        future, is_leader = _claim_refresh(key)
+        if is_leader:
+            current_app.logger.info(f"CACHE STALE. Serving old data for {key} (age: {age:.0f}s), refreshing in background")
+            executor.submit(_run_refresh, key, loader, future)
+        done = Future()
+        done.set_result(cached_entry["data"])
+        return done, age, "stale"
+
+    future, is_leader = _claim_refresh(key)
+    if is_leader:
+        current_app.logger.info(f"CACHE MISS. No data for {key}")
+        executor.submit(_run_refresh, key, loader, future)
+        return future, 0, "miss"
+
+    return future, 0, "coalesced"
+
+def _run_batch_refresh(name, claimed, batch_loader):
+    """
+    Batch counterpart of _run_refresh: loads one widget for every claimed
+    subscription at once, then stores and resolves each (name, subscription) entry.
+    Subscriptions whose refresh lock is held by another worker process are
+    left to it and resolved from its result.
+    """
+    start = time.perf_counter()
+    cache = _widget_cache()
+    lease = current_app.config["DASHBOARD_UPSTREAM_TIMEOUT_SECONDS"]
+    since = time.time()
+    tokens = {sub: cache.try_lock((name, sub), lease) for sub in claimed}
+    mine = [sub for sub, token in tokens.items() if token is not None]
+    try:
+        if mine:
+            try:
+                values = batch_loader(mine, Deadline(lease))
+                for subscription_id in mine:
+                    _store_widget(name, subscription_id, values[subscription_id])
+                _record_widget(name, elapsed=time.perf_counter() - start)
+                for subscription_id in mine:
+                    claimed[subscription_id].set_result(values[subscription_id])
+            except Exception as e:
+                _record_widget(name, elapsed=time.perf_counter() - start, error=True)
+                current_app.logger.error(f"Dashboard batch refresh failed for {name} ({len(mine)} subscriptions): {e}")
+                # Subscriptions resolved before the failure keep their value
+                for subscription_id in mine:
+                    if not claimed[subscription_id].done():
+                        claimed[subscription_id].set_exception(e)
+
+        for subscription_id, token in tokens.items():
+            if token is None:
+                entry = wait_for_refresh(cache, (name, subscription_id), since=since, timeout=max(lease - (time.time() - since), 0))
+                if entry is not None:
+                    claimed[subscription_id].set_result(entry["data"])
+                else:
+                    claimed[subscription_id].set_exception(DeadlineExceeded(f"Peer refresh of {name} for {subscription_id} did not finish"))
+    finally:
+        for subscription_id, token in tokens.items():
+            if token is not None:
+                cache.release((name, subscription_id), token)
+        with _inflight_lock:
+            for subscription_id in claimed:
+                _inflight.pop((name, subscription_id), None)
+
+def _get_cached_batch(name, subscription_ids, ttl, batch_loader, executor):
+    """
+    _get_cached for one widget across many subscriptions. Returns
+    {subscription_id: (future, age_seconds, status)}; every subscription that
+    needs a refresh (miss or stale) is fetched by a single batch refresh.
+    """
+    lookups = {}
+    claimed = {}
+    now = time.time()
+    for subscription_id in subscription_ids:
+        key = (name, subscription_id)
+        cached_entry = _widget_cache().get(key)
+        age = now - cached_entry["timestamp"] if cached_entry else None
+
+        if cached_entry and age < ttl:
+            done = Future()
+            done.set_result(cached_entry["data"])
+            lookups[subscription_id] = (done, age, "fresh")
+            continue
+
+        future, is_leader = _claim_refresh(key)
+        if is_leader:
+            claimed[subscription_id] = future
+        if cached_entry and age < ttl + CACHE_MAX_STALE_SECONDS:
+            done = Future()
+            done.set_result(cached_entry["data"])
+            lookups[subscription_id] = (done, age, "stale")
+        else:
+            lookups[subscription_id] = (future, 0, "miss" if is_leader else "coalesced")
+
+    if claimed:
+        current_app.logger.info(f"CACHE REFRESH. Batch-loading {name} for {len(claimed)} subscriptions")
+        executor.submit(_run_batch_refresh, name, claimed, batch_loader)
+    return lookups
+
+def _start_widget_lookups(clients, arm, subscription_id, executor):
+    """Starts a cache lookup for every widget. Returns {name: (future, age, status)}."""
+    ttls = current_app.config["DASHBOARD_WIDGET_TTLS"]
+    loaders = _widget_loaders(clients, arm, get_advisor_store(), subscription_id)
+    return {
+        name: _get_cached((name, subscription_id), ttls[name], loader, executor)
+        for name, loader in loaders.items()
     }
-    
-    # --- Store the result in the cache with a timestamp ---
-    with _cache_lock:
-        _cache[subscription_id] = {
-            "timestamp": time.time(),
-            "data": dashboard_data
+
+def _start_multi_widget_lookups(clients, arm, subscription_ids, executor):
+    """
+    Starts the widget lookups of many subscriptions. Resource Graph widgets are
+    batched across subscriptions; the others (ARM / SDK calls without a batch
+    API) go through the per-subscription cache entries.
+    Returns {subscription_id: {name: (future, age, status)}}.
+    """
+    ttls = current_app.config["DASHBOARD_WIDGET_TTLS"]
+    advisor = get_advisor_store()
+    batch_loaders = _batch_widget_loaders(clients)
+    lookups = {subscription_id: {} for subscription_id in subscription_ids}
+
+    for name, batch_loader in batch_loaders.items():
+        for subscription_id, lookup in _get_cached_batch(name, subscription_ids, ttls[name], batch_loader, executor).items():
+            lookups[subscription_id][name] = lookup
+
+    for subscription_id in subscription_ids:
+        for name, loader in _widget_loaders(clients, arm, advisor, subscription_id).items():
+            if name not in batch_loaders:
+                lookups[subscription_id][name] = _get_cached((name, subscription_id), ttls[name], loader, executor)
+    return lookups
+
+def warm_dashboard(clients, arm, subscription_id, refresh_ahead=0.8, widgets=None):
+    """
+    Refreshes, in the calling thread, every widget of a subscription (or only
+    those named in widgets) whose cached value is missing or past
+    refresh_ahead of its TTL, so visitors find fresh values (used by the cache
+    warmer, one widget per job). Widgets another caller is already refreshing
+    are skipped. Returns the names of the refreshed widgets.
+    """
+    ttls = current_app.config["DASHBOARD_WIDGET_TTLS"]
+    refreshed = []
+    for name, loader in _widget_loaders(clients, arm, get_advisor_store(), subscription_id).items():
+        if widgets is not None and name not in widgets:
+            continue
+        key = (name, subscription_id)
+        cached_entry = _widget_cache().get(key)
+        if cached_entry and time.time() - cached_entry["timestamp"] < ttls[name] * refresh_ahead:
+            continue
+        future, is_leader = _claim_refresh(key)
+        if not is_leader:
+            continue
+        _run_refresh(key, loader, future)
+        refreshed.append(name)
+    return refreshed
+
+def _resolve_widget(name, future, subscription_id, degraded):
+    """
+    Returns the value of a finished widget lookup, or its fallback if it failed
+    or has not finished (missed the deadline). Degraded widgets are recorded.
+    """
+    if future.done():
+        try:
+            return future.result()
+        except Exception:
+            pass
+    else:
+        _record_widget(name, timeout=True)
+        current_app.logger.warning(f"Dashboard: widget {name} missed the deadline, serving fallback")
+    degraded.append(name)
+    return _fallback_value(name, subscription_id)
+
+def _overall_freshness(lookups, degraded):
+    """Returns (max_age_seconds, status) across all widget lookups."""
+    statuses = {status for _, _, status in lookups.values()}
+    if degraded or "stale" in statuses:
+        status = "stale"
+    elif statuses & {"miss", "coalesced"}:
+        status = "miss"
+    else:
+        status = "fresh"
+    return max(age for _, age, _ in lookups.values()), status
+
+def _fetch_dashboard(clients, arm, subscription_id):
+    """
+    Resolves every widget through its own cache entry and assembles the payload.
+    Only expired widgets are refetched; they run in parallel, and the request
+    waits for them at most DASHBOARD_DEADLINE_SECONDS.
+    Returns (data, max_age_seconds, overall_status).
+    """
+    deadline = Deadline(current_app.config["DASHBOARD_DEADLINE_SECONDS"])
+    lookups = _start_widget_lookups(clients, arm, subscription_id, get_executor())
+    # Late widgets keep running on the shared executor and fill the cache for next time
+    wait([future for future, _, _ in lookups.values()], timeout=deadline.remaining())
+
+    degraded = []
+    widgets = {
+        name: _resolve_widget(name, future, subscription_id, degraded)
+        for name, (future, _, _) in lookups.items()
+    }
+    data = _assemble_dashboard(widgets)
+    data["stale_widgets"] = degraded
+
+    age, status = _overall_freshness(lookups, degraded)
+    return data, age, status
+
+def _fetch_multi_dashboard(clients, arm, subscription_ids):
+    """
+    Dashboard for many subscriptions under one request deadline.
+    Returns ({"subscriptions": {subscription_id: dashboard}, "totals": {...}},
+    max_age_seconds, overall_status).
+    """
+    deadline = Deadline(current_app.config["DASHBOARD_DEADLINE_SECONDS"])
+    lookups = _start_multi_widget_lookups(clients, arm, subscription_ids, get_executor())
+    wait([future for sub_lookups in lookups.values() for future, _, _ in sub_lookups.values()],
+         timeout=deadline.remaining())
+
+    dashboards = {}
+    ages, statuses = [], set()
+    totals = {
+        "orphans": 0,
+        "monitoring_alerts": 0,
+        "resource_counts": {"Compute": 0, "Storage": 0, "Network": 0, "Database": 0, "Other": 0}
+    }
+    for subscription_id, sub_lookups in lookups.items():
+        degraded = []
+        widgets = {
+            name: _resolve_widget(name, future, subscription_id, degraded)
+            for name, (future, _, _) in sub_lookups.items()
         }
-        
-    return dashboard_data
+        data = _assemble_dashboard(widgets)
+        data["stale_widgets"] = degraded
+        dashboards[subscription_id] = data
+
+        age, status = _overall_freshness(sub_lookups, degraded)
+        ages.append(age)
+        statuses.add(status)
+        totals["orphans"] += widgets["orphans"].get("count", 0)
+        totals["monitoring_alerts"] += len(widgets["monitoring"])
+        for category, count in widgets["resource_counts"].items():
+            totals["resource_counts"][category] = totals["resource_counts"].get(category, 0) + count
+
+    status = next((s for s in ("stale", "miss", "fresh") if s in statuses), "fresh")
+    return {"subscriptions": dashboards, "totals": totals}, max(ages, default=0), status
+
+def _cached_response(data, age, status):
+    """Wraps cached data with Age / X-Cache-Status headers for the UI."""
+    response = jsonify(data)
+    response.headers["Age"] = str(int(age))
+    response.headers["X-Cache-Status"] = status
+    return response
 
 
 # --- Main API Endpoint ---
@@ -264,29 +635,69 @@ def _fetch_all_dashboard_data(credential, subscription_id):
 def get_dashboard_data(subscription_id):
     """
     Aggregator endpoint for the main Azure dashboard.
-    This now uses a thread-safe, time-based in-memory cache.
+    Each widget is cached with its own TTL. Fresh widgets come from cache; stale
+    ones are served immediately while a single background refresh runs; on a
+    miss, concurrent callers share one fetch. Widgets that miss the request
+    deadline are served from their last known value (listed in 'stale_widgets').
+
+    subscription_id may also be 'all' or a comma-separated list; the payload is
+    then {"subscriptions": {subscription_id: dashboard}, "totals": {...}}, with
+    the Resource Graph widgets loaded by batched queries across subscriptions.
     """
-    credential = DefaultAzureCredential()
-    
-    # --- CHECK CACHE FIRST ---
-    with _cache_lock:
-        cached_entry = _cache.get(subscription_id)
-        if cached_entry:
-            age = time.time() - cached_entry["timestamp"]
-            if age < CACHE_TTL_SECONDS:
-                current_app.logger.info(f"CACHE HIT. Serving dashboard data for sub {subscription_id} (age: {age:.0f}s)")
-                return jsonify(cached_entry["data"])
-            else:
-                current_app.logger.info(f"CACHE STALE. (age: {age:.0f}s)")
-        else:
-            current_app.logger.info(f"CACHE MISS. No data for sub {subscription_id}")
+    clients = get_clients()
+    arm = get_arm_client()
 
-    # --- If CACHE MISS or STALE, re-fetch ---
-    # The _fetch_all_dashboard_data function handles running all
-    # 7 calls in parallel AND updates the cache itself.
     try:
-        data = _fetch_all_dashboard_data(credential, subscription_id)
-        return jsonify(data)
+        if is_multi_scope(subscription_id):
+            data, age, status = _fetch_multi_dashboard(clients, arm, resolve_scope(clients, subscription_id))
+        else:
+            data, age, status = _fetch_dashboard(clients, arm, subscription_id)
+        return _cached_response(data, age, status)
     except Exception as e:
         current_app.logger.error(f"Failed to fetch and cache dashboard data: {str(e)}")
-        return jsonify({"error": "Failed to retrieve dashboard data", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to retrieve dashboard data", "details": str(e)}), 500
+
+
+@dashboard_bp.route("/<subscription_id>/stream", methods=["GET"])
+def stream_dashboard_data(subscription_id):
+    """
+    Streaming variant of the aggregator endpoint (Server-Sent Events).
+    Each dashboard section is sent as its own event as soon as the widgets it
+    needs are available, followed by a final 'done' event with cache freshness.
+    Sections still pending at the deadline are sent with fallback values.
+    """
+    if is_multi_scope(subscription_id):
+        return jsonify({"error": "Streaming is only available for a single subscription"}), 400
+
+    clients = get_clients()
+    arm = get_arm_client()
+
+    def generate():
+        deadline = Deadline(current_app.config["DASHBOARD_DEADLINE_SECONDS"])
+        lookups = _start_widget_lookups(clients, arm, subscription_id, get_executor())
+        pending = {future: name for name, (future, _, _) in lookups.items()}
+        widgets = {}
+        degraded = []
+        sent = set()
+
+        def ready_sections():
+            for section, needs in DASHBOARD_SECTIONS.items():
+                if section not in sent and all(n in widgets for n in needs):
+                    sent.add(section)
+                    yield sse_event(section, _build_section(section, widgets))
+
+        try:
+            for future in as_completed(pending, timeout=deadline.remaining()):
+                name = pending[future]
+                widgets[name] = _resolve_widget(name, future, subscription_id, degraded)
+                yield from ready_sections()
+        except FuturesTimeoutError:
+            for future, name in pending.items():
+                if name not in widgets:
+                    widgets[name] = _resolve_widget(name, future, subscription_id, degraded)
+            yield from ready_sections()
+
+        age, status = _overall_freshness(lookups, degraded)
+        yield sse_event("done", {"age": int(age), "status": status, "stale_widgets": degraded})
+
+    return sse_response(generate())
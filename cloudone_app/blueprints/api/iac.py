@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request, current_app
 from dotenv import load_dotenv
-from cloudone_app.services.ai_service import get_iac_code
+from cloudone_app.services.ai_service import get_iac_code_cached, lookup_iac_code, normalize_resources, store_iac_code, stream_iac_code
+from cloudone_app.services.streaming import sse_event, sse_response
+from .jobs import submit_job
 
 # Load .env file
 load_dotenv()
@@ -8,8 +10,8 @@ load_dotenv()
 # Blueprint
 iac_bp = Blueprint('api_iac', __name__, url_prefix='/api/iac')
 
-@iac_bp.route("/generate", methods=["POST"])
-def generate_iac_code():
+def _parse_iac_request():
+    """Returns ((iac_type, module_type, resources, fresh), None) or (None, error response)."""
     data = request.get_json()
     current_app.logger.debug(f"Received IaC generation request: {data}")
 
@@ -18,23 +20,80 @@ def generate_iac_code():
     resources = data.get("resources")    
 
     if not iac_type or not resources:
-        return jsonify({"error": "Missing iac_type or resources"}), 400
+        return None, (jsonify({"error": "Missing iac_type or resources"}), 400)
     
     if iac_type == 'terraform' and not module_type:
-        return jsonify({"error": "Missing module_type for Terraform"}), 400
+        return None, (jsonify({"error": "Missing module_type for Terraform"}), 400)
+
+    # ?fresh=1 skips the cached answer and regenerates it
+    fresh = request.args.get("fresh", "").lower() in ("1", "true")
+    return (iac_type, module_type, resources, fresh), None
+
+@iac_bp.route("/generate", methods=["POST"])
+def generate_iac_code():
+    params, error = _parse_iac_request()
+    if error:
+        return error
+    iac_type, module_type, resources, fresh = params
 
     try:
-        # Call the new refactored service
-        iac_files = get_iac_code(iac_type, module_type, resources)
-        
-        if "error" in iac_files:
-            return jsonify(iac_files), 500
+        # Identical requests (same resources in any order) are answered from the persistent cache
+        cached = None if fresh else lookup_iac_code(iac_type, module_type, resources)
+        if cached is not None:
+            response = jsonify(cached[0])
+            response.headers["X-Cache-Status"] = "HIT"
+            response.headers["Age"] = str(cached[1])
+            return response
 
-        # The service now returns a full payload
-        # e.g., {"iac_type": "bicep", "files": {"main.bicep": "..."}}
-        # or {"iac_type": "terraform", "files": {"root": {...}, "modules": {...}}}
-        return jsonify(iac_files)
+        # Misses take 10-30s of Gemini time: run them as a background job (202 + job id)
+        return submit_job("iac", _generate_iac, iac_type, module_type, resources, fresh)
 
     except Exception as e:
         current_app.logger.error(f"Failed to generate IaC module: {str(e)}")
         return jsonify({"error": str(e)}), 500
+
+def _generate_iac(iac_type, module_type, resources, fresh):
+    """Job body: returns (payload, http_status) like the synchronous endpoint did."""
+    iac_files, _, _ = get_iac_code_cached(iac_type, module_type, resources, fresh=fresh)
+    if "error" in iac_files:
+        return iac_files, 500
+    # The service returns a full payload
+    # e.g., {"iac_type": "bicep", "files": {"main.bicep": "..."}}
+    # or {"iac_type": "terraform", "files": {"root": {...}, "modules": {...}}}
+    return iac_files, 200
+
+def _file_events(files, path=()):
+    """SSE 'file' events for every file of a cached payload, in tree order."""
+    for name, content in files.items():
+        if isinstance(content, dict):
+            yield from _file_events(content, path + (name,))
+        else:
+            yield sse_event("file", {"path": list(path + (name,)), "content": content})
+
+@iac_bp.route("/generate/stream", methods=["POST"])
+def stream_iac_code_events():
+    """
+    Streaming variant of /generate: holds the connection and forwards Gemini's
+    output as Server-Sent Events. 'progress' reports the characters received,
+    'file' carries each file as soon as it is complete, and 'done' the same
+    payload /generate returns. Cached answers are replayed at once.
+    """
+    params, error = _parse_iac_request()
+    if error:
+        return error
+    iac_type, module_type, resources, fresh = params
+    # Normalized once, as in get_iac_code_cached: the prompt and the cache key must see the same list
+    resources = normalize_resources(resources)
+
+    def generate():
+        cached = None if fresh else lookup_iac_code(iac_type, module_type, resources)
+        if cached is not None:
+            yield from _file_events(cached[0]["files"])
+            yield sse_event("done", cached[0])
+            return
+        for event, data in stream_iac_code(iac_type, module_type, resources):
+            if event == "done":
+                store_iac_code(iac_type, module_type, resources, data)
+            yield sse_event(event, data)
+
+    return sse_response(generate())
@@ -0,0 +1,81 @@
+from flask import Blueprint, jsonify, current_app, url_for
+from dotenv import load_dotenv
+import time
+from cloudone_app.services.jobs import DONE_STATUSES, QueueFull, get_job_queue
+from cloudone_app.services.streaming import sse_event, sse_response
+
+# Load .env file
+load_dotenv()
+
+# Blueprint
+jobs_bp = Blueprint('api_jobs', __name__, url_prefix='/api/jobs')
+
+# How often the event stream re-reads a job, and how long it stays open
+JOB_EVENTS_POLL_SECONDS = 0.5
+JOB_EVENTS_MAX_SECONDS = 300
+
+
+def submit_job(kind, fn, *args, **kwargs):
+    """
+    Queues an LLM-backed call and returns the 202 response that points the
+    client at the job (or 503 with Retry-After when the queue is full).
+    Used by the AI, IaC and migration endpoints.
+    """
+    try:
+        job = get_job_queue().submit(kind, fn, *args, **kwargs)
+    except QueueFull as e:
+        current_app.logger.warning(f"Job queue full, rejecting {kind} job: {e}")
+        response = jsonify({"error": "Too many AI requests in progress, please retry shortly"})
+        response.headers["Retry-After"] = "10"
+        return response, 503
+    status_url = url_for("api_jobs.get_job", job_id=job["id"])
+    response = jsonify({
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": status_url,
+        "events_url": url_for("api_jobs.get_job_events", job_id=job["id"])
+    })
+    response.headers["Location"] = status_url
+    return response, 202
+
+
+@jobs_bp.route("/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    Returns a job's status (queued, running, succeeded, failed) and, once it
+    is done, its result and the HTTP status the synchronous call would have had.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job)
+
+
+@jobs_bp.route("/<job_id>/events", methods=["GET"])
+def get_job_events(job_id):
+    """
+    Server-Sent Events for one job: a 'status' event whenever its status
+    changes and a final 'done' event carrying the full job record.
+    """
+    queue = get_job_queue()
+    if queue.get(job_id) is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+
+    def generate():
+        last_status = None
+        started = time.monotonic()
+        while time.monotonic() - started < JOB_EVENTS_MAX_SECONDS:
+            job = queue.get(job_id)
+            if job is None:
+                yield sse_event("error", {"error": "Unknown or expired job"})
+                return
+            if job["status"] in DONE_STATUSES:
+                yield sse_event("done", job)
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield sse_event("status", {"status": last_status})
+            time.sleep(JOB_EVENTS_POLL_SECONDS)
+        yield sse_event("timeout", {"status": last_status})
+
+    return sse_response(generate())
@@ -1,6 +1,7 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, request, current_app
 from dotenv import load_dotenv
 from cloudone_app.services.ai_service import get_migration_recommendation
+from .jobs import submit_job
 
 # Load .env file
 load_dotenv()
@@ -13,6 +14,11 @@ def get_manual_migration_plan():
     data = request.get_json()
     current_app.logger.debug(f"Received migration bot request: {data}")
 
+    # Gemini takes tens of seconds: run the plan as a background job (202 + job id)
+    return submit_job("migration", _build_migration_plan, data)
+
+def _build_migration_plan(data):
+    """Job body: returns (plan, http_status) like the synchronous endpoint did."""
     try:
         app_name = data.get("appName")
         region = data.get("region")
@@ -46,7 +52,7 @@ def get_manual_migration_plan():
 
         ai_plan = get_migration_recommendation(prompt)
         if "error" in ai_plan:
-            return jsonify(ai_plan), 500
+            return ai_plan, 500
 
         compute_cost = 0.0
         compute_hourly = 0.0
@@ -64,8 +70,8 @@ def get_manual_migration_plan():
         ai_plan["database_recommendation"]["estimated_monthly_cost"] = db_cost
         ai_plan["total_estimated_monthly_cost"] = round(compute_cost + db_cost, 2)
 
-        return jsonify(ai_plan)
+        return ai_plan, 200
 
     except Exception as e:
         current_app.logger.error(f"Failed to generate manual migration plan: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return {"error": str(e)}, 500
\ No newline at end of file
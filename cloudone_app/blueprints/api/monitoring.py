@@ -1,9 +1,13 @@
 from flask import Blueprint, jsonify, current_app
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
 from azure.mgmt.resourcegraph import ResourceGraphClient
-from azure.mgmt.resourcegraph.models import QueryRequest
 import logging
+import time
+from cloudone_app.services.azure_clients import get_clients
+from cloudone_app.services.executor import get_paging_executor
+from cloudone_app.services.resource_graph import query_rows_shared
+from cloudone_app.services.scope import is_multi_scope, resolve_scope, group_by_subscription
+from cloudone_app.services.inventory_snapshot import get_snapshot, format_as_of, AS_OF_HEADER
 
 # Load .env file
 load_dotenv()
@@ -11,44 +15,32 @@ load_dotenv()
 # Blueprint
 monitoring_bp = Blueprint('api_monitoring', __name__, url_prefix='/api/azure/monitoring')
 
-def _get_monitoring_status_data(subscription_id):
-    """
-    Internal function to fetch and process monitoring data.
-    This can be called by the dashboard API to get alerts.
-    """
-    credential = DefaultAzureCredential()
-    resource_graph_client = ResourceGraphClient(credential)
-
-    # This Kusto query is the core of the feature.
-    # It fetches VMs and App Services, joins for power state, and projects tags.
-    # Note: VM powerState is in properties.extended.instanceView.powerState.code
-    # Note: App Service state is in properties.state
-    query_str = f"""
+# VMs and App Services with their power state and tags. It is scoped by the
+# subscriptions of the request, so it serves one subscription or a batch.
+# Note: VM powerState is in properties.extended.instanceView.powerState.code
+# Note: App Service state is in properties.state
+MONITORING_QUERY = """
     Resources
-    | where subscriptionId == '{subscription_id}'
     | where type in~ ('microsoft.compute/virtualmachines', 'microsoft.web/sites')
     | extend powerState = case(
         type =~ 'microsoft.compute/virtualmachines', tostring(properties.extended.instanceView.powerState.code),
         type =~ 'microsoft.web/sites', tostring(properties.state),
         'N/A'
     )
-    | project id, name, type, location, resourceGroup, tags, powerState
+    | project subscriptionId, id, name, type, location, resourceGroup, tags, powerState
+    | order by id asc
     """
-    
-    query = QueryRequest(subscriptions=[subscription_id], query=query_str)
-    query_response = resource_graph_client.resources(query)
-    
+
+def _classify_monitoring_rows(rows):
+    """Sorts monitored resources into alerts / monitored / notConfigured from their tags and power state."""
     results = {
         "alerts": [],
         "monitored": [],
         "notConfigured": []
     }
 
-    if not query_response.data:
-        return results
-
-    for resource in query_response.data:
-        tags = resource.get('tags', {})
+    for resource in rows:
+        tags = resource.get('tags') or {}
         # Tag matching is case-insensitive, but keys are case-sensitive. Let's normalize.
         normalized_tags = {k.lower(): v for k, v in tags.items()}
         
@@ -106,14 +98,65 @@ def _get_monitoring_status_data(subscription_id):
             
     return results
 
+def _get_monitoring_status_data(clients, subscription_id, deadline=None, executor=None):
+    """
+    Internal function to fetch and process monitoring data.
+    This can be called by the dashboard API to get alerts.
+    An optional Deadline bounds the Resource Graph calls; an optional executor
+    fetches result pages concurrently. When the local inventory snapshot holds
+    the subscription, it answers instead (power states as of its last sync).
+    """
+    snapshot = get_snapshot()
+    if snapshot and snapshot.ready(subscription_id) is not None:
+        rows = snapshot.monitoring_rows(subscription_id)
+    else:
+        resource_graph_client = clients.get_client(ResourceGraphClient)
+        # Shared with concurrent callers (the Smart Monitoring page and the dashboard widget)
+        rows = query_rows_shared(resource_graph_client, [subscription_id], MONITORING_QUERY, deadline=deadline, executor=executor)
+    return _classify_monitoring_rows(rows)
+
+def _get_monitoring_status_batch(clients, subscription_ids, deadline=None):
+    """
+    Monitoring data for many subscriptions: {subscription_id: results}.
+    Subscriptions held by the local snapshot are read there; the rest share
+    one batched Resource Graph query.
+    """
+    results = {}
+    snapshot = get_snapshot()
+    if snapshot:
+        for subscription_id in subscription_ids:
+            if snapshot.ready(subscription_id) is not None:
+                results[subscription_id] = _classify_monitoring_rows(snapshot.monitoring_rows(subscription_id))
+
+    missing = [subscription_id for subscription_id in subscription_ids if subscription_id not in results]
+    if missing:
+        rows = query_rows_shared(
+            clients.get_client(ResourceGraphClient), missing, MONITORING_QUERY,
+            deadline=deadline, batch_size=current_app.config["RESOURCE_GRAPH_SUBSCRIPTION_BATCH"]
+        )
+        for subscription_id, items in group_by_subscription(rows, missing).items():
+            results[subscription_id] = _classify_monitoring_rows(items)
+    return results
+
 @monitoring_bp.route("/status/<subscription_id>", methods=["GET"])
 def get_monitoring_status(subscription_id):
     """
     API endpoint to fetch the full monitoring status for the Smart Monitoring page.
+    subscription_id may also be 'all' or a comma-separated list; the result is
+    then grouped as {"subscriptions": {subscription_id: status}}.
     """
     try:
-        data = _get_monitoring_status_data(subscription_id)
-        return jsonify(data)
+        if is_multi_scope(subscription_id):
+            clients = get_clients()
+            data = _get_monitoring_status_batch(clients, resolve_scope(clients, subscription_id))
+            return jsonify({"subscriptions": data})
+
+        snapshot = get_snapshot()
+        as_of = (snapshot.as_of(subscription_id) if snapshot else None) or time.time()
+        data = _get_monitoring_status_data(get_clients(), subscription_id, executor=get_paging_executor())
+        response = jsonify(data)
+        response.headers[AS_OF_HEADER] = format_as_of(as_of)
+        return response
     except Exception as e:
         current_app.logger.error(f"Failed to fetch monitoring status: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -1,9 +1,9 @@
 from flask import Blueprint, jsonify, current_app, request
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
 from azure.mgmt.resource.policy import PolicyClient
 from azure.mgmt.resource import ResourceManagementClient
 import uuid
+from cloudone_app.services.azure_clients import get_clients
 
 # Load .env file
 load_dotenv()
@@ -17,8 +17,7 @@ def get_policy_assignments(subscription_id):
     Fetches all policy assignments for the given subscription.
     (Tab 1)
     """
-    credential = DefaultAzureCredential()
-    policy_client = PolicyClient(credential, subscription_id)
+    policy_client = get_clients().get_client(PolicyClient, subscription_id)
     
     try:
         assignments_list = list(policy_client.policy_assignments.list())
@@ -127,8 +126,7 @@ def create_policy_assignment():
     if not all([subscription_id, policy_definition_id, assignment_scope, enforcement_mode, policy_name]):
         return jsonify({"error": "Missing required fields"}), 400
 
-    credential = DefaultAzureCredential()
-    policy_client = PolicyClient(credential, subscription_id)
+    policy_client = get_clients().get_client(PolicyClient, subscription_id)
     
     # Generate a unique name for the assignment
     assignment_name = str(uuid.uuid4())
@@ -1,9 +1,19 @@
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, jsonify, current_app, request, Response, stream_with_context
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
-from azure.mgmt.resource import ResourceManagementClient
 from azure.mgmt.resourcegraph import ResourceGraphClient
-from azure.mgmt.resourcegraph.models import QueryRequest
+from cloudone_app.services.azure_clients import get_clients
+from cloudone_app.services.executor import get_executor
+from cloudone_app.services.deadline import Deadline
+from cloudone_app.services.inventory_snapshot import get_snapshot, format_as_of, AS_OF_HEADER
+from cloudone_app.services.resource_graph import (
+    query_rows, query_rows_shared, query_page, kql_string, MAX_PAGE_SIZE, RESOURCE_CATEGORY_KQL, ORPHAN_CATEGORY_KQL
+)
+from cloudone_app.services.scope import is_multi_scope, resolve_scope, group_by_subscription
+from cloudone_app.services.cache import get_cache, wait_for_refresh
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+import base64
+import json
+import time
 
 # Load .env file
 load_dotenv()
@@ -11,102 +21,536 @@ load_dotenv()
 # Blueprint
 resources_bp = Blueprint('api_resources', __name__, url_prefix='/api/azure')
 
+# --- ORPHAN SCAN CACHE ---
+# One scan per subscription, shared by the Orphan Finder and the dashboard KPI.
+# Scans live in the app's "orphan_scans" cache (services/cache.py) for
+# Config.ORPHAN_SCAN_TTL_SECONDS, shared by worker processes on the sqlite backend.
+# How long one thread may hold the cache's scan lock for a subscription
+ORPHAN_SCAN_LOCK_LEASE_SECONDS = 60
+
+ORPHAN_CATEGORIES = ("disks", "nics", "pips", "nsgs", "rgs")
+
+# --- INVENTORY ---
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+INVENTORY_SORT_KEYS = {"name": "name", "type": "type", "location": "location", "resource_group": "resourceGroup"}
+INVENTORY_DEFAULT_PAGE_SIZE = 200
+
+INVENTORY_FILTER_KEYS = ("type", "location", "resource_group", "name_prefix", "tag", "category")
+# The chart shows every category, so its counts ignore the category filter
+INVENTORY_COUNT_FILTER_KEYS = tuple(key for key in INVENTORY_FILTER_KEYS if key != "category")
+
+def _encode_cursor(position):
+    """Opaque cursor: {"t": skip_token} for Resource Graph pages, {"o": offset} for the snapshot."""
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def _decode_cursor(cursor):
+    position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(position, dict) or not ({"t", "o"} & position.keys()):
+        raise ValueError("Unknown cursor")
+    return position
+
+def _wants_ndjson():
+    """True when the client asked for NDJSON (Accept header or ?stream=1)."""
+    if request.args.get("stream") == "1":
+        return True
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def _ndjson_response(records):
+    """
+    Streams an iterable of dicts as newline-delimited JSON, one line per record,
+    as the upstream pages arrive. An upstream failure after the first byte can't
+    change the status code any more, so it is reported as a final {"error": ...} line.
+    """
+    def generate():
+        try:
+            for record in records:
+                yield json.dumps(record, default=str) + "\n"
+        except Exception as e:
+            current_app.logger.error(f"NDJSON stream aborted: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    # Keep reverse proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+def _request_filters(args, keys=INVENTORY_FILTER_KEYS):
+    """The non-empty filters of a request as a dict (see INVENTORY_FILTER_KEYS)."""
+    return {key: args.get(key) for key in keys if args.get(key)}
+
+def _count_filters(args):
+    """Filters of the chart counts, the same for the snapshot and the live path."""
+    return _request_filters(args, INVENTORY_COUNT_FILTER_KEYS)
+
+def _inventory_filters(subscription_id, args):
+    """
+    Translates the request filters into KQL 'where' clauses.
+    Every user value is quoted with kql_string.
+    """
+    clauses = [f"| where subscriptionId == {kql_string(subscription_id)}"]
+    if args.get("type"):
+        clauses.append(f"| where type =~ {kql_string(args['type'])}")
+    if args.get("location"):
+        clauses.append(f"| where location =~ {kql_string(args['location'])}")
+    if args.get("resource_group"):
+        clauses.append(f"| where resourceGroup =~ {kql_string(args['resource_group'])}")
+    if args.get("name_prefix"):
+        clauses.append(f"| where name startswith {kql_string(args['name_prefix'])}")
+    if args.get("tag"):
+        # tag=key or tag=key:value
+        key, _, value = args["tag"].partition(":")
+        if value:
+            clauses.append(f"| where tostring(tags[{kql_string(key)}]) =~ {kql_string(value)}")
+        else:
+            clauses.append(f"| where isnotempty(tags[{kql_string(key)}])")
+    return "\n    ".join(clauses)
+
+def _inventory_counts(resource_graph_client, subscription_id, filters, deadline=None):
+    """Cheap aggregate of resource counts per category for the chart."""
+    query_str = f"""
+    Resources
+    {filters}
+    {RESOURCE_CATEGORY_KQL}
+    | summarize count() by category
+    """
+    counts = {"Compute": 0, "Storage": 0, "Network": 0, "Database": 0, "Other": 0}
+    for item in query_rows_shared(resource_graph_client, [subscription_id], query_str, deadline=deadline):
+        if item.get('category') in counts:
+            counts[item.get('category')] = item.get('count_')
+    return counts
+
+def _submit_inventory_counts(resource_graph_client, subscription_id, filters):
+    """Starts the chart aggregate on the shared executor, bounded by INVENTORY_COUNTS_TIMEOUT_SECONDS."""
+    deadline = Deadline(current_app.config["INVENTORY_COUNTS_TIMEOUT_SECONDS"])
+    return get_executor().submit(_inventory_counts, resource_graph_client, subscription_id, filters, deadline), deadline
+
+def _inventory_counts_result(counts):
+    """The chart counts, or None (logged) when they miss their deadline; the page then shows no chart."""
+    future, deadline = counts
+    try:
+        return future.result(timeout=deadline.remaining())
+    except FuturesTimeoutError:
+        current_app.logger.warning(f"Inventory counts missed the {deadline.seconds}s deadline")
+        future.cancel()
+        return None
+
+def _inventory_row(item):
+    return {
+        "id": item.get('id'),
+        "name": item.get('name'),
+        "type": item.get('type'),
+        "location": item.get('location'),
+        "resource_group": item.get('resourceGroup'),
+        "category": item.get('category'),
+        "status": item.get('status')
+    }
+
+def _stream_snapshot_inventory(snapshot, subscription_id, filters, count_filters, sort, descending, offset, as_of):
+    """Same records as _stream_inventory, read from the local snapshot."""
+    streamed = 0
+    for row in snapshot.iter_resources(subscription_id, filters, sort, descending, offset=offset):
+        streamed += 1
+        yield row
+    summary = {"total": streamed, "as_of": format_as_of(as_of)}
+    if offset == 0:
+        summary["counts"] = snapshot.category_counts(subscription_id, count_filters)
+    yield {"summary": summary}
+
+def _snapshot_inventory(snapshot, subscription_id, args, sort, page_size, position, as_of):
+    """Serves the inventory from the local snapshot (offset-based cursors)."""
+    filters = _request_filters(args)
+    count_filters = _count_filters(args)
+    sort_name, descending = sort.lstrip("-"), sort.startswith("-")
+    offset = int(position.get("o", 0))
+
+    if _wants_ndjson():
+        return _ndjson_response(_stream_snapshot_inventory(
+            snapshot, subscription_id, filters, count_filters, sort_name, descending, offset, as_of
+        ))
+
+    resources = list(snapshot.iter_resources(subscription_id, filters, sort_name, descending, offset=offset, limit=page_size))
+    total = snapshot.count_resources(subscription_id, filters)
+    next_offset = offset + len(resources)
+    payload = {
+        "resources": resources,
+        "total": total,
+        "next_cursor": _encode_cursor({"o": next_offset}) if next_offset < total else None,
+        "as_of": format_as_of(as_of)
+    }
+    if offset == 0:
+        payload["counts"] = snapshot.category_counts(subscription_id, count_filters)
+    return jsonify(payload)
+
+def _stream_inventory(resource_graph_client, subscription_id, query_str, skip_token, counts):
+    """
+    NDJSON records for the inventory: one resource per line, then a
+    {"summary": {...}} line with the row count (and counts on the first page).
+    Pages are fetched one after another, so only one page is held at a time.
+    """
+    streamed = 0
+    for item in query_rows(resource_graph_client, [subscription_id], query_str, skip_token=skip_token):
+        streamed += 1
+        yield _inventory_row(item)
+    summary = {"total": streamed, "as_of": format_as_of(time.time())}
+    if counts is not None:
+        summary["counts"] = _inventory_counts_result(counts)
+    yield {"summary": summary}
+
 @resources_bp.route("/resources/<subscription_id>", methods=["GET"])
 def get_resources(subscription_id):
-    credential = DefaultAzureCredential()
-    resource_client = ResourceManagementClient(credential=credential, subscription_id=subscription_id)
-    resources = []
-    for resource in resource_client.resources.list():
-        resources.append({
-            "name": resource.name,
-            "type": resource.type,
-            "location": resource.location,
-            "status": "Active" if resource.properties else "Unknown"
-        })
-    return jsonify({"resources": resources})
+    """
+    Paginated, filterable resource inventory backed by Resource Graph.
+
+    Query parameters (all optional):
+      type, location, resource_group, name_prefix, tag (key or key:value),
+      category (Compute/Storage/Network/Database/Other),
+      sort (name, type, location, resource_group; prefix '-' for descending),
+      page_size (1 to 1000), cursor (from a previous 'next_cursor').
+    The first page (no cursor) also returns per-category 'counts'.
+    Once the local inventory snapshot holds the subscription it answers from
+    there; 'as_of' is the freshness watermark of the data.
+
+    With 'Accept: application/x-ndjson' or ?stream=1 every matching resource
+    (from the cursor on) is streamed as NDJSON instead of a single page.
+    """
+    args = request.args
+    sort = args.get("sort", "name")
+    sort_key = INVENTORY_SORT_KEYS.get(sort.lstrip("-"))
+    if not sort_key:
+        return jsonify({"error": f"Invalid sort key. Use one of: {', '.join(INVENTORY_SORT_KEYS)}"}), 400
+    direction = "desc" if sort.startswith("-") else "asc"
 
-@resources_bp.route("/orphans/<subscription_id>", methods=["GET"])
-def get_orphans(subscription_id):
-    credential = DefaultAzureCredential()
     try:
-        resource_graph_client = ResourceGraphClient(credential)
+        page_size = min(int(args.get("page_size", INVENTORY_DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        position = _decode_cursor(args["cursor"]) if args.get("cursor") else {}
+    except (ValueError, KeyError, TypeError):
+        return jsonify({"error": "Invalid page_size or cursor"}), 400
+    skip_token = position.get("t")
 
-        disk_query = f"""
-        Resources
-        | where subscriptionId == '{subscription_id}'
-        | where type == 'microsoft.compute/disks'
-        | where isnull(managedBy) and properties.diskState == 'Unattached'
-        | project name, type, location, resourceGroup, id
-        """
-        
-        nic_query = f"""
-        Resources
-        | where subscriptionId == '{subscription_id}'
-        | where type == 'microsoft.network/networkinterfaces'
-        | where isnull(properties.virtualMachine.id)
-        | project name, type, location, resourceGroup, id
-        """
-        
-        pip_query = f"""
-        Resources
-        | where subscriptionId == '{subscription_id}'
-        | where type == 'microsoft.network/publicipaddresses'
-        | where isnull(properties.ipConfiguration.id)
-        | project name, type, location, resourceGroup, id
-        """
-        
-        nsg_query = f"""
+    try:
+        # A cursor from a live Resource Graph page keeps paging live
+        snapshot = get_snapshot()
+        as_of = snapshot.ready(subscription_id) if snapshot and skip_token is None else None
+        if as_of is not None:
+            return _snapshot_inventory(snapshot, subscription_id, args, sort, page_size, position, as_of)
+        if "o" in position:
+            return jsonify({"error": "Cursor expired, restart from the first page"}), 400
+
+        resource_graph_client = get_clients().get_client(ResourceGraphClient)
+        filters = _inventory_filters(subscription_id, args)
+
+        category_filter = ""
+        if args.get("category"):
+            category_filter = f"| where category == {kql_string(args['category'])}"
+
+        query_str = f"""
         Resources
-        | where subscriptionId == '{subscription_id}'
-        | where type == 'microsoft.network/networksecuritygroups'
-        | where isnull(properties.subnets) and isnull(properties.networkInterfaces)
-        | project name, type, location, resourceGroup, id
+        {filters}
+        {RESOURCE_CATEGORY_KQL}
+        {category_filter}
+        | project id, name, type, location, resourceGroup, category,
+                  status = coalesce(tostring(properties.provisioningState), 'Unknown')
+        | order by {sort_key} {direction}, id asc
         """
 
-        rg_query = f"""
+        # The chart aggregate only accompanies the first page; run it alongside
+        counts = None
+        if skip_token is None:
+            counts = _submit_inventory_counts(
+                resource_graph_client, subscription_id, _inventory_filters(subscription_id, _count_filters(args))
+            )
+
+        if _wants_ndjson():
+            return _ndjson_response(_stream_inventory(
+                resource_graph_client, subscription_id, query_str, skip_token, counts
+            ))
+
+        rows, next_token, total = query_page(resource_graph_client, [subscription_id], query_str, page_size, skip_token=skip_token)
+        resources = [_inventory_row(item) for item in rows]
+
+        payload = {
+            "resources": resources,
+            "total": total,
+            "next_cursor": _encode_cursor({"t": next_token}) if next_token else None,
+            "as_of": format_as_of(time.time())
+        }
+        if counts is not None:
+            payload["counts"] = _inventory_counts_result(counts)
+        return jsonify(payload)
+
+    except Exception as e:
+        current_app.logger.error(f"Failed to fetch resources: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+# One Resource Graph query for every orphan category, tagged by category, so a
+# scan costs a single round trip instead of five. It is scoped by the
+# subscriptions of the request, so the same query serves one subscription or a
+# batch of them (rows carry subscriptionId).
+ORPHAN_SCAN_QUERY = f"""
+    Resources
+    | where type in ('microsoft.compute/disks', 'microsoft.network/networkinterfaces',
+                     'microsoft.network/publicipaddresses', 'microsoft.network/networksecuritygroups')
+    | extend category = {ORPHAN_CATEGORY_KQL}
+    | where category != ''
+    | project subscriptionId, category, name, type, location, resourceGroup, id
+    | union (
         ResourceContainers
-        | where type == 'microsoft.resources/subscriptions/resourcegroups' and subscriptionId == '{subscription_id}'
-        | project rgName = name, rgId = id, rgLocation = location, resourceGroup = name
+        | where type == 'microsoft.resources/subscriptions/resourcegroups'
+        | project subscriptionId, rgName = name, rgId = id, rgLocation = location, rgKey = tolower(name)
         | join kind=leftouter (
             Resources
-            | where subscriptionId == '{subscription_id}'
-            | project resourceGroup
-        ) on $left.rgName == $right.resourceGroup
-        | where isnull(resourceGroup1)
-        | distinct rgName, rgId, rgLocation, resourceGroup
-        | project name = rgName, type='Microsoft.Resources/resourceGroups (Empty)', location = rgLocation, resourceGroup, id = rgId
-        """
+            | extend rgKey = tolower(resourceGroup)
+            | distinct subscriptionId, rgKey
+        ) on subscriptionId, rgKey
+        | where isempty(rgKey1)
+        | project subscriptionId, category = 'rgs', name = rgName, type = 'Microsoft.Resources/resourceGroups (Empty)',
+                  location = rgLocation, resourceGroup = rgName, id = rgId
+    )
+    | order by id asc
+    """
 
-        queries = {
-            "disks": disk_query,
-            "nics": nic_query,
-            "pips": pip_query,
-            "nsgs": nsg_query,
-            "rgs": rg_query  # <-- Corrected variable name
-        }
-        
-        results = { "disks": [], "nics": [], "pips": [], "nsgs": [], "rgs": [] }
-
-        for key, query_str in queries.items():
-            if key == 'rgs':
-                query_options = None 
-            else:
-                query_options = None 
-
-            query = QueryRequest(subscriptions=[subscription_id], query=query_str, options=query_options)
-            query_response = resource_graph_client.resources(query)
-            
-            for item in query_response.data:
-                results[key].append({
-                    "name": item.get('name'),
-                    "type": item.get('type'),
-                    "location": item.get('location'),
-                    "resource_group": item.get('resourceGroup'),
-                    "id": item.get('id')
-                })
-                
-        return jsonify(results)
+def _orphan_row(item):
+    return {
+        "name": item.get('name'),
+        "type": item.get('type'),
+        "location": item.get('location'),
+        "resource_group": item.get('resourceGroup'),
+        "id": item.get('id')
+    }
+
+def _iter_orphans(clients, subscription_id, deadline=None):
+    """Yields (category, orphan) pairs page by page as Resource Graph returns them."""
+    resource_graph_client = clients.get_client(ResourceGraphClient)
+
+    # Page through every result (Resource Graph caps a page at 1000 rows)
+    for item in query_rows(resource_graph_client, [subscription_id], ORPHAN_SCAN_QUERY, deadline=deadline):
+        yield item.get('category'), _orphan_row(item)
+
+def _scan_orphans(clients, subscription_id, deadline=None):
+    """Runs the orphan scan and groups the rows by category."""
+    results = {category: [] for category in ORPHAN_CATEGORIES}
+    for category, orphan in _iter_orphans(clients, subscription_id, deadline):
+        results[category].append(orphan)
+    return results
+
+def _cached_orphan_scan(subscription_id):
+    """
+    Returns (scan, as_of) without calling Azure: from the local inventory
+    snapshot when it holds the subscription, else a fresh in-memory scan.
+    Returns None when neither is available.
+    """
+    snapshot = get_snapshot()
+    as_of = snapshot.ready(subscription_id) if snapshot else None
+    if as_of is not None:
+        return snapshot.orphans(subscription_id), as_of
+
+    entry = get_cache("orphan_scans").get(subscription_id)
+    if entry is not None:
+        return entry["data"], entry["timestamp"]
+    return None
+
+def _store_orphan_scan(subscription_id, data):
+    get_cache("orphan_scans").set(subscription_id, data)
+
+def _get_orphan_scan_as_of(clients, subscription_id, deadline=None, refresh=False):
+    """
+    Returns (scan, as_of) for a subscription, running a live scan on a miss
+    or when refresh is set. Concurrent misses for the same subscription share
+    one scan through the cache's refresh lock: across threads, and across
+    worker processes on the sqlite backend. The lock is released with the scan,
+    so nothing is kept per subscription.
+    """
+    if not refresh:
+        cached = _cached_orphan_scan(subscription_id)
+        if cached is not None:
+            return cached
+    requested_at = time.time()
+    cache = get_cache("orphan_scans")
+
+    token = cache.try_lock(subscription_id, ORPHAN_SCAN_LOCK_LEASE_SECONDS)
+    if token is None:
+        # Another thread or worker process is scanning this subscription; wait within our own budget
+        timeout = ORPHAN_SCAN_LOCK_LEASE_SECONDS
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+        entry = wait_for_refresh(cache, subscription_id, since=requested_at, timeout=timeout)
+        if entry is not None:
+            return entry["data"], entry["timestamp"]
+    try:
+        # Someone else finished a scan just before we took the lock (newer than our request when refreshing)
+        entry = cache.get(subscription_id)
+        if entry is not None and (not refresh or entry["timestamp"] >= requested_at):
+            return entry["data"], entry["timestamp"]
+        data = _scan_orphans(clients, subscription_id, deadline)
+        _store_orphan_scan(subscription_id, data)
+        return data, time.time()
+    finally:
+        if token is not None:
+            cache.release(subscription_id, token)
+
+def warm_orphan_scan(clients, subscription_id, refresh_ahead=0.8):
+    """
+    Rescans a subscription whose cached scan is missing or past refresh_ahead of
+    its TTL (used by the cache warmer). Subscriptions held by the local snapshot
+    are kept current by its own sync instead. Returns True if it scanned.
+    """
+    snapshot = get_snapshot()
+    if snapshot and snapshot.ready(subscription_id) is not None:
+        return False
+    entry = get_cache("orphan_scans").get(subscription_id)
+    ttl = current_app.config["ORPHAN_SCAN_TTL_SECONDS"]
+    if entry is not None and time.time() - entry["timestamp"] < ttl * refresh_ahead:
+        return False
+    _get_orphan_scan_as_of(clients, subscription_id, refresh=True)
+    return True
+
+def _get_orphan_scan(clients, subscription_id, deadline=None, refresh=False):
+    """Returns the orphan scan for a subscription (see _get_orphan_scan_as_of)."""
+    return _get_orphan_scan_as_of(clients, subscription_id, deadline, refresh)[0]
+
+def _get_orphan_scans(clients, subscription_ids, deadline=None, refresh=False):
+    """
+    Orphan scans for many subscriptions: {subscription_id: (scan, as_of)}.
+    Snapshot or cached scans are reused; all remaining subscriptions are
+    scanned together with batched Resource Graph queries.
+    """
+    scans = {}
+    if not refresh:
+        for subscription_id in subscription_ids:
+            cached = _cached_orphan_scan(subscription_id)
+            if cached is not None:
+                scans[subscription_id] = cached
+
+    missing = [subscription_id for subscription_id in subscription_ids if subscription_id not in scans]
+    if missing:
+        resource_graph_client = clients.get_client(ResourceGraphClient)
+        rows = query_rows_shared(
+            resource_graph_client, missing, ORPHAN_SCAN_QUERY,
+            deadline=deadline, batch_size=current_app.config["RESOURCE_GRAPH_SUBSCRIPTION_BATCH"]
+        )
+        scanned_at = time.time()
+        for subscription_id, items in group_by_subscription(rows, missing).items():
+            scan = {category: [] for category in ORPHAN_CATEGORIES}
+            for item in items:
+                scan[item.get('category')].append(_orphan_row(item))
+            _store_orphan_scan(subscription_id, scan)
+            scans[subscription_id] = (scan, scanned_at)
+    return scans
+
+def _stream_orphans(clients, subscription_id, refresh):
+    """
+    NDJSON records for the orphan scan: one orphan per line (with its
+    category), then a {"summary": {...}} line with per-category counts.
+    A snapshot or fresh cached scan is replayed; otherwise rows are streamed
+    live and the completed scan is stored for the dashboard and later requests.
+    """
+    cached = None if refresh else _cached_orphan_scan(subscription_id)
+    results = {category: [] for category in ORPHAN_CATEGORIES}
+    if cached is not None:
+        scan, as_of = cached
+        pairs = ((category, orphan) for category in ORPHAN_CATEGORIES for orphan in scan[category])
+    else:
+        as_of = time.time()
+        pairs = _iter_orphans(clients, subscription_id)
+
+    for category, orphan in pairs:
+        if cached is None:
+            results[category].append(orphan)
+        yield dict(orphan, category=category)
+
+    if cached is None:
+        _store_orphan_scan(subscription_id, results)
+    summary = cached[0] if cached is not None else results
+    counts = {category: len(summary[category]) for category in ORPHAN_CATEGORIES}
+    yield {"summary": dict(counts, as_of=format_as_of(as_of))}
+
+@resources_bp.route("/orphans/<subscription_id>", methods=["GET"])
+def get_orphans(subscription_id):
+    """
+    Lists orphaned disks, NICs, public IPs, NSGs and empty resource groups.
+    Answered from the local inventory snapshot when it holds the subscription,
+    else from a per-subscription cached scan; pass ?refresh=1 to rescan live.
+    The X-Inventory-As-Of header carries the freshness watermark.
+    With 'Accept: application/x-ndjson' or ?stream=1 the orphans are streamed
+    as NDJSON while the scan runs.
+
+    subscription_id may also be 'all' or a comma-separated list; the result is
+    then {"subscriptions": {subscription_id: scan}} (JSON only), and the header
+    carries the oldest watermark.
+    """
+    try:
+        refresh = request.args.get("refresh") == "1"
+        if is_multi_scope(subscription_id):
+            clients = get_clients()
+            scans = _get_orphan_scans(clients, resolve_scope(clients, subscription_id), refresh=refresh)
+            response = jsonify({"subscriptions": {sub: scan for sub, (scan, _) in scans.items()}})
+            if scans:
+                response.headers[AS_OF_HEADER] = format_as_of(min(as_of for _, as_of in scans.values()))
+            return response
+        if _wants_ndjson():
+            return _ndjson_response(_stream_orphans(get_clients(), subscription_id, refresh))
+        data, as_of = _get_orphan_scan_as_of(get_clients(), subscription_id, refresh=refresh)
+        response = jsonify(data)
+        response.headers[AS_OF_HEADER] = format_as_of(as_of)
+        return response
 
     except Exception as e:
         current_app.logger.error(f"Failed to fetch orphans: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+def _get_resource_counts_batch(clients, subscription_ids, deadline=None):
+    """
+    Resource counts by category for many subscriptions: {subscription_id: counts}.
+    Subscriptions held by the local snapshot are counted there; the rest share
+    one batched Resource Graph aggregate.
+    """
+    counts = {}
+    snapshot = get_snapshot()
+    if snapshot:
+        for subscription_id in subscription_ids:
+            if snapshot.ready(subscription_id) is not None:
+                counts[subscription_id] = snapshot.category_counts(subscription_id)
+
+    missing = [subscription_id for subscription_id in subscription_ids if subscription_id not in counts]
+    if missing:
+        query_str = f"""
+        Resources
+        {RESOURCE_CATEGORY_KQL}
+        | summarize count() by subscriptionId, category
+        """
+        rows = query_rows_shared(
+            clients.get_client(ResourceGraphClient), missing, query_str,
+            deadline=deadline, batch_size=current_app.config["RESOURCE_GRAPH_SUBSCRIPTION_BATCH"]
+        )
+        for subscription_id, items in group_by_subscription(rows, missing).items():
+            sub_counts = {"Compute": 0, "Storage": 0, "Network": 0, "Database": 0, "Other": 0}
+            for item in items:
+                if item.get('category') in sub_counts:
+                    sub_counts[item.get('category')] = item.get('count_')
+            counts[subscription_id] = sub_counts
+    return counts
+
+@resources_bp.route("/resource_counts/<scope>", methods=["GET"])
+def get_resource_counts(scope):
+    """
+    Resource counts by category for one subscription, a comma-separated list
+    or 'all', grouped by subscription, plus the totals across the scope.
+    """
+    try:
+        clients = get_clients()
+        counts = _get_resource_counts_batch(clients, resolve_scope(clients, scope))
+        totals = {"Compute": 0, "Storage": 0, "Network": 0, "Database": 0, "Other": 0}
+        for sub_counts in counts.values():
+            for category, count in sub_counts.items():
+                totals[category] += count
+        return jsonify({"subscriptions": counts, "totals": totals})
+
+    except Exception as e:
+        current_app.logger.error(f"Failed to fetch resource counts: {str(e)}")
+        return jsonify({"error": str(e)}), 500
@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify, current_app
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
 from azure.mgmt.security import SecurityCenter
+from cloudone_app.services.azure_clients import get_clients
 
 # Load .env file
 load_dotenv()
@@ -11,9 +11,8 @@ security_bp = Blueprint('api_security', __name__, url_prefix='/api/azure/securit
 
 @security_bp.route("/score/<subscription_id>", methods=["GET"])
 def get_security_score(subscription_id):
-    credential = DefaultAzureCredential()
     try:
-        security_client = SecurityCenter(credential=credential, subscription_id=subscription_id)
+        security_client = get_clients().get_client(SecurityCenter, subscription_id)
         scores_list = list(security_client.secure_scores.list())
 
         if not scores_list:
@@ -1,14 +1,34 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, current_app, request
+from .api.bootstrap import build_bootstrap
 
 views_bp = Blueprint('views', __name__)
 
+def _bootstrap(page):
+    """
+    Data inlined into a page so its script skips the directory and
+    primary-payload round trips (see templates/_bootstrap.html).
+    """
+    if not current_app.config["BOOTSTRAP_INLINE"]:
+        return None
+    try:
+        return build_bootstrap(
+            page,
+            request.args.get("subscription_id"),
+            request.args,
+            include_page_data=current_app.config["BOOTSTRAP_INLINE_PAGE_DATA"]
+        )
+    except Exception as e:
+        # The page still works without it, fetching everything itself
+        current_app.logger.error(f"Bootstrap for {page} failed: {e}")
+        return None
+
 @views_bp.route("/")
 def index():
     return render_template("index.html")
 
 @views_bp.route("/orphaned_resources")
 def orphaned_resources():
-    return render_template("orphaned_resources.html")
+    return render_template("orphaned_resources.html", bootstrap=_bootstrap("orphaned_resources"))
 
 @views_bp.route("/cloud_providers")
 def cloud_providers():
@@ -16,19 +36,19 @@ def cloud_providers():
 
 @views_bp.route("/azure_landing")
 def azure_landing():
-    return render_template("azure_landing.html")
+    return render_template("azure_landing.html", bootstrap=_bootstrap("azure_landing"))
 
 @views_bp.route("/my_resources")
 def my_resources():
-    return render_template("my_resources.html")
+    return render_template("my_resources.html", bootstrap=_bootstrap("my_resources"))
 
 @views_bp.route("/environment_security_score")
 def environment_security_score():
-    return render_template("environment_security_score.html")
+    return render_template("environment_security_score.html", bootstrap=_bootstrap("environment_security_score"))
 
 @views_bp.route("/migration_bot")
 def migration_bot():
-    return render_template("migration_bot.html")
+    return render_template("migration_bot.html", bootstrap=_bootstrap("migration_bot"))
 
 @views_bp.route("/terraform_generator")
 def terraform_generator():
@@ -37,21 +57,21 @@ def terraform_generator():
 
 @views_bp.route("/advisor_recommendations")
 def advisor_recommendations():
-    return render_template("advisor_recommendations.html")
+    return render_template("advisor_recommendations.html", bootstrap=_bootstrap("advisor_recommendations"))
 
 @views_bp.route("/policy_manager")
 def policy_manager():
-    return render_template("policy_manager.html")
+    return render_template("policy_manager.html", bootstrap=_bootstrap("policy_manager"))
 
 # --- ADD THIS NEW ROUTE ---
 @views_bp.route("/resource_optimization")
 def resource_optimization():
-    return render_template("resource_optimization.html")
+    return render_template("resource_optimization.html", bootstrap=_bootstrap("resource_optimization"))
 @views_bp.route("/carbon_footprint")
 def carbon_footprint():
-    return render_template("carbon_footprint.html")
+    return render_template("carbon_footprint.html", bootstrap=_bootstrap("carbon_footprint"))
 
 # --- ADD THIS NEW ROUTE ---
 @views_bp.route("/smart_monitoring")
 def smart_monitoring():
-    return render_template("smart_monitoring.html")
+    return render_template("smart_monitoring.html", bootstrap=_bootstrap("smart_monitoring"))
@@ -10,3 +10,129 @@ class Config:
     HOST = os.environ.get('HOST', '0.0.0.0')
     PORT = int(os.environ.get('PORT', 5000))
     GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
+    # Gemini model used by services/ai_service.py (client set up once in services/ai_clients.py)
+    AI_MODEL_NAME = os.environ.get('AI_MODEL_NAME', 'gemini-2.5-flash')
+    AZURE_IDENTITY_LOG_LEVEL = os.environ.get('AZURE_IDENTITY_LOG_LEVEL', 'INFO').upper()
+    # Shared secret for /api/admin/* (sent as X-Admin-Token); the admin API is off while unset
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+    # --- Shared Azure SDK client pool (services/azure_clients.py) ---
+    # LRU bound on pooled (client type, subscription) clients; evicted clients are closed after the grace period
+    AZURE_CLIENT_POOL_MAX_CLIENTS = int(os.environ.get('AZURE_CLIENT_POOL_MAX_CLIENTS', 256))
+    AZURE_CLIENT_CLOSE_GRACE_SECONDS = int(os.environ.get('AZURE_CLIENT_CLOSE_GRACE_SECONDS', 60))
+
+    # --- Shared worker pool for parallel upstream calls (services/executor.py) ---
+    EXECUTOR_MAX_WORKERS = int(os.environ.get('EXECUTOR_MAX_WORKERS', 32))
+    # Separate pool for concurrent Resource Graph page fetches (services/resource_graph.py)
+    RESOURCE_GRAPH_PAGING_WORKERS = int(os.environ.get('RESOURCE_GRAPH_PAGING_WORKERS', 8))
+
+    # --- Request coalescing (services/coalesce.py) ---
+    # How long a finished upstream result is reused by identical calls that arrive just after it
+    COALESCE_RESULT_TTL_SECONDS = float(os.environ.get('COALESCE_RESULT_TTL_SECONDS', 2))
+
+    # --- Subscription / tenant directory cache (services/directory.py) ---
+    DIRECTORY_CACHE_TTL_SECONDS = int(os.environ.get('DIRECTORY_CACHE_TTL_SECONDS', 5 * 60))
+    # How long past its TTL a listing is still served while it refreshes in the background
+    DIRECTORY_CACHE_MAX_STALE_SECONDS = int(os.environ.get('DIRECTORY_CACHE_MAX_STALE_SECONDS', 60 * 60))
+
+    # --- Page bootstrap (blueprints/api/bootstrap.py) ---
+    # Views inline the directory and (optionally) the page's first payload into the HTML
+    BOOTSTRAP_INLINE = os.environ.get('BOOTSTRAP_INLINE', 'True').lower() == 'true'
+    BOOTSTRAP_INLINE_PAGE_DATA = os.environ.get('BOOTSTRAP_INLINE_PAGE_DATA', 'True').lower() == 'true'
+    BOOTSTRAP_DEADLINE_SECONDS = float(os.environ.get('BOOTSTRAP_DEADLINE_SECONDS', 3))
+    # Dedicated pool for the inlined page payloads, which re-enter API routes that use the shared executor
+    BOOTSTRAP_WORKERS = int(os.environ.get('BOOTSTRAP_WORKERS', 8))
+
+    # --- ARM REST client (services/arm_rest.py) ---
+    ARM_TIMEOUT_SECONDS = float(os.environ.get('ARM_TIMEOUT_SECONDS', 30))
+    ARM_MAX_RETRIES = int(os.environ.get('ARM_MAX_RETRIES', 4))
+    ARM_POOL_SIZE = int(os.environ.get('ARM_POOL_SIZE', 20))
+
+    # --- Advisor recommendation store (services/advisor_store.py) ---
+    ADVISOR_CACHE_TTL_SECONDS = int(os.environ.get('ADVISOR_CACHE_TTL_SECONDS', 15 * 60))
+    ADVISOR_CACHE_MAX_ENTRIES = int(os.environ.get('ADVISOR_CACHE_MAX_ENTRIES', 1000))
+    ADVISOR_CACHE_MAX_BYTES = int(os.environ.get('ADVISOR_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+    # --- Orphan scan cache (blueprints/api/resources.py) ---
+    ORPHAN_SCAN_TTL_SECONDS = int(os.environ.get('ORPHAN_SCAN_TTL_SECONDS', 5 * 60))
+
+    # --- Inventory API (blueprints/api/resources.py) ---
+    # How long the first inventory page waits for its chart counts before answering without them
+    INVENTORY_COUNTS_TIMEOUT_SECONDS = float(os.environ.get('INVENTORY_COUNTS_TIMEOUT_SECONDS', 30))
+
+    # --- Multi-subscription Resource Graph queries (services/resource_graph.py) ---
+    # Subscriptions per query for the 'all' / list-scoped endpoints (API limit: 1000)
+    RESOURCE_GRAPH_SUBSCRIPTION_BATCH = int(os.environ.get('RESOURCE_GRAPH_SUBSCRIPTION_BATCH', 1000))
+
+    # --- Local inventory snapshot (services/inventory_snapshot.py) ---
+    # SQLite copy of the Resource Graph inventory; defaults to instance/inventory.sqlite3
+    INVENTORY_SNAPSHOT_ENABLED = os.environ.get('INVENTORY_SNAPSHOT_ENABLED', 'True').lower() == 'true'
+    INVENTORY_SNAPSHOT_PATH = os.environ.get('INVENTORY_SNAPSHOT_PATH')
+    INVENTORY_SYNC_INTERVAL_SECONDS = int(os.environ.get('INVENTORY_SYNC_INTERVAL_SECONDS', 120))
+    INVENTORY_FULL_RESYNC_SECONDS = int(os.environ.get('INVENTORY_FULL_RESYNC_SECONDS', 24 * 3600))
+    # Past this many sync intervals without a successful sync, readers fall back to live Resource Graph
+    INVENTORY_MAX_STALENESS_INTERVALS = int(os.environ.get('INVENTORY_MAX_STALENESS_INTERVALS', 10))
+
+    # --- Bounded caches (services/cache.py) ---
+    # "memory" keeps caches per process; "sqlite" shares them between worker
+    # processes through one file (default instance/cache.sqlite3, which always
+    # holds the cross-process leases). Each cache has its
+    # own byte budget; dashboard + advisor + orphan_scans + jobs = 128 MiB by default
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory').lower()
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH')
+    CACHE_SWEEP_INTERVAL_SECONDS = int(os.environ.get('CACHE_SWEEP_INTERVAL_SECONDS', 60))
+    DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', 5000))
+    DASHBOARD_CACHE_MAX_BYTES = int(os.environ.get('DASHBOARD_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    ORPHAN_CACHE_MAX_ENTRIES = int(os.environ.get('ORPHAN_CACHE_MAX_ENTRIES', 1000))
+    ORPHAN_CACHE_MAX_BYTES = int(os.environ.get('ORPHAN_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+    # --- Background cache warming (services/warmer.py) ---
+    # Keeps dashboard widgets, orphan scans and Advisor data of every subscription warm
+    CACHE_WARMER_ENABLED = os.environ.get('CACHE_WARMER_ENABLED', 'True').lower() == 'true'
+    CACHE_WARMER_INTERVAL_SECONDS = int(os.environ.get('CACHE_WARMER_INTERVAL_SECONDS', 120))
+    CACHE_WARMER_JITTER = float(os.environ.get('CACHE_WARMER_JITTER', 0.2))
+    CACHE_WARMER_MAX_CONCURRENCY = int(os.environ.get('CACHE_WARMER_MAX_CONCURRENCY', 4))
+    CACHE_WARMER_SUBSCRIPTION_REFRESH_SECONDS = int(os.environ.get('CACHE_WARMER_SUBSCRIPTION_REFRESH_SECONDS', 15 * 60))
+    # Only the worker process holding this lease (renewed every third of it) runs warm jobs
+    CACHE_WARMER_LEASE_SECONDS = int(os.environ.get('CACHE_WARMER_LEASE_SECONDS', 60))
+
+    # --- Generated IaC cache (services/ai_service.py) ---
+    # Always on disk (default instance/ai_cache.sqlite3) so answers survive restarts
+    IAC_CACHE_PATH = os.environ.get('IAC_CACHE_PATH')
+    IAC_CACHE_MAX_ENTRIES = int(os.environ.get('IAC_CACHE_MAX_ENTRIES', 500))
+    IAC_CACHE_MAX_BYTES = int(os.environ.get('IAC_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    IAC_CACHE_TTL_SECONDS = int(os.environ.get('IAC_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+
+    # --- AI remediation guides (services/remediation_store.py), stored next to the IaC cache ---
+    REMEDIATION_CACHE_MAX_ENTRIES = int(os.environ.get('REMEDIATION_CACHE_MAX_ENTRIES', 5000))
+    REMEDIATION_CACHE_TTL_SECONDS = int(os.environ.get('REMEDIATION_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+    REMEDIATION_CACHE_MAX_BYTES = int(os.environ.get('REMEDIATION_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    # Background pre-generation for the problems of every subscription's Advisor recommendations.
+    # Off by default: it spends Gemini calls on guides nobody may ask for
+    REMEDIATION_PREGEN_ENABLED = os.environ.get('REMEDIATION_PREGEN_ENABLED', 'False').lower() == 'true'
+    REMEDIATION_PREGEN_CONCURRENCY = int(os.environ.get('REMEDIATION_PREGEN_CONCURRENCY', 2))
+    REMEDIATION_PREGEN_MAX_PER_RUN = int(os.environ.get('REMEDIATION_PREGEN_MAX_PER_RUN', 50))
+
+    # --- Background jobs for the AI endpoints (services/jobs.py) ---
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+    JOB_MAX_QUEUE = int(os.environ.get('JOB_MAX_QUEUE', 100))
+    # How long finished jobs (and their results) can be fetched, and how many are kept
+    JOB_RESULT_TTL_SECONDS = int(os.environ.get('JOB_RESULT_TTL_SECONDS', 3600))
+    JOB_MAX_RETAINED = int(os.environ.get('JOB_MAX_RETAINED', 10000))
+    JOB_CACHE_MAX_BYTES = int(os.environ.get('JOB_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+    # --- Dashboard widget cache TTLs in seconds (blueprints/api/dashboard.py) ---
+    DASHBOARD_WIDGET_TTLS = {
+        "carbon": int(os.environ.get('DASHBOARD_TTL_CARBON', 6 * 3600)),
+        "advisor_scores": int(os.environ.get('DASHBOARD_TTL_ADVISOR', 15 * 60)),
+        "insights": int(os.environ.get('DASHBOARD_TTL_ADVISOR', 15 * 60)),
+        "security_score": int(os.environ.get('DASHBOARD_TTL_SECURITY', 15 * 60)),
+        "orphans": int(os.environ.get('DASHBOARD_TTL_INVENTORY', 5 * 60)),
+        "resource_counts": int(os.environ.get('DASHBOARD_TTL_INVENTORY', 5 * 60)),
+        "monitoring": int(os.environ.get('DASHBOARD_TTL_MONITORING', 30)),
+    }
+
+    # Request-level budget for the dashboard fan-out; late widgets fall back to their
+    # last known value. Upstream calls made by a widget refresh get their own budget.
+    DASHBOARD_DEADLINE_SECONDS = float(os.environ.get('DASHBOARD_DEADLINE_SECONDS', 8))
+    DASHBOARD_UPSTREAM_TIMEOUT_SECONDS = float(os.environ.get('DASHBOARD_UPSTREAM_TIMEOUT_SECONDS', 30))
@@ -0,0 +1,123 @@
+import logging
+import time
+from threading import Lock
+
+from flask import current_app
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+ADVISOR_API_VERSION = "2023-01-01"
+
+
+def total_savings(recommendations):
+    """Sums extendedProperties.savingsAmount over a list of raw recommendations."""
+    total = 0.0
+    for rec in recommendations:
+        amount = rec.get('properties', {}).get('extendedProperties', {}).get('savingsAmount', 0)
+        try:
+            total += float(amount)
+        except (TypeError, ValueError):
+            continue
+    return round(total, 2)
+
+
+class AdvisorRecommendationStore:
+    """
+    Category-indexed cache of Azure Advisor recommendations, kept in the
+    bounded "advisor" cache (services/cache.py) so it obeys the same entry and
+    byte limits as the other caches and, with the sqlite backend, is shared by
+    all worker processes.
+    One paginated fetch per subscription (all categories at once) serves the
+    dashboard insights, the per-category endpoint and the savings totals
+    until the TTL expires. Concurrent misses for a subscription share one fetch.
+    """
+
+    def __init__(self, arm, cache, coalescer, ttl):
+        self._arm = arm
+        self._cache = cache
+        self._coalescer = coalescer
+        self.ttl = ttl
+        self._lock = Lock()
+        self._hits = 0
+        self._fetches = 0
+
+    def _load(self, subscription_id, deadline=None):
+        recommendations = self._arm.get_all(
+            f"/subscriptions/{subscription_id}/providers/Microsoft.Advisor/recommendations",
+            params={"api-version": ADVISOR_API_VERSION},
+            deadline=deadline
+        )
+        by_category = {}
+        for rec in recommendations:
+            category = rec.get('properties', {}).get('category') or 'Other'
+            by_category.setdefault(category.lower(), []).append(rec)
+        app_logger.info(f"Fetched {len(recommendations)} Advisor recommendations for sub {subscription_id}")
+        return by_category
+
+    def _fetch(self, subscription_id, deadline=None):
+        # Only one thread fetches a subscription; the others wait and reuse its result
+        def load():
+            by_category = self._load(subscription_id, deadline)
+            self._cache.set(subscription_id, by_category, ttl=self.ttl)
+            with self._lock:
+                self._fetches += 1
+            return by_category
+        return self._coalescer.run("advisor.recommendations", subscription_id, None, load)
+
+    def _get_entry(self, subscription_id, deadline=None):
+        entry = self._cache.get(subscription_id)
+        if entry is not None:
+            with self._lock:
+                self._hits += 1
+            return entry["data"]
+        return self._fetch(subscription_id, deadline)
+
+    def warm(self, subscription_id, refresh_ahead=0.8, deadline=None):
+        """
+        Refetches a subscription whose entry is missing or past refresh_ahead
+        of its TTL, so readers never hit an expired entry. The old entry keeps
+        serving until the new one is stored. Returns True if it fetched.
+        """
+        entry = self._cache.get(subscription_id)
+        if entry and time.time() - entry["timestamp"] < self.ttl * refresh_ahead:
+            return False
+        self._fetch(subscription_id, deadline)
+        return True
+
+    def get_category(self, subscription_id, category, deadline=None):
+        """
+        Returns the raw recommendations of one Advisor category
+        (Cost, Security, HighAvailability, Performance, OperationalExcellence).
+        """
+        by_category = self._get_entry(subscription_id, deadline)
+        return by_category.get(category.lower(), [])
+
+    def invalidate(self, subscription_id):
+        self._cache.delete(subscription_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscriptions": self._cache.stats()["entries"],
+                "hits": self._hits,
+                "upstream_fetches": self._fetches
+            }
+
+
+def init_app(app):
+    """
+    Creates the Advisor recommendation store, backed by the shared ARM client
+    and the "advisor" cache.
+    """
+    app.extensions["advisor_store"] = AdvisorRecommendationStore(
+        app.extensions["arm_rest"],
+        app.extensions["caches"].get("advisor"),
+        app.extensions["coalescer"],
+        ttl=app.config["ADVISOR_CACHE_TTL_SECONDS"]
+    )
+
+
+def get_advisor_store():
+    """Returns the Advisor recommendation store of the current app."""
+    return current_app.extensions["advisor_store"]
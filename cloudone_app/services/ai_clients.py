@@ -0,0 +1,135 @@
+import logging
+import time
+from threading import Lock
+
+import google.generativeai as genai
+from flask import current_app
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+
+class AIClientNotConfigured(RuntimeError):
+    """Raised when a Gemini call is made without GOOGLE_API_KEY."""
+
+
+class AIClientManager:
+    """
+    Process-wide Gemini client. The API key is configured once at startup,
+    and GenerativeModel instances are cached per (model_name, system_instruction),
+    so a request goes straight to the network call. The prompts are fixed per
+    operation, so the cache stays small. Models are stateless between
+    generate_content calls and are shared by all threads.
+    Per-operation call counts, latency and errors are kept for /api/admin/metrics.
+    """
+
+    def __init__(self, api_key, default_model):
+        self.default_model = default_model
+        self.configured = bool(api_key)
+        if self.configured:
+            genai.configure(api_key=api_key)
+        self._json_config = genai.types.GenerationConfig(response_mime_type="application/json")
+        self._models = {}
+        self._lock = Lock()
+        self._model_creations = 0
+        self._stats = {}
+
+    def get_model(self, system_instruction, model_name=None):
+        """Returns the cached GenerativeModel for this model and system prompt."""
+        if not self.configured:
+            raise AIClientNotConfigured("GOOGLE_API_KEY not set in .env file")
+        key = (model_name or self.default_model, system_instruction)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(model_name=key[0], system_instruction=system_instruction)
+                self._models[key] = model
+                self._model_creations += 1
+            return model
+
+    def _record(self, operation, elapsed, error=False, first_chunk=None):
+        with self._lock:
+            stats = self._stats.setdefault(operation, {
+                "calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                "streams": 0, "total_first_chunk_seconds": 0.0
+            })
+            stats["calls"] += 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            if error:
+                stats["errors"] += 1
+            if first_chunk is not None:
+                stats["streams"] += 1
+                stats["total_first_chunk_seconds"] += first_chunk
+
+    def generate(self, operation, system_instruction, user_prompt, json_response=False, model_name=None):
+        """
+        Runs one generate_content call and returns the response text.
+        operation names the call in the metrics (e.g. "iac.bicep").
+        """
+        model = self.get_model(system_instruction, model_name)
+        kwargs = {"generation_config": self._json_config} if json_response else {}
+        start = time.perf_counter()
+        try:
+            text = model.generate_content(user_prompt, **kwargs).text
+        except Exception:
+            self._record(operation, time.perf_counter() - start, error=True)
+            raise
+        self._record(operation, time.perf_counter() - start)
+        return text
+
+    def generate_stream(self, operation, system_instruction, user_prompt, json_response=False, model_name=None):
+        """
+        Streaming variant of generate(): yields the response text chunk by
+        chunk as Gemini produces it. Time to the first chunk is recorded next
+        to the total latency.
+        """
+        model = self.get_model(system_instruction, model_name)
+        kwargs = {"generation_config": self._json_config} if json_response else {}
+        start = time.perf_counter()
+        first_chunk = None
+        try:
+            for chunk in model.generate_content(user_prompt, stream=True, **kwargs):
+                text = chunk.text
+                if not text:
+                    continue
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+                yield text
+        except Exception:
+            self._record(operation, time.perf_counter() - start, error=True)
+            raise
+        self._record(operation, time.perf_counter() - start, first_chunk=first_chunk or 0.0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "configured": self.configured,
+                "default_model": self.default_model,
+                "cached_models": len(self._models),
+                "model_creations": self._model_creations,
+                "operations": {
+                    operation: {
+                        "calls": s["calls"],
+                        "errors": s["errors"],
+                        "avg_seconds": round(s["total_seconds"] / s["calls"], 3) if s["calls"] else 0,
+                        "max_seconds": round(s["max_seconds"], 3),
+                        "streams": s["streams"],
+                        "avg_first_chunk_seconds": round(s["total_first_chunk_seconds"] / s["streams"], 3) if s["streams"] else None
+                    }
+                    for operation, s in self._stats.items()
+                }
+            }
+
+
+def init_app(app):
+    """Configures Gemini once from Config.GOOGLE_API_KEY."""
+    manager = AIClientManager(app.config["GOOGLE_API_KEY"], app.config["AI_MODEL_NAME"])
+    if not manager.configured:
+        app_logger.warning("GOOGLE_API_KEY is not set; AI endpoints will return errors")
+    app.extensions["ai_clients"] = manager
+
+
+def get_ai_clients():
+    """Returns the Gemini client manager of the current app."""
+    return current_app.extensions["ai_clients"]
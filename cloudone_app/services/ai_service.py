@@ -1,19 +1,27 @@
-import os
+import hashlib
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
 import logging
+import time
+from flask import current_app
+from cloudone_app.services.ai_clients import get_ai_clients
+from cloudone_app.services.cache import get_cache
+from cloudone_app.services.coalesce import get_coalescer
 
 # Get a logger for this module
 app_logger = logging.getLogger(__name__)
 
+# Part of the IaC cache key: bump it whenever an IaC prompt changes so cached
+# answers generated from the old prompt are no longer served
+IAC_PROMPT_VERSION = 1
+# Same for the remediation prompt (services/remediation_store.py)
+REMEDIATION_PROMPT_VERSION = 1
+
 #
 # --- THIS IS THE OLD, RENAMED FUNCTION ---
 #
-def get_terraform_code(module_type, resources):
+def terraform_prompts(module_type, resources):
     """
-    Generates Terraform project structure.
-    This is the original function, now nested.
+    Returns the (system_prompt, user_prompt) pair for a Terraform project.
     """
     # Helper function to get the resource "short name" (e.g., "vnet")
     def get_short_name(resource_type):
@@ -99,20 +107,18 @@ INSTRUCTIONS:
 """
         user_prompt = f"Generate the 'AVM' wrapper module project for these resources: {', '.join(resources)}"
 
+    return system_prompt, user_prompt
+
+
+def get_terraform_code(module_type, resources):
+    """
+    Generates Terraform project structure.
+    """
+    system_prompt, user_prompt = terraform_prompts(module_type, resources)
     try:
-        model = genai.GenerativeModel(
-            # --- CHANGE 1 ---
-            model_name="gemini-2.5-flash", # Was gemini-1.5-flash
-            system_instruction=system_prompt
+        response_content = get_ai_clients().generate(
+            iac_operation('terraform', module_type), system_prompt, user_prompt, json_response=True
         )
-        generation_config = genai.types.GenerationConfig(
-            response_mime_type="application/json"
-        )
-        response = model.generate_content(
-            user_prompt,
-            generation_config=generation_config
-        )
-        response_content = response.text
         # This is the Terraform project structure
         return json.loads(response_content)
     except Exception as e:
@@ -122,9 +128,9 @@ INSTRUCTIONS:
 #
 # --- ADD THIS NEW BICEP PROMPT ---
 #
-def get_bicep_code(resources):
+def bicep_prompts(resources):
     """
-    Generates a single, comprehensive main.bicep file.
+    Returns the (system_prompt, user_prompt) pair for a single main.bicep file.
     """
     system_prompt = """You are an expert Azure Bicep developer.
 Your task is to generate a single, complete `main.bicep` file based on a list of requested Azure resources.
@@ -145,21 +151,16 @@ Example Response:
 }
 """
     user_prompt = f"Generate the `main.bicep` file content for these Azure resources: {', '.join(resources)}. Include sensible defaults and wire them together."
+    return system_prompt, user_prompt
+
 
+def get_bicep_code(resources):
+    """
+    Generates a single, comprehensive main.bicep file.
+    """
+    system_prompt, user_prompt = bicep_prompts(resources)
     try:
-        model = genai.GenerativeModel(
-            # --- CHANGE 2 ---
-            model_name="gemini-2.5-flash", # Was gemini-1.5-flash
-            system_instruction=system_prompt
-        )
-        generation_config = genai.types.GenerationConfig(
-            response_mime_type="application/json"
-        )
-        response = model.generate_content(
-            user_prompt,
-            generation_config=generation_config
-        )
-        response_content = response.text
+        response_content = get_ai_clients().generate("iac.bicep", system_prompt, user_prompt, json_response=True)
         return json.loads(response_content)
     except Exception as e:
         app_logger.error(f"Error calling Gemini API for Bicep: {e}")
@@ -168,9 +169,9 @@ Example Response:
 #
 # --- ADD THIS NEW ARM PROMPT ---
 #
-def get_arm_code(resources):
+def arm_prompts(resources):
     """
-    Generates a single, comprehensive template.json file.
+    Returns the (system_prompt, user_prompt) pair for a single template.json file.
     """
     system_prompt = """You are an expert Azure ARM Template developer.
 Your task is to generate a single, complete `template.json` file based on a list of requested Azure resources.
@@ -215,21 +216,16 @@ Example Response:
 }
 """
     user_prompt = f"Generate the `template.json` for these Azure resources: {', '.join(resources)}. Include sensible defaults and wire them together."
+    return system_prompt, user_prompt
 
+
+def get_arm_code(resources):
+    """
+    Generates a single, comprehensive template.json file.
+    """
+    system_prompt, user_prompt = arm_prompts(resources)
     try:
-        model = genai.GenerativeModel(
-            # --- CHANGE 3 ---
-            model_name="gemini-2.5-flash", # Was gemini-1.5-flash
-            system_instruction=system_prompt
-        )
-        generation_config = genai.types.GenerationConfig(
-            response_mime_type="application/json"
-        )
-        response = model.generate_content(
-            user_prompt,
-            generation_config=generation_config
-        )
-        response_content = response.text
+        response_content = get_ai_clients().generate("iac.arm", system_prompt, user_prompt, json_response=True)
         # The response *is* the JSON, so we package it into our file format
         return {"template.json": response_content}
     except Exception as e:
@@ -237,6 +233,12 @@ Example Response:
         return {"error": f"Failed to get AI recommendation: {str(e)}"}
 
 
+def iac_operation(iac_type, module_type=None):
+    """Name of an IaC call in the AI client metrics, e.g. iac.terraform.avm."""
+    if iac_type == 'terraform':
+        return f"iac.terraform.{'custom' if module_type == 'custom' else 'avm'}"
+    return f"iac.{iac_type}"
+
 #
 # --- THIS IS THE NEW, REFACTORED MAIN FUNCTION ---
 #
@@ -244,15 +246,9 @@ def get_iac_code(iac_type, module_type, resources):
     """
     Main service function to route IaC generation.
     """
-    load_dotenv()
-    try:
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not set in .env file")
-        genai.configure(api_key=api_key)
-
-    except Exception as e:
-        app_logger.error(f"Failed to initialize Gemini client: {e}. Is GOOGLE_API_KEY set?")
+    # Gemini is configured once at startup (services/ai_clients.py)
+    if not get_ai_clients().configured:
+        app_logger.error("Gemini client is not configured. Is GOOGLE_API_KEY set?")
         return {"error": "Failed to initialize AI client. Check server logs."}
     
     # This is the final JSON we will send to the frontend
@@ -293,19 +289,77 @@ def get_iac_code(iac_type, module_type, resources):
         app_logger.error(f"Failed to generate IaC: {str(e)}")
         return {"error": str(e)}
 
+def normalize_resources(resources):
+    """Strips, de-duplicates (case-insensitively) and sorts a resource list."""
+    unique = {}
+    for resource in resources:
+        resource = str(resource).strip()
+        if resource:
+            unique.setdefault(resource.lower(), resource)
+    return [unique[key] for key in sorted(unique)]
+
+
+def iac_cache_key(iac_type, module_type, resources):
+    """
+    Content hash of a normalized IaC request: the same resources in any order
+    or case, for the same type, module type, prompt version and model, share
+    one cached answer.
+    """
+    request = {
+        "v": IAC_PROMPT_VERSION,
+        "model": get_ai_clients().default_model,
+        "iac_type": str(iac_type).lower(),
+        "module_type": str(module_type).lower() if iac_type == 'terraform' else None,
+        "resources": [resource.lower() for resource in normalize_resources(resources)]
+    }
+    body = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def lookup_iac_code(iac_type, module_type, resources):
+    """Returns (payload, age_seconds) from the IaC cache, or None on a miss."""
+    entry = get_cache("iac").get(iac_cache_key(iac_type, module_type, resources))
+    if entry is None:
+        return None
+    return entry["data"], int(time.time() - entry["timestamp"])
+
+
+def store_iac_code(iac_type, module_type, resources, payload):
+    """Saves a generated IaC payload in the IaC cache."""
+    get_cache("iac").set(iac_cache_key(iac_type, module_type, resources), payload)
+
+
+def get_iac_code_cached(iac_type, module_type, resources, fresh=False):
+    """
+    get_iac_code behind the persistent "iac" cache (services/cache.py).
+    Returns (payload, cache_status, age_seconds): status is HIT, MISS or
+    BYPASS (fresh=True regenerates and replaces the cached answer).
+    Identical concurrent misses share one Gemini call; errors are not cached.
+    """
+    resources = normalize_resources(resources)
+    if not fresh:
+        cached = lookup_iac_code(iac_type, module_type, resources)
+        if cached is not None:
+            return cached[0], "HIT", cached[1]
+
+    def generate():
+        payload = get_iac_code(iac_type, module_type, resources)
+        if "error" not in payload:
+            store_iac_code(iac_type, module_type, resources, payload)
+        return payload
+
+    started = time.perf_counter()
+    payload = get_coalescer().run("gemini.iac", None, iac_cache_key(iac_type, module_type, resources), generate)
+    current_app.logger.info(f"IaC {iac_type} generated in {time.perf_counter() - started:.1f}s ({len(resources)} resources)")
+    return payload, "BYPASS" if fresh else "MISS", 0
+
 #
 # --- (Keep your other functions like get_migration_recommendation and get_ai_remediation) ---
 #
 def get_migration_recommendation(prompt):
-    load_dotenv()
-    try:
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not set in .env file")
-        genai.configure(api_key=api_key)
-
-    except Exception as e:
-        app_logger.error(f"Failed to initialize Gemini client: {e}. Is GOOGLE_API_KEY set?")
+    # Gemini is configured once at startup (services/ai_clients.py)
+    if not get_ai_clients().configured:
+        app_logger.error("Gemini client is not configured. Is GOOGLE_API_KEY set?")
         return {"error": "Failed to initialize AI client. Check server logs."}
 
     system_prompt = """You are an expert Azure Cloud Solution Architect specializing in migration.
@@ -341,56 +395,171 @@ Do not add any text or markdown outside of this JSON object.
     user_prompt = prompt
 
     try:
-        model = genai.GenerativeModel(
-            # --- CHANGE 4 ---
-            model_name="gemini-2.5-flash", # Was gemini-1.5-flash
-            system_instruction=system_prompt
-        )
-        generation_config = genai.types.GenerationConfig(
-            response_mime_type="application/json"
-        )
-        response = model.generate_content(
-            user_prompt,
-            generation_config=generation_config
-        )
-        response_content = response.text
+        response_content = get_ai_clients().generate("migration", system_prompt, user_prompt, json_response=True)
         return json.loads(response_content)
     except Exception as e:
         app_logger.error(f"Error calling Gemini API: {e}")
         return {"error": f"Failed to get AI recommendation: {str(e)}"}
 
-def get_ai_remediation(problem_description):
+def remediation_prompts(problem_description):
     """
-    Calls Gemini to get step-by-step remediation instructions.
+    Returns the (system_prompt, user_prompt) pair for a remediation guide.
     """
-    load_dotenv()
-    try:
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not set in .env file")
-        genai.configure(api_key=api_key)
-    except Exception as e:
-        app_logger.error(f"Failed to initialize Gemini client: {e}.")
-        return {"error": "Failed to initialize AI client. Check server logs."}
-
     system_prompt = '''You are an expert Azure Cloud Support Engineer. 
     You will be given an Azure Advisor recommendation. 
     Your task is to provide a detailed, step-by-step guide on how to remediate this issue. 
     Format the response clearly using markdown. Use numbered lists for steps and code blocks for any commands or scripts.'''
     
     user_prompt = f"Please provide a step-by-step remediation guide for this Azure Advisor recommendation: '{problem_description}'"
+    return system_prompt, user_prompt
+
+
+def get_ai_remediation(problem_description):
+    """
+    Calls Gemini to get step-by-step remediation instructions.
+    """
+    if not get_ai_clients().configured:
+        app_logger.error("Gemini client is not configured. Is GOOGLE_API_KEY set?")
+        return {"error": "Failed to initialize AI client. Check server logs."}
+
+    system_prompt, user_prompt = remediation_prompts(problem_description)
 
     try:
-        model = genai.GenerativeModel(
-            # --- CHANGE 5 ---
-            model_name="gemini-2.5-flash", # Was gemini-1.5-flash
-            system_instruction=system_prompt
-        )
-        
-        response = model.generate_content(user_prompt)
-        
         # We are returning plain text (markdown)
-        return {"remediation_steps": response.text}
+        return {"remediation_steps": get_ai_clients().generate("remediation", system_prompt, user_prompt)}
     except Exception as e:
         app_logger.error(f"Error calling Gemini API for remediation: {e}")
         return {"error": f"Failed to get AI remediation: {str(e)}"}
+
+#
+# --- Streaming variants (token streaming over SSE, see blueprints/api/ai.py and iac.py) ---
+#
+class IncrementalFileParser:
+    """
+    Reads a JSON object of files ({"name": "content"} or nested folders such
+    as Terraform's {"root": {...}, "modules": {"vnet": {...}}}) as it streams
+    in, and reports every file as soon as its string value is complete.
+    feed() returns the (path, content) pairs completed by that chunk, where
+    path is the tuple of keys leading to the file.
+    """
+
+    def __init__(self):
+        self._stack = []        # One (container type, key it was opened under) per open {...} or [...]
+        self._key = None        # Last object key read
+        self._expect_key = False
+        self._in_string = False
+        self._escape = False
+        self._buffer = []
+
+    def _path(self):
+        return tuple(key for _, key in self._stack[1:])
+
+    def feed(self, text):
+        files = []
+        for ch in text:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    value = json.loads('"' + "".join(self._buffer) + '"')
+                    if self._expect_key:
+                        self._key = value
+                        self._expect_key = False
+                    elif self._stack and self._stack[-1][0] == '{':
+                        files.append((self._path() + (self._key,), value))
+                    continue
+                self._buffer.append(ch)
+            elif ch == '"':
+                self._in_string = True
+                self._buffer = []
+            elif ch in '{[':
+                self._stack.append((ch, self._key if self._stack else None))
+                self._expect_key = ch == '{'
+            elif ch in '}]':
+                if self._stack:
+                    self._stack.pop()
+                self._expect_key = False
+            elif ch == ',':
+                self._expect_key = bool(self._stack) and self._stack[-1][0] == '{'
+            elif ch == ':':
+                self._expect_key = False
+        return files
+
+
+def stream_iac_code(iac_type, module_type, resources):
+    """
+    Streaming variant of get_iac_code. Yields (event, data) pairs:
+    ("progress", {"chars"}) while Gemini writes, ("file", {"path", "content"})
+    as soon as each file is complete, and finally ("done", payload) with the
+    same payload get_iac_code returns, or ("error", {"error"}).
+    ARM output is a single JSON template, so its one file arrives at the end.
+    Pass normalize_resources() output when the result is cached, so the prompt
+    matches the cache key (see get_iac_code_cached).
+    """
+    if not get_ai_clients().configured:
+        app_logger.error("Gemini client is not configured. Is GOOGLE_API_KEY set?")
+        yield "error", {"error": "Failed to initialize AI client. Check server logs."}
+        return
+
+    if iac_type == 'terraform':
+        system_prompt, user_prompt = terraform_prompts(module_type, resources)
+    elif iac_type == 'bicep':
+        system_prompt, user_prompt = bicep_prompts(resources)
+    elif iac_type == 'arm':
+        system_prompt, user_prompt = arm_prompts(resources)
+    else:
+        yield "error", {"error": "Invalid IaC type specified."}
+        return
+
+    parser = IncrementalFileParser() if iac_type != 'arm' else None
+    chunks = []
+    chars = 0
+    try:
+        for text in get_ai_clients().generate_stream(
+            iac_operation(iac_type, module_type), system_prompt, user_prompt, json_response=True
+        ):
+            chunks.append(text)
+            chars += len(text)
+            yield "progress", {"chars": chars}
+            if parser:
+                for path, content in parser.feed(text):
+                    yield "file", {"path": list(path), "content": content}
+
+        response_content = "".join(chunks)
+        if iac_type == 'arm':
+            # The LLM returns the template itself; re-dump it to format it nicely
+            pretty_json = json.dumps(json.loads(response_content), indent=4)
+            files = {"template.json": pretty_json}
+            yield "file", {"path": ["template.json"], "content": pretty_json}
+        else:
+            files = json.loads(response_content)
+        yield "done", {"iac_type": iac_type, "files": files}
+    except Exception as e:
+        app_logger.error(f"Error streaming {iac_type} from Gemini API: {e}")
+        yield "error", {"error": f"Failed to get AI recommendation: {str(e)}"}
+
+
+def stream_ai_remediation(problem_description):
+    """
+    Streaming variant of get_ai_remediation. Yields ("delta", {"text"}) for
+    every chunk of markdown, then ("done", {"remediation_steps"}) with the
+    full guide, or ("error", {"error"}).
+    """
+    if not get_ai_clients().configured:
+        app_logger.error("Gemini client is not configured. Is GOOGLE_API_KEY set?")
+        yield "error", {"error": "Failed to initialize AI client. Check server logs."}
+        return
+
+    system_prompt, user_prompt = remediation_prompts(problem_description)
+    chunks = []
+    try:
+        for text in get_ai_clients().generate_stream("remediation", system_prompt, user_prompt):
+            chunks.append(text)
+            yield "delta", {"text": text}
+        yield "done", {"remediation_steps": "".join(chunks)}
+    except Exception as e:
+        app_logger.error(f"Error streaming remediation from Gemini API: {e}")
+        yield "error", {"error": f"Failed to get AI remediation: {str(e)}"}
@@ -0,0 +1,128 @@
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+ARM_ENDPOINT = "https://management.azure.com"
+ARM_SCOPE = "https://management.azure.com/.default"
+
+# Status codes worth retrying: throttling and transient gateway errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class ArmRestClient:
+    """
+    Thin client for raw ARM REST calls that the SDKs do not cover (e.g. Advisor scores).
+    It keeps one connection-pooled session for the whole process, applies a
+    per-call timeout, retries throttled/transient failures with exponential
+    backoff (honoring Retry-After), and follows nextLink pagination.
+    """
+
+    def __init__(self, credential_provider, timeout=30, max_retries=4,
+                 backoff_base=0.5, backoff_max=30, pool_size=20):
+        self._credential_provider = credential_provider
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+    def _headers(self):
+        token = self._credential_provider().get_token(ARM_SCOPE)
+        return {"Authorization": f"Bearer {token.token}", "Content-Type": "application/json"}
+
+    def _retry_delay(self, response, attempt):
+        """Seconds to wait before the next attempt, preferring the server's Retry-After."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(delay, 0), self.backoff_max)
+                except (TypeError, ValueError):
+                    pass
+        # Exponential backoff with jitter
+        delay = self.backoff_base * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), self.backoff_max)
+
+    def request(self, method, path_or_url, params=None, json=None, timeout=None, deadline=None):
+        """
+        Sends one ARM request with retries. Accepts either a full URL
+        (e.g. a nextLink) or a path relative to the ARM endpoint.
+        When a Deadline is given, each attempt is capped by the time left and
+        no retry is scheduled past it.
+        Returns the parsed JSON body, raising for non-retryable HTTP errors.
+        """
+        url = path_or_url if path_or_url.startswith("http") else f"{ARM_ENDPOINT}{path_or_url}"
+        timeout = timeout or self.timeout
+
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self.session.request(
+                    method, url, params=params, json=json,
+                    headers=self._headers(),
+                    timeout=deadline.timeout(timeout) if deadline else timeout
+                )
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json() if response.content else {}
+                error = requests.HTTPError(f"{response.status_code} from {url}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            delay = self._retry_delay(response, attempt)
+            if attempt == self.max_retries or (deadline and delay >= deadline.remaining()):
+                raise error
+            app_logger.warning(f"ARM call failed ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def get(self, path_or_url, params=None, timeout=None, deadline=None):
+        return self.request("GET", path_or_url, params=params, timeout=timeout, deadline=deadline)
+
+    def iter_values(self, path_or_url, params=None, timeout=None, deadline=None):
+        """Yields every item in 'value', following nextLink across pages."""
+        body = self.get(path_or_url, params=params, timeout=timeout, deadline=deadline)
+        while True:
+            for item in body.get("value", []):
+                yield item
+            next_link = body.get("nextLink")
+            if not next_link:
+                return
+            # nextLink already carries the query string
+            body = self.get(next_link, timeout=timeout, deadline=deadline)
+
+    def get_all(self, path_or_url, params=None, timeout=None, deadline=None):
+        """Returns all items across every page as a list."""
+        return list(self.iter_values(path_or_url, params=params, timeout=timeout, deadline=deadline))
+
+    def close(self):
+        self.session.close()
+
+
+def init_app(app):
+    """Creates the shared ARM REST client, using the app's pooled credential."""
+    clients = app.extensions["azure_clients"]
+    app.extensions["arm_rest"] = ArmRestClient(
+        credential_provider=clients.get_credential,
+        timeout=app.config["ARM_TIMEOUT_SECONDS"],
+        max_retries=app.config["ARM_MAX_RETRIES"],
+        pool_size=app.config["ARM_POOL_SIZE"]
+    )
+
+
+def get_arm_client():
+    """Returns the ARM REST client of the current app."""
+    return current_app.extensions["arm_rest"]
@@ -0,0 +1,181 @@
+import logging
+import time
+from collections import OrderedDict, deque
+from threading import Lock
+
+from flask import current_app
+from azure.identity import DefaultAzureCredential
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+
+class AzureClientRegistry:
+    """
+    Process-wide pool of Azure credentials and management SDK clients.
+
+    Credentials are keyed by tenant and clients by (client type, subscription),
+    so every blueprint reuses the same token cache and HTTP connection pool
+    instead of re-probing the credential chain on each request.
+    The SDK clients are safe to share between threads.
+
+    Subscription ids come from request URLs, so the client pool is an LRU of
+    at most max_clients entries. Evicted clients are closed once they have
+    been out of the pool for close_grace seconds, so requests still using
+    them can finish.
+    """
+
+    def __init__(self, credential_factory=DefaultAzureCredential, max_clients=256, close_grace=60):
+        self._credential_factory = credential_factory
+        self.max_clients = max_clients
+        self.close_grace = close_grace
+        self._credentials = {}
+        self._clients = OrderedDict()
+        self._retired = deque()     # (evicted_at, client), oldest first
+        self._lock = Lock()
+        self._stats = {
+            "credentials_created": 0,
+            "clients_created": 0,
+            "evicted": 0,
+            "reused": 0,
+            "creation_seconds": 0.0,
+            "by_type": {}
+        }
+
+    def get_credential(self, tenant_id=None):
+        """Returns the shared credential for a tenant (None = default tenant)."""
+        with self._lock:
+            credential = self._credentials.get(tenant_id)
+            if credential is not None:
+                self._stats["reused"] += 1
+                return credential
+
+            start = time.perf_counter()
+            if tenant_id:
+                credential = self._credential_factory(additionally_allowed_tenants=[tenant_id])
+            else:
+                credential = self._credential_factory()
+            elapsed = time.perf_counter() - start
+
+            self._credentials[tenant_id] = credential
+            self._stats["credentials_created"] += 1
+            self._stats["creation_seconds"] += elapsed
+            app_logger.info(f"Created Azure credential for tenant {tenant_id or 'default'} in {elapsed * 1000:.1f}ms")
+            return credential
+
+    def get_client(self, client_cls, subscription_id=None, tenant_id=None):
+        """
+        Returns a pooled SDK client of the given type.
+        Subscription-scoped clients (SecurityCenter, PolicyClient, ...) must pass
+        a subscription_id; tenant-level clients (ResourceGraphClient,
+        SubscriptionClient, ...) are created with the credential only.
+        """
+        key = (client_cls.__name__, subscription_id, tenant_id)
+        type_name = client_cls.__name__
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self._stats["reused"] += 1
+                self._type_stats(type_name)["reused"] += 1
+                return client
+
+        credential = self.get_credential(tenant_id)
+
+        with self._lock:
+            # Another thread may have built it while we fetched the credential
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self._stats["reused"] += 1
+                self._type_stats(type_name)["reused"] += 1
+                return client
+
+            start = time.perf_counter()
+            if subscription_id:
+                client = client_cls(credential=credential, subscription_id=subscription_id)
+            else:
+                client = client_cls(credential=credential)
+            elapsed = time.perf_counter() - start
+
+            self._clients[key] = client
+            type_stats = self._type_stats(type_name)
+            type_stats["created"] += 1
+            type_stats["creation_seconds"] += elapsed
+            self._stats["clients_created"] += 1
+            self._stats["creation_seconds"] += elapsed
+            now = time.monotonic()
+            while len(self._clients) > self.max_clients:
+                _, evicted = self._clients.popitem(last=False)
+                self._retired.append((now, evicted))
+                self._stats["evicted"] += 1
+            expired = []
+            while self._retired and now - self._retired[0][0] >= self.close_grace:
+                expired.append(self._retired.popleft()[1])
+
+        for evicted in expired:
+            self._close(evicted)
+        return client
+
+    @staticmethod
+    def _close(client):
+        try:
+            client.close()
+        except Exception as e:
+            app_logger.warning(f"Failed to close Azure client: {e}")
+
+    def _type_stats(self, type_name):
+        return self._stats["by_type"].setdefault(
+            type_name, {"created": 0, "reused": 0, "creation_seconds": 0.0}
+        )
+
+    def stats(self):
+        """Returns a snapshot of pool size, reuse counts and creation time."""
+        with self._lock:
+            return {
+                "credentials": len(self._credentials),
+                "clients": len(self._clients),
+                "max_clients": self.max_clients,
+                "retired_clients": len(self._retired),
+                "credentials_created": self._stats["credentials_created"],
+                "clients_created": self._stats["clients_created"],
+                "evicted": self._stats["evicted"],
+                "reused": self._stats["reused"],
+                "creation_ms_total": round(self._stats["creation_seconds"] * 1000, 2),
+                "by_type": {
+                    name: {
+                        "created": s["created"],
+                        "reused": s["reused"],
+                        "creation_ms_total": round(s["creation_seconds"] * 1000, 2)
+                    }
+                    for name, s in self._stats["by_type"].items()
+                }
+            }
+
+    def close(self):
+        """Closes every pooled client and credential."""
+        with self._lock:
+            for client in list(self._clients.values()) + [client for _, client in self._retired]:
+                self._close(client)
+            for credential in self._credentials.values():
+                try:
+                    credential.close()
+                except Exception as e:
+                    app_logger.warning(f"Failed to close Azure credential: {e}")
+            self._clients.clear()
+            self._retired.clear()
+            self._credentials.clear()
+
+
+def init_app(app):
+    """Creates the shared client registry for this app."""
+    app.extensions["azure_clients"] = AzureClientRegistry(
+        max_clients=app.config["AZURE_CLIENT_POOL_MAX_CLIENTS"],
+        close_grace=app.config["AZURE_CLIENT_CLOSE_GRACE_SECONDS"]
+    )
+
+
+def get_clients():
+    """Returns the client registry of the current app."""
+    return current_app.extensions["azure_clients"]
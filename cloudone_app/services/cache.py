@@ -0,0 +1,586 @@
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Event, Lock, Thread
+
+from flask import current_app
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+
+def approx_size(value, _seen=None):
+    """
+    Rough deep size in bytes of a cached value (dicts, lists, tuples, sets and
+    scalars). Good enough to bound memory; shared objects are counted once.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_size(k, _seen) + approx_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, _seen) for item in value)
+    return size
+
+
+class CacheBackend(ABC):
+    """
+    Interface of a named cache. get() returns {"data", "timestamp"} or None,
+    set() stores a value with a hard TTL (pinned values are never evicted to
+    make room, only expired) and returns False when the value alone exceeds
+    the byte budget and was not stored, and try_lock()/release() provide a
+    lease-based lock so that only one holder refreshes a key at a time (across
+    processes for shared backends); extend() renews a lease that is still held.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """Returns {"data", "timestamp"} for key, or None if absent or expired."""
+
+    @abstractmethod
+    def set(self, key, data, ttl=None, pin=False):
+        """Stores data under key for ttl seconds. Returns False if it was too large to store."""
+
+    @abstractmethod
+    def delete(self, key):
+        """Removes key if present."""
+
+    @abstractmethod
+    def sweep(self):
+        """Drops expired entries and lapsed leases. Returns the number of entries removed."""
+
+    @abstractmethod
+    def try_lock(self, key, lease):
+        """Returns a token if the lock was acquired for lease seconds, else None."""
+
+    @abstractmethod
+    def release(self, key, token):
+        """Releases a lock held with token (a no-op if it was lost)."""
+
+    @abstractmethod
+    def extend(self, key, token, lease):
+        """Renews a lock held with token for another lease seconds. Returns False if it was lost."""
+
+    @abstractmethod
+    def stats(self):
+        """Entry count, approximate bytes, limits and hit/miss counters."""
+
+
+class BoundedCache(CacheBackend):
+    """
+    Thread-safe in-memory cache with LRU eviction, bounded by entry count and
+    by approximate size in bytes. Each entry has a hard expiry (its TTL);
+    expired entries are never returned and are dropped by the background sweeper.
+
+    get() returns {"data", "timestamp"} so callers can apply their own
+    freshness rules (e.g. stale-while-revalidate) within the TTL.
+    """
+
+    def __init__(self, name, max_entries, max_bytes, default_ttl=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._locks = {}
+
+    def get(self, key):
+        """Returns the entry for key ({"data", "timestamp"}), or None if absent or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] is not None and entry["expires_at"] <= now:
+                self._remove(key)
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return {"data": entry["data"], "timestamp": entry["timestamp"]}
+
+    def set(self, key, data, ttl=None, pin=False):
+        """
+        Stores data under key for ttl seconds (default_ttl if None), evicting
+        LRU entries over the limits; pinned entries are skipped by eviction.
+        Returns False (and drops any previous value) if data alone exceeds max_bytes.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        size = approx_size(key) + approx_size(data)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                # Never cache a value that alone exceeds the budget
+                app_logger.warning(f"Cache {self.name}: value for {key} ({size} bytes) exceeds max_bytes, not cached")
+                return False
+            self._entries[key] = {
+                "data": data,
+                "timestamp": now,
+                "expires_at": now + ttl if ttl is not None else None,
+                "size": size,
+                "pinned": pin
+            }
+            self._bytes += size
+            if len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                for oldest in [k for k, entry in self._entries.items() if not entry["pinned"]]:
+                    if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+                        break
+                    self._remove(oldest)
+                    self._evictions += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        # Called with the lock held
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+
+    def try_lock(self, key, lease):
+        # In-process only: this backend is not shared between workers
+        now = time.time()
+        with self._lock:
+            holder = self._locks.get(key)
+            if holder and holder[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._locks[key] = (token, now + lease)
+            return token
+
+    def release(self, key, token):
+        with self._lock:
+            holder = self._locks.get(key)
+            if holder and holder[0] == token:
+                del self._locks[key]
+
+    def extend(self, key, token, lease):
+        with self._lock:
+            holder = self._locks.get(key)
+            if not holder or holder[0] != token:
+                return False
+            self._locks[key] = (token, time.time() + lease)
+            return True
+
+    def sweep(self):
+        """Drops every expired entry and lapsed lock lease. Returns the number of entries removed."""
+        now = time.time()
+        with self._lock:
+            expired = [
+                key for key, entry in self._entries.items()
+                if entry["expires_at"] is not None and entry["expires_at"] <= now
+            ]
+            for key in expired:
+                self._remove(key)
+            self._expirations += len(expired)
+            for key in [key for key, (_, lease_end) in self._locks.items() if lease_end <= now]:
+                del self._locks[key]
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    cache TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (cache, key)
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entries_lru ON cache_entries (cache, accessed_at);
+CREATE INDEX IF NOT EXISTS ix_cache_entries_expiry ON cache_entries (cache, expires_at);
+
+CREATE TABLE IF NOT EXISTS cache_locks (
+    cache TEXT NOT NULL,
+    key TEXT NOT NULL,
+    token TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (cache, key)
+);
+"""
+
+# Reads refresh the LRU position at most this often per entry (each refresh is a write)
+LRU_TOUCH_INTERVAL_SECONDS = 5
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Cache shared by every worker process on the host, stored in one SQLite
+    file (WAL mode). Same limits and semantics as BoundedCache: LRU eviction
+    by entry count and approximate bytes, hard TTLs, lease locks visible to all
+    processes. Keys and values must be JSON-serializable; get() returns a copy.
+    Hit/miss counters are per process.
+    """
+
+    def __init__(self, name, path, max_entries, max_bytes, default_ttl=None):
+        self.name = name
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SQLITE_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")}
+            if "pinned" not in columns:
+                # Files created before pinning; another process may be adding it too
+                try:
+                    conn.execute("ALTER TABLE cache_entries ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0")
+                except sqlite3.OperationalError:
+                    pass
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # One short-lived connection per operation: safe across threads and processes
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    @staticmethod
+    def _key(key):
+        return json.dumps(key)
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT data, timestamp, expires_at, accessed_at FROM cache_entries WHERE cache = ? AND key = ?",
+                (self.name, self._key(key))
+            ).fetchone()
+            if row is None or (row[2] is not None and row[2] <= now):
+                with self._lock:
+                    self._misses += 1
+                return None
+            if now - row[3] >= LRU_TOUCH_INTERVAL_SECONDS:
+                conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE cache = ? AND key = ?",
+                             (now, self.name, self._key(key)))
+        finally:
+            conn.close()
+        with self._lock:
+            self._hits += 1
+        return {"data": json.loads(row[0]), "timestamp": row[1]}
+
+    def set(self, key, data, ttl=None, pin=False):
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        payload = json.dumps(data, default=str)
+        size = len(payload)
+        if size > self.max_bytes:
+            app_logger.warning(f"Cache {self.name}: value for {key} ({size} bytes) exceeds max_bytes, not cached")
+            self.delete(key)
+            return False
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (cache, key, data, timestamp, expires_at, accessed_at, size, pinned) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.name, self._key(key), payload, now, now + ttl if ttl is not None else None, now, size, int(pin))
+            )
+            evicted = self._enforce_limits(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if evicted:
+            with self._lock:
+                self._evictions += evicted
+        return True
+
+    def _enforce_limits(self, conn):
+        """Deletes least recently used unpinned entries until both limits hold. Returns the count removed."""
+        entries, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE cache = ?", (self.name,)
+        ).fetchone()
+        evicted = 0
+        if entries <= self.max_entries and total <= self.max_bytes:
+            return evicted
+        for key, size in conn.execute(
+            "SELECT key, size FROM cache_entries WHERE cache = ? AND pinned = 0 ORDER BY accessed_at ASC", (self.name,)
+        ).fetchall():
+            if entries <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM cache_entries WHERE cache = ? AND key = ?", (self.name, key))
+            entries -= 1
+            total -= size
+            evicted += 1
+        return evicted
+
+    def delete(self, key):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM cache_entries WHERE cache = ? AND key = ?", (self.name, self._key(key)))
+        finally:
+            conn.close()
+
+    def try_lock(self, key, lease):
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT expires_at FROM cache_locks WHERE cache = ? AND key = ?", (self.name, self._key(key))
+            ).fetchone()
+            if row is not None and row[0] > now:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_locks (cache, key, token, expires_at) VALUES (?, ?, ?, ?)",
+                (self.name, self._key(key), token, now + lease)
+            )
+            conn.execute("COMMIT")
+            return token
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def release(self, key, token):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM cache_locks WHERE cache = ? AND key = ? AND token = ?",
+                         (self.name, self._key(key), token))
+        finally:
+            conn.close()
+
+    def extend(self, key, token, lease):
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "UPDATE cache_locks SET expires_at = ? WHERE cache = ? AND key = ? AND token = ?",
+                (time.time() + lease, self.name, self._key(key), token)
+            ).rowcount == 1
+        finally:
+            conn.close()
+
+    def sweep(self):
+        now = time.time()
+        conn = self._connect()
+        try:
+            removed = conn.execute(
+                "DELETE FROM cache_entries WHERE cache = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (self.name, now)
+            ).rowcount
+            conn.execute("DELETE FROM cache_locks WHERE cache = ? AND expires_at <= ?", (self.name, now))
+        finally:
+            conn.close()
+        return removed
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE cache = ?", (self.name,)
+            ).fetchone()
+        finally:
+            conn.close()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": "sqlite",
+                "entries": entries,
+                "bytes": total,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0,
+                "evictions": self._evictions
+            }
+
+
+def wait_for_refresh(cache, key, since, timeout, poll_interval=0.2):
+    """
+    Polls until an entry for key written at or after `since` appears (another
+    holder of the refresh lock finished), or until timeout. Returns the entry or None.
+    """
+    deadline = time.time() + timeout
+    while True:
+        entry = cache.get(key)
+        if entry is not None and entry["timestamp"] >= since:
+            return entry
+        if time.time() >= deadline:
+            return None
+        time.sleep(poll_interval)
+
+
+class CacheRegistry:
+    """
+    Named caches of the app, with one daemon thread sweeping expired entries
+    from all of them every sweep_interval seconds. backend is "memory"
+    (per process) or "sqlite" (shared by all worker processes through the
+    file at sqlite_path).
+    """
+
+    def __init__(self, backend="memory", sqlite_path=None, sweep_interval=60):
+        if backend not in ("memory", "sqlite"):
+            raise ValueError(f"Unknown cache backend: {backend}")
+        self.backend = backend
+        self.sqlite_path = sqlite_path
+        self.sweep_interval = sweep_interval
+        self._caches = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._sweeper = None
+
+    def create(self, name, max_entries, max_bytes, default_ttl=None, path=None):
+        """
+        Creates (or returns the existing) cache with this name. With a path,
+        the cache is always stored in that SQLite file, whatever the backend,
+        so it survives restarts.
+        """
+        with self._lock:
+            cache = self._caches.get(name)
+            if cache is None:
+                if path:
+                    cache = SqliteCacheBackend(name, path, max_entries, max_bytes, default_ttl)
+                elif self.backend == "sqlite":
+                    cache = SqliteCacheBackend(name, self.sqlite_path, max_entries, max_bytes, default_ttl)
+                else:
+                    cache = BoundedCache(name, max_entries, max_bytes, default_ttl)
+                self._caches[name] = cache
+            if self._sweeper is None:
+                self._sweeper = Thread(target=self._sweep_loop, name="cloudone-cache-sweeper", daemon=True)
+                self._sweeper.start()
+            return cache
+
+    def get(self, name):
+        return self._caches[name]
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            for cache in list(self._caches.values()):
+                try:
+                    removed = cache.sweep()
+                    if removed:
+                        app_logger.debug(f"Cache {cache.name}: swept {removed} expired entries")
+                except Exception as e:
+                    app_logger.error(f"Cache {cache.name}: sweep failed: {e}")
+
+    def stats(self):
+        return {name: cache.stats() for name, cache in list(self._caches.items())}
+
+    def close(self):
+        self._stop.set()
+
+
+def init_app(app):
+    """
+    Creates the cache registry and the caches configured for this app,
+    on the backend selected by Config.CACHE_BACKEND. Every cache has its own
+    *_MAX_BYTES budget; the in-memory ones add up to about 128 MiB per process
+    by default.
+    """
+    sqlite_path = app.config["CACHE_SQLITE_PATH"]
+    if not sqlite_path:
+        os.makedirs(app.instance_path, exist_ok=True)
+        sqlite_path = os.path.join(app.instance_path, "cache.sqlite3")
+    registry = CacheRegistry(
+        backend=app.config["CACHE_BACKEND"],
+        sqlite_path=sqlite_path,
+        sweep_interval=app.config["CACHE_SWEEP_INTERVAL_SECONDS"]
+    )
+    # Always on disk, whatever the backend: cross-process leases and flags (e.g. the warmer's leader lease)
+    registry.create("coordination", max_entries=1000, max_bytes=1024 * 1024, path=sqlite_path)
+    registry.create(
+        "dashboard",
+        max_entries=app.config["DASHBOARD_CACHE_MAX_ENTRIES"],
+        max_bytes=app.config["DASHBOARD_CACHE_MAX_BYTES"]
+    )
+    registry.create(
+        "advisor",
+        max_entries=app.config["ADVISOR_CACHE_MAX_ENTRIES"],
+        max_bytes=app.config["ADVISOR_CACHE_MAX_BYTES"],
+        default_ttl=app.config["ADVISOR_CACHE_TTL_SECONDS"]
+    )
+    registry.create(
+        "orphan_scans",
+        max_entries=app.config["ORPHAN_CACHE_MAX_ENTRIES"],
+        max_bytes=app.config["ORPHAN_CACHE_MAX_BYTES"],
+        default_ttl=app.config["ORPHAN_SCAN_TTL_SECONDS"]
+    )
+    registry.create(
+        "jobs",
+        max_entries=app.config["JOB_MAX_RETAINED"],
+        max_bytes=app.config["JOB_CACHE_MAX_BYTES"],
+        default_ttl=app.config["JOB_RESULT_TTL_SECONDS"]
+    )
+    ai_cache_path = app.config["IAC_CACHE_PATH"]
+    if not ai_cache_path:
+        os.makedirs(app.instance_path, exist_ok=True)
+        ai_cache_path = os.path.join(app.instance_path, "ai_cache.sqlite3")
+    registry.create(
+        "iac",
+        max_entries=app.config["IAC_CACHE_MAX_ENTRIES"],
+        max_bytes=app.config["IAC_CACHE_MAX_BYTES"],
+        default_ttl=app.config["IAC_CACHE_TTL_SECONDS"],
+        path=ai_cache_path
+    )
+    registry.create(
+        "remediations",
+        max_entries=app.config["REMEDIATION_CACHE_MAX_ENTRIES"],
+        max_bytes=app.config["REMEDIATION_CACHE_MAX_BYTES"],
+        default_ttl=app.config["REMEDIATION_CACHE_TTL_SECONDS"],
+        path=ai_cache_path
+    )
+    app.extensions["caches"] = registry
+
+
+def get_cache(name):
+    """Returns a named cache of the current app."""
+    return current_app.extensions["caches"].get(name)
+
+
+def get_caches():
+    """Returns the cache registry of the current app."""
+    return current_app.extensions["caches"]
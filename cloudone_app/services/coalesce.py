@@ -0,0 +1,118 @@
+import logging
+import time
+from concurrent.futures import Future
+from threading import Lock
+
+from flask import current_app
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+
+def coalesce_key(operation, scope=None, query=None):
+    """
+    Normalized key for an upstream call: scopes compare case-insensitively
+    (a list of subscriptions in any order is the same scope) and query text
+    compares with whitespace collapsed.
+    """
+    if isinstance(scope, (list, tuple, set)):
+        scope = tuple(sorted(str(s).lower() for s in scope))
+    elif scope is not None:
+        scope = str(scope).lower()
+    if query is not None:
+        query = " ".join(str(query).split())
+    return (operation, scope, query)
+
+
+class RequestCoalescer:
+    """
+    Single-flight layer for upstream calls. Concurrent callers asking for the
+    same (operation, scope, query) share one in-flight call and its result;
+    the result is also reused for result_ttl seconds after it completes, which
+    catches requests that arrive a moment later (e.g. several widgets of one
+    page load). Results are shared objects: callers must not mutate them.
+    """
+
+    def __init__(self, result_ttl=0):
+        self.result_ttl = result_ttl
+        self._lock = Lock()
+        self._inflight = {}
+        self._results = {}
+        self._stats = {}
+
+    def _count(self, operation, outcome):
+        stats = self._stats.setdefault(operation, {"hits": 0, "coalesced": 0, "misses": 0, "errors": 0})
+        stats[outcome] += 1
+
+    def run(self, operation, scope, query, fn, timeout=None):
+        """
+        Returns fn() for this key, running it at most once at a time.
+        Callers that join an in-flight call wait at most timeout seconds.
+        Exceptions of the shared call are raised in every waiting caller;
+        if it is interrupted by a BaseException, they get a RuntimeError.
+        """
+        key = coalesce_key(operation, scope, query)
+        now = time.time()
+        with self._lock:
+            entry = self._results.get(key)
+            if entry and entry[0] > now:
+                self._count(operation, "hits")
+                return entry[1]
+            future = self._inflight.get(key)
+            if future is not None:
+                self._count(operation, "coalesced")
+                is_leader = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self._count(operation, "misses")
+                is_leader = True
+
+        if not is_leader:
+            return future.result(timeout=timeout)
+
+        try:
+            result = fn()
+        except Exception as e:
+            with self._lock:
+                self._count(operation, "errors")
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            if self.result_ttl > 0:
+                with self._lock:
+                    self._results[key] = (time.time() + self.result_ttl, result)
+                    self._sweep(time.time())
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            if not future.done():
+                # fn was interrupted by a BaseException (SystemExit, KeyboardInterrupt, ...)
+                future.set_exception(RuntimeError(f"Coalesced {operation} call was interrupted"))
+
+    def _sweep(self, now):
+        # Called with the lock held; the result window is short so this stays small
+        for key in [key for key, (expires, _) in self._results.items() if expires <= now]:
+            del self._results[key]
+
+    def stats(self):
+        with self._lock:
+            by_operation = {operation: dict(stats) for operation, stats in self._stats.items()}
+            in_flight = len(self._inflight)
+        totals = {"hits": 0, "coalesced": 0, "misses": 0, "errors": 0}
+        for stats in by_operation.values():
+            for outcome, count in stats.items():
+                totals[outcome] += count
+        return dict(totals, in_flight=in_flight, by_operation=by_operation)
+
+
+def init_app(app):
+    """Creates the request coalescer for this app."""
+    app.extensions["coalescer"] = RequestCoalescer(result_ttl=app.config["COALESCE_RESULT_TTL_SECONDS"])
+
+
+def get_coalescer():
+    """Returns the request coalescer of the current app."""
+    return current_app.extensions["coalescer"]
@@ -0,0 +1,45 @@
+import time
+
+# Cap on the TCP connect phase; the read timeout gets whatever budget is left
+CONNECT_TIMEOUT_CAP_SECONDS = 5
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when an upstream call is attempted after its deadline has passed."""
+
+
+class Deadline:
+    """
+    A time budget shared by every upstream call made on behalf of one request.
+    Helpers ask it for their timeouts instead of using fixed values,
+    so a slow first call leaves less time for the next one.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(self.expires_at - time.monotonic(), 0)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, cap=None):
+        """Seconds left for the next call (at most `cap`). Raises if none are left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded")
+        return min(remaining, cap) if cap else remaining
+
+    def sdk_kwargs(self):
+        """Per-operation timeout kwargs understood by the azure-core pipeline."""
+        return {
+            "connection_timeout": self.timeout(CONNECT_TIMEOUT_CAP_SECONDS),
+            "read_timeout": self.timeout()
+        }
+
+
+def sdk_timeouts(deadline):
+    """SDK timeout kwargs for an optional deadline."""
+    return deadline.sdk_kwargs() if deadline else {}
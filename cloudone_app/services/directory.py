@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import time
+from threading import Lock
+
+from azure.mgmt.resource import SubscriptionClient
+from flask import current_app
+
+from cloudone_app.services.coalesce import get_coalescer
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+
+def _fetch_subscriptions(clients):
+    """
+    Lists the subscriptions visible to the app identity from Azure, as
+    [{"display_name", "subscription_id"}]. Concurrent callers share one listing.
+    """
+    def load():
+        subscription_client = clients.get_client(SubscriptionClient)
+        return [
+            {"display_name": sub.display_name, "subscription_id": sub.subscription_id}
+            for sub in subscription_client.subscriptions.list()
+        ]
+    return get_coalescer().run("arm.subscriptions.list", None, None, load)
+
+
+def _fetch_tenants(clients):
+    """
+    Lists the tenants visible to the app identity from Azure, as
+    [{"tenant_id", "display_name"}]. Concurrent callers share one listing.
+    """
+    def load():
+        subscription_client = clients.get_client(SubscriptionClient)
+        return [
+            {
+                "tenant_id": tenant.tenant_id,
+                "display_name": tenant.display_name if hasattr(tenant, 'display_name') else tenant.tenant_id
+            }
+            for tenant in subscription_client.tenants.list()
+        ]
+    return get_coalescer().run("arm.tenants.list", None, None, load)
+
+
+def _etag(items):
+    body = json.dumps(items, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+
+
+class DirectoryCache:
+    """
+    Cached subscription and tenant listings. Every page asks for both on load,
+    so they are served from memory and refreshed in the background
+    (stale-while-revalidate): a listing older than ttl is still returned while
+    one executor task fetches a new one. Only a listing older than
+    ttl + max_stale, or a missing one, makes the caller wait on Azure.
+    Each listing carries an ETag derived from its content, so it is the same
+    in every worker process and clients can revalidate with If-None-Match.
+    """
+
+    FETCHERS = {"subscriptions": _fetch_subscriptions, "tenants": _fetch_tenants}
+
+    def __init__(self, executor, ttl, max_stale):
+        self._executor = executor
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = Lock()
+        self._stats = {kind: {"hits": 0, "stale": 0, "loads": 0, "errors": 0} for kind in self.FETCHERS}
+
+    def get(self, kind, clients):
+        """Returns {"items", "etag", "timestamp"} for "subscriptions" or "tenants"."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(kind)
+            if entry and now - entry["timestamp"] < self.ttl:
+                self._stats[kind]["hits"] += 1
+                return entry
+            if entry and now - entry["timestamp"] < self.ttl + self.max_stale:
+                self._stats[kind]["stale"] += 1
+                if kind not in self._refreshing:
+                    self._refreshing.add(kind)
+                    self._executor.submit(self._refresh_in_background, kind, clients)
+                return entry
+        return self.refresh(kind, clients)
+
+    def refresh(self, kind, clients):
+        """Fetches a listing from Azure now and stores it."""
+        try:
+            items = self.FETCHERS[kind](clients)
+        except Exception:
+            with self._lock:
+                self._stats[kind]["errors"] += 1
+            raise
+        entry = {"items": items, "etag": _etag(items), "timestamp": time.time()}
+        with self._lock:
+            self._entries[kind] = entry
+            self._stats[kind]["loads"] += 1
+        return entry
+
+    def _refresh_in_background(self, kind, clients):
+        try:
+            self.refresh(kind, clients)
+        except Exception as e:
+            app_logger.error(f"Directory: background refresh of {kind} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(kind)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                kind: dict(
+                    stats,
+                    count=len(self._entries[kind]["items"]) if kind in self._entries else None,
+                    age_seconds=round(now - self._entries[kind]["timestamp"], 1) if kind in self._entries else None
+                )
+                for kind, stats in self._stats.items()
+            }
+
+
+def init_app(app):
+    """Creates the subscription / tenant directory cache, refreshed on the shared executor."""
+    app.extensions["directory"] = DirectoryCache(
+        app.extensions["executor"],
+        ttl=app.config["DIRECTORY_CACHE_TTL_SECONDS"],
+        max_stale=app.config["DIRECTORY_CACHE_MAX_STALE_SECONDS"]
+    )
+
+
+def get_directory():
+    """Returns the directory cache of the current app."""
+    return current_app.extensions["directory"]
+
+
+def list_subscriptions(clients):
+    """
+    Subscriptions visible to the app identity, as
+    [{"display_name", "subscription_id"}], served from the directory cache.
+    """
+    return get_directory().get("subscriptions", clients)["items"]
+
+
+def list_tenants(clients):
+    """
+    Tenants visible to the app identity, as [{"tenant_id", "display_name"}],
+    served from the directory cache.
+    """
+    return get_directory().get("tenants", clients)["items"]
@@ -0,0 +1,101 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, local
+
+from flask import current_app
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+
+class AppExecutor:
+    """
+    Long-lived, bounded thread pool owned by the Flask app.
+    Every task runs inside the app context, so worker code can use
+    current_app (logger, config, extensions) just like a request handler.
+    Use it for parallel upstream calls instead of creating a pool per request.
+    """
+
+    def __init__(self, app, max_workers, thread_name_prefix="cloudone-worker"):
+        self._app = app
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._thread = local()
+        self._lock = Lock()
+        self._submitted = 0
+        self._started = 0
+        self._finished = 0
+        self._failed = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules fn(*args, **kwargs) in the app context. Returns a Future."""
+        with self._lock:
+            self._submitted += 1
+        return self._pool.submit(self._run, fn, args, kwargs)
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self._started += 1
+        self._thread.owned = True
+        try:
+            with self._app.app_context():
+                return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._finished += 1
+
+    def owns_current_thread(self):
+        """True when called from one of this pool's worker threads."""
+        return getattr(self._thread, "owned", False)
+
+    def stats(self):
+        """Returns pool size, active threads and queue depth."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self._started - self._finished,
+                "queued": self._submitted - self._started,
+                "submitted": self._submitted,
+                "completed": self._finished,
+                "failed": self._failed
+            }
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def init_app(app):
+    """
+    Creates the shared executor for this app and two separate pools: one that
+    fetches Resource Graph result pages, and one that runs the page payloads of
+    the bootstrap (whole API routes). Page fetches never submit further work,
+    so a task on the shared executor can wait for them without deadlocking when
+    the shared pool is saturated. Bootstrap dispatches do submit to the shared
+    executor and wait on it, so they must never occupy its threads.
+    """
+    app.extensions["executor"] = AppExecutor(app, app.config["EXECUTOR_MAX_WORKERS"])
+    app.extensions["paging_executor"] = AppExecutor(
+        app, app.config["RESOURCE_GRAPH_PAGING_WORKERS"], thread_name_prefix="cloudone-paging"
+    )
+    app.extensions["bootstrap_executor"] = AppExecutor(
+        app, app.config["BOOTSTRAP_WORKERS"], thread_name_prefix="cloudone-bootstrap"
+    )
+
+
+def get_executor():
+    """Returns the shared executor of the current app."""
+    return current_app.extensions["executor"]
+
+
+def get_paging_executor():
+    """Returns the Resource Graph paging pool of the current app (see query_rows)."""
+    return current_app.extensions["paging_executor"]
+
+
+def get_bootstrap_executor():
+    """Returns the pool that runs bootstrap page dispatches (see build_bootstrap)."""
+    return current_app.extensions["bootstrap_executor"]
@@ -0,0 +1,671 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+
+from azure.mgmt.resourcegraph import ResourceGraphClient
+from flask import current_app
+
+from cloudone_app.services.resource_graph import (
+    query_rows, kql_string, MAX_PAGE_SIZE, RESOURCE_CATEGORY_KQL, ORPHAN_CATEGORY_KQL
+)
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+# Resource Graph keeps 14 days of change history; resync fully before falling off it
+CHANGE_HISTORY_RETENTION = timedelta(days=13)
+# Changes can show up in resourcechanges a little after they happen, so each
+# incremental sync re-reads a short window before the watermark (re-applying is idempotent)
+CHANGE_INGESTION_OVERLAP = timedelta(minutes=5)
+# Resource ids per "where id in~ (...)" refetch
+REFETCH_BATCH_SIZE = 200
+# How long one process may hold a subscription's sync claim (released when the sync ends)
+SYNC_CLAIM_LEASE_SECONDS = 30 * 60
+# A subscription whose sync failed is retried after sync_interval, doubling up to this
+MAX_SYNC_BACKOFF_SECONDS = 3600
+
+ORPHAN_CATEGORIES = ("disks", "nics", "pips", "nsgs", "rgs")
+
+# Response header carrying the freshness watermark of snapshot-backed answers
+AS_OF_HEADER = "X-Inventory-As-Of"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    id TEXT PRIMARY KEY COLLATE NOCASE,
+    subscription_id TEXT NOT NULL COLLATE NOCASE,
+    name TEXT COLLATE NOCASE,
+    type TEXT COLLATE NOCASE,
+    location TEXT COLLATE NOCASE,
+    resource_group TEXT COLLATE NOCASE,
+    category TEXT,
+    tags TEXT,
+    power_state TEXT,
+    provisioning_state TEXT,
+    sku TEXT,
+    managed_by TEXT,
+    orphan_category TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_resources_name ON resources (subscription_id, name);
+CREATE INDEX IF NOT EXISTS ix_resources_type ON resources (subscription_id, type);
+CREATE INDEX IF NOT EXISTS ix_resources_location ON resources (subscription_id, location);
+CREATE INDEX IF NOT EXISTS ix_resources_group ON resources (subscription_id, resource_group);
+CREATE INDEX IF NOT EXISTS ix_resources_category ON resources (subscription_id, category);
+CREATE INDEX IF NOT EXISTS ix_resources_orphan ON resources (subscription_id, orphan_category);
+
+-- A full load is staged here page by page, then swapped into resources in one transaction
+CREATE TABLE IF NOT EXISTS resources_staging (
+    id TEXT PRIMARY KEY COLLATE NOCASE,
+    subscription_id TEXT NOT NULL COLLATE NOCASE,
+    name TEXT,
+    type TEXT,
+    location TEXT,
+    resource_group TEXT,
+    category TEXT,
+    tags TEXT,
+    power_state TEXT,
+    provisioning_state TEXT,
+    sku TEXT,
+    managed_by TEXT,
+    orphan_category TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_resources_staging_sub ON resources_staging (subscription_id);
+
+CREATE TABLE IF NOT EXISTS resource_groups (
+    id TEXT PRIMARY KEY COLLATE NOCASE,
+    subscription_id TEXT NOT NULL COLLATE NOCASE,
+    name TEXT COLLATE NOCASE,
+    location TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_resource_groups_sub ON resource_groups (subscription_id, name);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    subscription_id TEXT PRIMARY KEY COLLATE NOCASE,
+    full_sync_at REAL NOT NULL,
+    synced_at REAL NOT NULL,
+    change_watermark TEXT NOT NULL
+);
+
+-- Lease held by the process syncing a subscription, so worker processes don't sync it twice
+CREATE TABLE IF NOT EXISTS sync_claims (
+    subscription_id TEXT PRIMARY KEY COLLATE NOCASE,
+    token TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+RESOURCE_COLUMNS = (
+    "id", "subscription_id", "name", "type", "location", "resource_group", "category",
+    "tags", "power_state", "provisioning_state", "sku", "managed_by", "orphan_category"
+)
+
+# Sort keys accepted by iter_resources (API name -> column)
+SORT_COLUMNS = {"name": "name", "type": "type", "location": "location", "resource_group": "resource_group"}
+
+
+def _resource_query(subscription_id, where=""):
+    """Normalized projection of Resources rows, as stored in the snapshot."""
+    return f"""
+    Resources
+    | where subscriptionId == {kql_string(subscription_id)}
+    {where}
+    {RESOURCE_CATEGORY_KQL}
+    | extend powerState = case(
+        type =~ 'microsoft.compute/virtualmachines', tostring(properties.extended.instanceView.powerState.code),
+        type =~ 'microsoft.web/sites', tostring(properties.state),
+        ''
+    )
+    | extend orphanCategory = {ORPHAN_CATEGORY_KQL}
+    | project id, name, type, location, resourceGroup, tags, category, powerState, orphanCategory,
+              provisioningState = tostring(properties.provisioningState),
+              sku = tostring(sku.name), managedBy
+    | order by id asc
+    """
+
+
+def _resource_group_query(subscription_id):
+    return f"""
+    ResourceContainers
+    | where type == 'microsoft.resources/subscriptions/resourcegroups' and subscriptionId == {kql_string(subscription_id)}
+    | project id, name, location
+    | order by id asc
+    """
+
+
+def _change_query(subscription_id, since):
+    return f"""
+    resourcechanges
+    | where subscriptionId == {kql_string(subscription_id)}
+    | extend changeTime = todatetime(properties.changeAttributes.timestamp),
+             targetResourceId = tostring(properties.targetResourceId),
+             changeType = tostring(properties.changeType)
+    | where changeTime > datetime({since.strftime('%Y-%m-%dT%H:%M:%SZ')})
+    | project targetResourceId, changeType, changeTime
+    | order by changeTime asc
+    """
+
+
+def _power_state_query(subscription_id):
+    return f"""
+    Resources
+    | where subscriptionId == {kql_string(subscription_id)}
+    | where type in~ ('microsoft.compute/virtualmachines', 'microsoft.web/sites')
+    | project id, powerState = case(
+        type =~ 'microsoft.compute/virtualmachines', tostring(properties.extended.instanceView.powerState.code),
+        tostring(properties.state)
+    )
+    | order by id asc
+    """
+
+
+def format_as_of(as_of):
+    """Epoch seconds -> ISO 8601 UTC, as returned in 'as_of' fields and AS_OF_HEADER."""
+    return datetime.fromtimestamp(as_of, timezone.utc).isoformat()
+
+
+def _parse_time(value):
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _pages(rows, size):
+    """Groups an iterable of rows into lists of at most size rows."""
+    page = []
+    for row in rows:
+        page.append(row)
+        if len(page) >= size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _record(subscription_id, item):
+    """One Resource Graph row as a resources table tuple (RESOURCE_COLUMNS order)."""
+    return (
+        item.get('id'),
+        subscription_id,
+        item.get('name'),
+        item.get('type'),
+        item.get('location'),
+        item.get('resourceGroup'),
+        item.get('category'),
+        json.dumps(item.get('tags') or {}),
+        item.get('powerState') or None,
+        item.get('provisioningState') or None,
+        item.get('sku') or None,
+        item.get('managedBy') or None,
+        item.get('orphanCategory') or None
+    )
+
+
+class InventorySnapshot:
+    """
+    Local SQLite copy of the Resource Graph inventory, one snapshot per subscription.
+    A subscription is loaded in full once, then kept current by incremental syncs
+    driven by the resourcechanges table (plus a cheap power-state refresh, which
+    change history does not track). Reads are indexed local queries.
+
+    Readers call ready(); when the snapshot is missing or older than the sync
+    interval a background sync is queued (one executor task works the queue). Until the
+    first load finishes ready() returns None and callers query Azure directly, and
+    so they do again once the snapshot is older than max_staleness (its syncs keep
+    failing, or the subscription left the directory listing).
+
+    The sync state is read from the database, so every worker process sees the
+    other processes' syncs, and a lease row (sync_claims) lets only one process
+    sync a subscription at a time. Only subscriptions in the directory listing
+    are synced; a failed sync is retried with exponential backoff.
+    Resource Graph is always read before a write transaction opens, so the
+    database is never locked across a network call.
+    """
+
+    def __init__(self, db_path, clients, executor, directory, sync_interval, full_resync_interval, max_staleness):
+        self.db_path = db_path
+        self._clients = clients
+        self._executor = executor
+        self._directory = directory
+        self.sync_interval = sync_interval
+        self.full_resync_interval = full_resync_interval
+        self.max_staleness = max_staleness
+        self._lock = Lock()
+        self._inflight = set()
+        self._pending = deque()
+        self._draining = False
+        # subscription id -> (consecutive failures, retry_at); directory subscriptions only
+        self._failures = {}
+        self._known = (None, frozenset())
+        self._stats = {
+            "full_syncs": 0, "incremental_syncs": 0, "skipped_syncs": 0, "changes_applied": 0,
+            "failed_syncs": 0, "stale_fallbacks": 0, "last_sync_seconds": 0.0
+        }
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        conn.close()
+
+    def _connect(self):
+        # One short-lived connection per operation keeps this safe across worker threads
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- Freshness ---
+
+    def _read_state(self, subscription_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM sync_state WHERE subscription_id = ?", (subscription_id,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def as_of(self, subscription_id):
+        """Epoch seconds of the last completed sync (by any worker process), or None if never loaded."""
+        state = self._read_state(subscription_id)
+        return state["synced_at"] if state else None
+
+    def ready(self, subscription_id):
+        """
+        Returns the snapshot watermark (epoch seconds) when the subscription can be
+        answered locally, else None: never loaded, or older than max_staleness.
+        Schedules a background sync when it is due.
+        """
+        as_of = self.as_of(subscription_id)
+        age = time.time() - as_of if as_of is not None else None
+        if (age is None or age >= self.sync_interval) and self._may_sync(subscription_id):
+            self.request_sync(subscription_id)
+        if age is not None and age >= self.max_staleness:
+            with self._lock:
+                self._stats["stale_fallbacks"] += 1
+            return None
+        return as_of
+
+    def _may_sync(self, subscription_id):
+        """True for directory subscriptions that are not backing off after a failed sync."""
+        key = subscription_id.lower()
+        with self._lock:
+            failure = self._failures.get(key)
+        if failure and time.time() < failure[1]:
+            return False
+        try:
+            listing = self._directory.get("subscriptions", self._clients)
+        except Exception as e:
+            app_logger.warning(f"Inventory snapshot: subscription listing unavailable, not syncing: {e}")
+            return False
+        with self._lock:
+            if self._known[0] != listing["etag"]:
+                self._known = (listing["etag"], frozenset(item["subscription_id"].lower() for item in listing["items"]))
+            return key in self._known[1]
+
+    def request_sync(self, subscription_id):
+        """
+        Queues a sync unless one is already queued or running. Queued syncs are
+        run one after another by a single executor task, so a burst of requests
+        (e.g. an 'all' scope) never ties up more than one worker.
+        """
+        key = subscription_id.lower()
+        with self._lock:
+            if key in self._inflight:
+                return
+            self._inflight.add(key)
+            self._pending.append(subscription_id)
+            if self._draining:
+                return
+            self._draining = True
+        self._executor.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._draining = False
+                    return
+                subscription_id = self._pending.popleft()
+            key = subscription_id.lower()
+            try:
+                self.sync(subscription_id)
+                with self._lock:
+                    self._failures.pop(key, None)
+            except Exception as e:
+                with self._lock:
+                    self._stats["failed_syncs"] += 1
+                    failures = self._failures.get(key, (0, 0))[0] + 1
+                    backoff = min(self.sync_interval * 2 ** (failures - 1), MAX_SYNC_BACKOFF_SECONDS)
+                    self._failures[key] = (failures, time.time() + backoff)
+                app_logger.error(f"Inventory snapshot sync failed for sub {subscription_id} (retry in {backoff:.0f}s): {e}")
+            finally:
+                with self._lock:
+                    self._inflight.discard(key)
+
+    # --- Sync ---
+
+    def _claim(self, subscription_id):
+        """Takes the cross-process sync lease for a subscription. Returns a token, or None if held."""
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._connect() as conn:
+            claimed = conn.execute(
+                "INSERT INTO sync_claims (subscription_id, token, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (subscription_id) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+                "WHERE sync_claims.expires_at <= ?",
+                (subscription_id, token, now + SYNC_CLAIM_LEASE_SECONDS, now)
+            ).rowcount
+        conn.close()
+        return token if claimed else None
+
+    def _release(self, subscription_id, token):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sync_claims WHERE subscription_id = ? AND token = ?", (subscription_id, token))
+        conn.close()
+
+    def sync(self, subscription_id, full=False):
+        """
+        Brings the snapshot of a subscription up to date (full load or incremental).
+        Returns False when another process is syncing it or has just synced it.
+        """
+        key = subscription_id.lower()
+        token = self._claim(key)
+        if token is None:
+            with self._lock:
+                self._stats["skipped_syncs"] += 1
+            return False
+        try:
+            started = time.time()
+            state = self._read_state(key)
+            if not full and state is not None and started - state["synced_at"] < self.sync_interval:
+                # Another worker process synced it since this one looked
+                with self._lock:
+                    self._stats["skipped_syncs"] += 1
+                return False
+            now = datetime.now(timezone.utc)
+            if (full or state is None
+                    or started - state["full_sync_at"] >= self.full_resync_interval
+                    or now - _parse_time(state["change_watermark"]) >= CHANGE_HISTORY_RETENTION):
+                self._full_sync(subscription_id, started)
+                counter = "full_syncs"
+            else:
+                self._incremental_sync(subscription_id, state, started)
+                counter = "incremental_syncs"
+
+            with self._lock:
+                self._stats[counter] += 1
+                self._stats["last_sync_seconds"] = round(time.time() - started, 3)
+            return True
+        finally:
+            self._release(key, token)
+
+    def _write_state(self, conn, state):
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state (subscription_id, full_sync_at, synced_at, change_watermark) VALUES (?, ?, ?, ?)",
+            (state["subscription_id"], state["full_sync_at"], state["synced_at"], state["change_watermark"])
+        )
+
+    @staticmethod
+    def _fetch_resource_groups(client, subscription_id):
+        return [(rg.get('id'), subscription_id, rg.get('name'), rg.get('location'))
+                for rg in query_rows(client, [subscription_id], _resource_group_query(subscription_id))]
+
+    @staticmethod
+    def _write_resource_groups(conn, subscription_id, groups):
+        conn.execute("DELETE FROM resource_groups WHERE subscription_id = ?", (subscription_id,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO resource_groups (id, subscription_id, name, location) VALUES (?, ?, ?, ?)",
+            groups
+        )
+
+    def _full_sync(self, subscription_id, started):
+        client = self._clients.get_client(ResourceGraphClient)
+        # Changes made while the load runs are picked up by the next incremental sync
+        watermark = datetime.fromtimestamp(started, timezone.utc).isoformat()
+        columns = ", ".join(RESOURCE_COLUMNS)
+        placeholders = ", ".join("?" * len(RESOURCE_COLUMNS))
+
+        # Each page is fetched first, then staged in its own short transaction;
+        # readers keep seeing the previous snapshot until the swap below
+        with self._connect() as conn:
+            conn.execute("DELETE FROM resources_staging WHERE subscription_id = ?", (subscription_id,))
+        conn.close()
+        count = 0
+        rows = (_record(subscription_id, item)
+                for item in query_rows(client, [subscription_id], _resource_query(subscription_id)))
+        for page in _pages(rows, MAX_PAGE_SIZE):
+            with self._connect() as conn:
+                conn.executemany(f"INSERT OR REPLACE INTO resources_staging ({columns}) VALUES ({placeholders})", page)
+            conn.close()
+            count += len(page)
+        groups = self._fetch_resource_groups(client, subscription_id)
+
+        state = {"subscription_id": subscription_id.lower(), "full_sync_at": started,
+                 "synced_at": started, "change_watermark": watermark}
+        with self._connect() as conn:
+            conn.execute("DELETE FROM resources WHERE subscription_id = ?", (subscription_id,))
+            conn.execute(
+                f"INSERT OR REPLACE INTO resources ({columns}) "
+                f"SELECT {columns} FROM resources_staging WHERE subscription_id = ?",
+                (subscription_id,)
+            )
+            conn.execute("DELETE FROM resources_staging WHERE subscription_id = ?", (subscription_id,))
+            self._write_resource_groups(conn, subscription_id, groups)
+            self._write_state(conn, state)
+        conn.close()
+
+        app_logger.info(f"Inventory snapshot: full load of sub {subscription_id} ({count} resources) in {time.time() - started:.1f}s")
+        return state
+
+    def _incremental_sync(self, subscription_id, state, started):
+        client = self._clients.get_client(ResourceGraphClient)
+        since = _parse_time(state["change_watermark"]) - CHANGE_INGESTION_OVERLAP
+
+        # Last change per resource wins
+        latest = {}
+        watermark = _parse_time(state["change_watermark"])
+        for change in query_rows(client, [subscription_id], _change_query(subscription_id, since)):
+            resource_id = change.get('targetResourceId')
+            if resource_id:
+                latest[resource_id.lower()] = (resource_id, change.get('changeType'))
+            if change.get('changeTime'):
+                watermark = max(watermark, _parse_time(change['changeTime']))
+
+        deleted = [resource_id for resource_id, change_type in latest.values() if change_type == 'Delete']
+        changed = [resource_id for resource_id, change_type in latest.values() if change_type != 'Delete']
+
+        # Everything is read from Resource Graph before the write transaction opens
+        upserts = []
+        for i in range(0, len(changed), REFETCH_BATCH_SIZE):
+            batch = changed[i:i + REFETCH_BATCH_SIZE]
+            where = f"| where id in~ ({', '.join(kql_string(resource_id) for resource_id in batch)})"
+            rows = list(query_rows(client, [subscription_id], _resource_query(subscription_id, where)))
+            # A changed resource that is gone by now was deleted after the change
+            found = {row.get('id', '').lower() for row in rows}
+            deleted.extend(resource_id for resource_id in batch if resource_id.lower() not in found)
+            upserts.extend(_record(subscription_id, row) for row in rows)
+        # Power state isn't an ARM property change, so it is refreshed on every sync
+        power_states = [(row.get('powerState') or None, row.get('id'))
+                        for row in query_rows(client, [subscription_id], _power_state_query(subscription_id))]
+        groups = self._fetch_resource_groups(client, subscription_id)
+        placeholders = ", ".join("?" * len(RESOURCE_COLUMNS))
+
+        state = dict(state, synced_at=started, change_watermark=watermark.isoformat())
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM resources WHERE id = ?", ((resource_id,) for resource_id in deleted))
+            conn.executemany(
+                f"INSERT OR REPLACE INTO resources ({', '.join(RESOURCE_COLUMNS)}) VALUES ({placeholders})",
+                upserts
+            )
+            conn.executemany("UPDATE resources SET power_state = ? WHERE id = ?", power_states)
+            self._write_resource_groups(conn, subscription_id, groups)
+            self._write_state(conn, state)
+        conn.close()
+
+        with self._lock:
+            self._stats["changes_applied"] += len(latest)
+        app_logger.info(f"Inventory snapshot: sub {subscription_id} synced {len(latest)} changes in {time.time() - started:.1f}s")
+        return state
+
+    # --- Queries ---
+
+    def _where(self, subscription_id, filters):
+        """
+        SQL where clause and parameters for the inventory filters
+        (same keys and semantics as the Resource Graph inventory query).
+        """
+        clauses, params = ["subscription_id = ?"], [subscription_id]
+        for key, column in (("type", "type"), ("location", "location"), ("resource_group", "resource_group"), ("category", "category")):
+            if filters.get(key):
+                clauses.append(f"{column} = ?")
+                params.append(filters[key])
+        if filters.get("name_prefix"):
+            prefix = filters["name_prefix"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(prefix + "%")
+        if filters.get("tag"):
+            tag_key, _, tag_value = filters["tag"].partition(":")
+            path = '$."' + tag_key.replace('"', '\\"') + '"'
+            if tag_value:
+                clauses.append("lower(json_extract(tags, ?)) = lower(?)")
+                params.extend([path, tag_value])
+            else:
+                clauses.append("json_extract(tags, ?) IS NOT NULL AND json_extract(tags, ?) != ''")
+                params.extend([path, path])
+        return " AND ".join(clauses), params
+
+    def count_resources(self, subscription_id, filters=None):
+        where, params = self._where(subscription_id, filters or {})
+        with self._connect() as conn:
+            count = conn.execute(f"SELECT COUNT(*) FROM resources WHERE {where}", params).fetchone()[0]
+        conn.close()
+        return count
+
+    def iter_resources(self, subscription_id, filters=None, sort="name", descending=False, offset=0, limit=None):
+        """Yields inventory rows (API shape), sorted and filtered like the live query."""
+        where, params = self._where(subscription_id, filters or {})
+        direction = "DESC" if descending else "ASC"
+        sql = (f"SELECT * FROM resources WHERE {where} "
+               f"ORDER BY {SORT_COLUMNS[sort]} {direction}, id ASC LIMIT ? OFFSET ?")
+        conn = self._connect()
+        try:
+            for row in conn.execute(sql, params + [-1 if limit is None else limit, offset]):
+                yield {
+                    "id": row["id"],
+                    "name": row["name"],
+                    "type": row["type"],
+                    "location": row["location"],
+                    "resource_group": row["resource_group"],
+                    "category": row["category"],
+                    "status": row["provisioning_state"] or "Unknown"
+                }
+        finally:
+            conn.close()
+
+    def category_counts(self, subscription_id, filters=None):
+        where, params = self._where(subscription_id, filters or {})
+        counts = {"Compute": 0, "Storage": 0, "Network": 0, "Database": 0, "Other": 0}
+        with self._connect() as conn:
+            for row in conn.execute(f"SELECT category, COUNT(*) AS n FROM resources WHERE {where} GROUP BY category", params):
+                if row["category"] in counts:
+                    counts[row["category"]] = row["n"]
+        conn.close()
+        return counts
+
+    def orphans(self, subscription_id):
+        """The orphan scan (same shape as the live scan), answered from the snapshot."""
+        results = {category: [] for category in ORPHAN_CATEGORIES}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT orphan_category, name, type, location, resource_group, id FROM resources "
+                "WHERE subscription_id = ? AND orphan_category IS NOT NULL ORDER BY id",
+                (subscription_id,)
+            )
+            for row in rows:
+                results[row["orphan_category"]].append({
+                    "name": row["name"],
+                    "type": row["type"],
+                    "location": row["location"],
+                    "resource_group": row["resource_group"],
+                    "id": row["id"]
+                })
+            empty_groups = conn.execute(
+                "SELECT g.name, g.location, g.id FROM resource_groups g WHERE g.subscription_id = ? AND NOT EXISTS ("
+                "SELECT 1 FROM resources r WHERE r.subscription_id = g.subscription_id AND r.resource_group = g.name"
+                ") ORDER BY g.id",
+                (subscription_id,)
+            )
+            for row in empty_groups:
+                results["rgs"].append({
+                    "name": row["name"],
+                    "type": "Microsoft.Resources/resourceGroups (Empty)",
+                    "location": row["location"],
+                    "resource_group": row["name"],
+                    "id": row["id"]
+                })
+        conn.close()
+        return results
+
+    def monitoring_rows(self, subscription_id):
+        """VMs and App Services in the shape of the monitoring Resource Graph query."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, name, type, location, resource_group, tags, power_state FROM resources "
+                "WHERE subscription_id = ? AND type IN ('microsoft.compute/virtualmachines', 'microsoft.web/sites') "
+                "ORDER BY id",
+                (subscription_id,)
+            ).fetchall()
+        conn.close()
+        return [{
+            "id": row["id"],
+            "name": row["name"],
+            "type": row["type"],
+            "location": row["location"],
+            "resourceGroup": row["resource_group"],
+            "tags": json.loads(row["tags"] or "{}"),
+            "powerState": row["power_state"] or "N/A"
+        } for row in rows]
+
+    def stats(self):
+        with self._connect() as conn:
+            subscriptions = {
+                row["subscription_id"]: {"synced_at": row["synced_at"], "full_sync_at": row["full_sync_at"]}
+                for row in conn.execute("SELECT subscription_id, synced_at, full_sync_at FROM sync_state")
+            }
+        conn.close()
+        with self._lock:
+            return dict(
+                self._stats,
+                subscriptions=subscriptions,
+                syncs_queued=len(self._inflight),
+                backing_off=len(self._failures)
+            )
+
+
+def init_app(app):
+    """
+    Opens the inventory snapshot (instance/inventory.sqlite3 unless
+    INVENTORY_SNAPSHOT_PATH is set). Needs the client pool, the executor and
+    the directory cache.
+    """
+    if not app.config["INVENTORY_SNAPSHOT_ENABLED"]:
+        app.extensions["inventory_snapshot"] = None
+        return
+    db_path = app.config["INVENTORY_SNAPSHOT_PATH"]
+    if not db_path:
+        os.makedirs(app.instance_path, exist_ok=True)
+        db_path = os.path.join(app.instance_path, "inventory.sqlite3")
+    app.extensions["inventory_snapshot"] = InventorySnapshot(
+        db_path,
+        app.extensions["azure_clients"],
+        app.extensions["executor"],
+        app.extensions["directory"],
+        sync_interval=app.config["INVENTORY_SYNC_INTERVAL_SECONDS"],
+        full_resync_interval=app.config["INVENTORY_FULL_RESYNC_SECONDS"],
+        max_staleness=app.config["INVENTORY_SYNC_INTERVAL_SECONDS"] * app.config["INVENTORY_MAX_STALENESS_INTERVALS"]
+    )
+
+
+def get_snapshot():
+    """Returns the inventory snapshot of the current app, or None when disabled."""
+    return current_app.extensions.get("inventory_snapshot")
@@ -0,0 +1,201 @@
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from flask import current_app
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+DONE_STATUSES = ("succeeded", "failed")
+
+
+class QueueFull(RuntimeError):
+    """Raised by JobQueue.submit when max_queue jobs are already waiting."""
+
+
+class JobQueue:
+    """
+    Background jobs for slow, LLM-backed endpoints. A POST creates a job and
+    returns its id at once; a small dedicated pool (max_workers threads, run in
+    the app context) executes it, so Gemini latency no longer holds request
+    threads and cannot starve the shared executor. At most max_queue jobs wait
+    for a worker; further submissions raise QueueFull.
+
+    Job records live in the "jobs" cache (services/cache.py) for result_ttl
+    seconds; queued and running records are pinned there, so finished results
+    never evict a job that is still in progress. With the sqlite cache backend
+    a job can be polled from any worker process; with the memory backend only
+    the process that accepted it knows it, and a poll that lands on another
+    worker gets 404, so multi-process deployments need CACHE_BACKEND=sqlite.
+    A job function returns (body, http_status); the job is "failed" when the
+    status is 400 or above or anything raises. Every state transition saves a
+    new record, so pollers never see a half-updated one.
+    """
+
+    def __init__(self, app, store, max_workers, max_queue, result_ttl):
+        self._app = app
+        self._store = store
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cloudone-job")
+        self._lock = Lock()
+        self._queued = 0
+        self._running = 0
+        self._rejected = 0
+        self._stats = {}
+
+    def _save(self, job):
+        """Stores a job record, pinned until it is done. Returns False if it was too large to store."""
+        return self._store.set(job["id"], job, ttl=self.result_ttl, pin=job["status"] not in DONE_STATUSES)
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs) as a job of this kind. Returns the job record (a copy is saved)."""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise QueueFull(f"{self._queued} jobs are already waiting")
+            self._queued += 1
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "result_status": None,
+            "error": None
+        }
+        try:
+            self._save(dict(job))
+            self._pool.submit(self._run, dict(job), fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            raise
+        return job
+
+    def _record(self, kind, wait, run=None, failed=False):
+        with self._lock:
+            stats = self._stats.setdefault(kind, {
+                "started": 0, "finished": 0, "failed": 0,
+                "total_wait": 0.0, "max_wait": 0.0, "total_run": 0.0, "max_run": 0.0
+            })
+            if run is None:
+                stats["started"] += 1
+                stats["total_wait"] += wait
+                stats["max_wait"] = max(stats["max_wait"], wait)
+                return
+            stats["finished"] += 1
+            stats["total_run"] += run
+            stats["max_run"] = max(stats["max_run"], run)
+            if failed:
+                stats["failed"] += 1
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        job = dict(job, status="running", started_at=time.time())
+        self._record(job["kind"], wait=job["started_at"] - job["created_at"])
+        try:
+            with self._app.app_context():
+                try:
+                    self._save(job)
+                    body, status = fn(*args, **kwargs)
+                except Exception as e:
+                    app_logger.error(f"Job {job['id']} ({job['kind']}) failed: {e}")
+                    body, status = {"error": str(e)}, 500
+                job = self._finish(job, body, status)
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._record(
+                job["kind"], wait=None,
+                run=(job["finished_at"] or time.time()) - job["started_at"],
+                failed=job["status"] != "succeeded"
+            )
+
+    def _finish(self, job, body, status):
+        """
+        Saves the final record of a job. If that fails, or the result is too
+        large for the jobs cache, tries to save a small failed record instead.
+        """
+        done = dict(
+            job,
+            result=body,
+            result_status=status,
+            status="failed" if status >= 400 else "succeeded",
+            error=body.get("error") if status >= 400 and isinstance(body, dict) else None,
+            finished_at=time.time()
+        )
+        try:
+            if self._save(done):
+                return done
+            app_logger.error(f"Job {job['id']} ({job['kind']}): the result exceeds the jobs cache's max_bytes")
+        except Exception as e:
+            app_logger.error(f"Job {job['id']} ({job['kind']}): saving the result failed: {e}")
+        failed = dict(
+            job,
+            result={"error": "Job result could not be stored"},
+            result_status=500,
+            status="failed",
+            error="Job result could not be stored",
+            finished_at=time.time()
+        )
+        try:
+            if not self._save(failed):
+                app_logger.error(f"Job {job['id']} ({job['kind']}): could not be marked failed")
+        except Exception as e:
+            app_logger.error(f"Job {job['id']} ({job['kind']}): could not be marked failed: {e}")
+        return failed
+
+    def get(self, job_id):
+        """Returns a job record, or None if it is unknown or expired."""
+        entry = self._store.get(job_id)
+        return entry["data"] if entry else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "running": self._running,
+                "rejected": self._rejected,
+                "kinds": {
+                    kind: {
+                        "started": s["started"],
+                        "finished": s["finished"],
+                        "failed": s["failed"],
+                        "avg_wait_seconds": round(s["total_wait"] / s["started"], 3) if s["started"] else 0,
+                        "max_wait_seconds": round(s["max_wait"], 3),
+                        "avg_run_seconds": round(s["total_run"] / s["finished"], 3) if s["finished"] else 0,
+                        "max_run_seconds": round(s["max_run"], 3)
+                    }
+                    for kind, s in self._stats.items()
+                }
+            }
+
+
+def init_app(app):
+    """Creates the job queue; job records are kept in the "jobs" cache."""
+    if app.config["CACHE_BACKEND"] != "sqlite":
+        app_logger.info("Job records are kept per process (CACHE_BACKEND=memory); "
+                        "use CACHE_BACKEND=sqlite when running several worker processes")
+    app.extensions["jobs"] = JobQueue(
+        app,
+        app.extensions["caches"].get("jobs"),
+        max_workers=app.config["JOB_WORKERS"],
+        max_queue=app.config["JOB_MAX_QUEUE"],
+        result_ttl=app.config["JOB_RESULT_TTL_SECONDS"]
+    )
+
+
+def get_job_queue():
+    """Returns the job queue of the current app."""
+    return current_app.extensions["jobs"]
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from flask import current_app
+
+from cloudone_app.services.ai_clients import get_ai_clients
+from cloudone_app.services.ai_service import REMEDIATION_PROMPT_VERSION, get_ai_remediation
+from cloudone_app.services.cache import get_cache
+from cloudone_app.services.coalesce import get_coalescer
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+ADVISOR_CATEGORIES = ("Cost", "Security", "HighAvailability", "Performance", "OperationalExcellence")
+
+
+def normalize_problem(problem):
+    """Collapses whitespace and case, so the same Advisor problem text always maps to one guide."""
+    return " ".join(str(problem).split()).lower()
+
+
+def advisor_problems(advisor, subscription_id, deadline=None):
+    """Distinct shortDescription.problem texts of a subscription's active Advisor recommendations."""
+    problems = {}
+    for category in ADVISOR_CATEGORIES:
+        for rec in advisor.get_category(subscription_id, category, deadline):
+            properties = rec.get('properties', {})
+            problem = properties.get('shortDescription', {}).get('problem')
+            if problem and not properties.get('suppressionId'):
+                problems.setdefault(normalize_problem(problem), problem)
+    return list(problems.values())
+
+
+class RemediationStore:
+    """
+    AI remediation guides keyed by the normalized Advisor problem text, kept
+    in the persistent "remediations" cache (services/cache.py). The same few
+    hundred problems repeat across subscriptions, so after the first
+    generation every "AI Remediate" click is a cache read.
+
+    pregenerate() fills the store ahead of time on a small dedicated pool
+    (max_concurrency threads), which bounds concurrent Gemini calls without
+    tying up the shared executor or the caller: it only queues the work.
+    """
+
+    def __init__(self, app, max_concurrency, max_per_run):
+        self._app = app
+        self.max_concurrency = max_concurrency
+        self.max_per_run = max_per_run
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="cloudone-remediation")
+        self._lock = Lock()
+        self._hits = 0
+        self._generated = 0
+        self._pregenerated = 0
+        self._failures = 0
+        self._queued = set()
+        self._last_batch = None
+
+    @staticmethod
+    def key(problem):
+        request = {
+            "v": REMEDIATION_PROMPT_VERSION,
+            "model": get_ai_clients().default_model,
+            "problem": normalize_problem(problem)
+        }
+        body = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    def _generate(self, problem, key):
+        def load():
+            result = get_ai_remediation(problem)
+            if "error" not in result:
+                get_cache("remediations").set(key, result)
+            return result
+        return get_coalescer().run("gemini.remediation", None, key, load)
+
+    def lookup(self, problem):
+        """Returns (result, age_seconds) for a stored guide, or None."""
+        entry = get_cache("remediations").get(self.key(problem))
+        if entry is None:
+            return None
+        with self._lock:
+            self._hits += 1
+        return entry["data"], int(time.time() - entry["timestamp"])
+
+    def store(self, problem, result):
+        """Stores a guide generated outside the store (the streaming endpoint)."""
+        get_cache("remediations").set(self.key(problem), result)
+        with self._lock:
+            self._generated += 1
+
+    def get(self, problem, fresh=False):
+        """
+        Returns (result, cache_status, age_seconds) for a problem text, where
+        status is HIT, MISS or BYPASS (fresh=True regenerates the guide).
+        """
+        if not fresh:
+            cached = self.lookup(problem)
+            if cached is not None:
+                return cached[0], "HIT", cached[1]
+        key = self.key(problem)
+        result = self._generate(problem, key)
+        with self._lock:
+            if "error" in result:
+                self._failures += 1
+            else:
+                self._generated += 1
+        return result, "BYPASS" if fresh else "MISS", 0
+
+    def _pregenerate_one(self, problem, key):
+        with self._app.app_context():
+            return "error" not in self._generate(problem, key)
+
+    def _on_pregenerated(self, key, future):
+        try:
+            ok = future.result()
+        except Exception as e:
+            app_logger.error(f"Remediation pre-generation failed: {e}")
+            ok = False
+        with self._lock:
+            self._queued.discard(key)
+            self._pregenerated += ok
+            self._failures += not ok
+
+    def submit(self, fn, *args, **kwargs):
+        """Runs fn in the app context on the store's own pool (e.g. collecting problems to pregenerate)."""
+        def run():
+            with self._app.app_context():
+                return fn(*args, **kwargs)
+        return self._pool.submit(run)
+
+    def pregenerate(self, problems, limit=None):
+        """
+        Queues generation of guides for the problems that have none yet on the
+        store's own pool and returns at once with a summary. At most limit
+        (capped at max_per_run) problems are queued per call, and never more
+        than max_per_run are queued or running at a time; the rest are left
+        for a later call.
+        """
+        limit = self.max_per_run if limit is None else min(limit, self.max_per_run)
+        cache = get_cache("remediations")
+        distinct = {}
+        for problem in problems:
+            distinct.setdefault(normalize_problem(problem), problem)
+
+        missing = []
+        for problem in distinct.values():
+            key = self.key(problem)
+            if cache.get(key) is None:
+                missing.append((problem, key))
+        with self._lock:
+            new = [(problem, key) for problem, key in missing if key not in self._queued]
+            batch = new[:max(min(limit, self.max_per_run - len(self._queued)), 0)]
+            self._queued.update(key for _, key in batch)
+        for problem, key in batch:
+            future = self._pool.submit(self._pregenerate_one, problem, key)
+            future.add_done_callback(lambda future, key=key: self._on_pregenerated(key, future))
+
+        summary = {
+            "problems": len(distinct),
+            "cached": len(distinct) - len(missing),
+            "queued": len(batch),
+            "already_queued": len(missing) - len(new),
+            "deferred": len(new) - len(batch),
+            "queued_at": time.time()
+        }
+        with self._lock:
+            self._last_batch = summary
+        if batch:
+            app_logger.info(f"Remediation pre-generation: {summary}")
+        return summary
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_per_run": self.max_per_run,
+                "queued": len(self._queued),
+                "hits": self._hits,
+                "generated_on_demand": self._generated,
+                "pregenerated": self._pregenerated,
+                "failures": self._failures,
+                "last_batch": self._last_batch
+            }
+
+
+def init_app(app):
+    """Creates the remediation store; guides live in the "remediations" cache."""
+    app.extensions["remediation_store"] = RemediationStore(
+        app,
+        max_concurrency=app.config["REMEDIATION_PREGEN_CONCURRENCY"],
+        max_per_run=app.config["REMEDIATION_PREGEN_MAX_PER_RUN"]
+    )
+
+
+def get_remediation_store():
+    """Returns the remediation store of the current app."""
+    return current_app.extensions["remediation_store"]
@@ -0,0 +1,126 @@
+import logging
+
+from azure.mgmt.resourcegraph.models import QueryRequest, QueryRequestOptions, ResultFormat
+
+from cloudone_app.services.coalesce import get_coalescer
+from cloudone_app.services.deadline import sdk_timeouts
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+# Resource Graph returns at most 1000 rows per page
+MAX_PAGE_SIZE = 1000
+# ...and accepts at most 1000 subscriptions per query
+MAX_SUBSCRIPTIONS_PER_QUERY = 1000
+
+# Buckets used by the inventory page and the dashboard's resource chart
+RESOURCE_CATEGORY_KQL = """
+    | extend category = case(
+        type has 'microsoft.compute/virtualmachines', 'Compute',
+        type has 'microsoft.storage', 'Storage',
+        type has 'microsoft.network', 'Network',
+        type has 'microsoft.sql' or type has 'microsoft.documentdb', 'Database',
+        'Other'
+    )"""
+
+# Orphan category of a resource row ('' when it is in use); empty resource
+# groups are detected separately since they are not Resources rows
+ORPHAN_CATEGORY_KQL = """case(
+        type == 'microsoft.compute/disks' and isnull(managedBy) and properties.diskState == 'Unattached', 'disks',
+        type == 'microsoft.network/networkinterfaces' and isnull(properties.virtualMachine.id), 'nics',
+        type == 'microsoft.network/publicipaddresses' and isnull(properties.ipConfiguration.id), 'pips',
+        type == 'microsoft.network/networksecuritygroups' and isnull(properties.subnets) and isnull(properties.networkInterfaces), 'nsgs',
+        ''
+    )"""
+
+
+def _query_page(client, subscriptions, query, page_size, skip_token=None, skip=None, deadline=None):
+    options = QueryRequestOptions(
+        top=page_size,
+        skip_token=skip_token,
+        skip=skip,
+        result_format=ResultFormat.OBJECT_ARRAY
+    )
+    request = QueryRequest(subscriptions=subscriptions, query=query, options=options)
+    return client.resources(request, **sdk_timeouts(deadline))
+
+
+def query_page(client, subscriptions, query, page_size=MAX_PAGE_SIZE, skip_token=None, deadline=None):
+    """
+    Fetches a single page. Returns (rows, next_skip_token, total_records)
+    for callers that hand pagination to their own clients.
+    """
+    response = _query_page(client, subscriptions, query, page_size, skip_token=skip_token, deadline=deadline)
+    return response.data or [], response.skip_token, response.total_records
+
+
+def kql_string(value):
+    """Quotes a user-supplied value as a KQL string literal."""
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def query_rows(client, subscriptions, query, page_size=MAX_PAGE_SIZE, deadline=None, executor=None, skip_token=None):
+    """
+    Runs a Resource Graph query and yields every row across all pages.
+
+    By default pages are followed one after another using $skipToken.
+    When an executor is given, the first page is used to learn the total
+    record count and the remaining pages are fetched concurrently with $skip
+    (rows are still yielded in order). Concurrent paging needs a stable order,
+    so such queries should end with an `order by`. Pass the dedicated paging
+    pool (executor.get_paging_executor()), never the shared executor: callers
+    on the shared pool would otherwise wait on pages queued behind them.
+    Called from one of the executor's own threads, pages are followed serially.
+
+    Rows are produced page by page, so a caller that consumes the generator
+    lazily only ever holds one page. skip_token resumes from a previous page.
+    """
+    response = _query_page(client, subscriptions, query, page_size, skip_token=skip_token, deadline=deadline)
+    yield from response.data or []
+
+    if executor is not None and executor.owns_current_thread():
+        executor = None
+    if executor is not None and skip_token is None and response.skip_token and response.total_records:
+        offsets = range(page_size, response.total_records, page_size)
+        app_logger.info(f"Resource Graph: fetching {len(offsets)} more pages concurrently ({response.total_records} rows)")
+        futures = [
+            executor.submit(_query_page, client, subscriptions, query, page_size, skip=offset, deadline=deadline)
+            for offset in offsets
+        ]
+        for future in futures:
+            yield from future.result(timeout=deadline.timeout() if deadline else None).data or []
+        return
+
+    skip_token = response.skip_token
+    while skip_token:
+        response = _query_page(client, subscriptions, query, page_size, skip_token=skip_token, deadline=deadline)
+        yield from response.data or []
+        skip_token = response.skip_token
+
+
+def query_rows_batched(client, subscriptions, query, batch_size=MAX_SUBSCRIPTIONS_PER_QUERY, deadline=None):
+    """
+    Runs one query across many subscriptions, batch_size subscriptions per
+    request, and yields every row. The query must not filter on a single
+    subscriptionId; project subscriptionId to group the rows afterwards.
+    """
+    batch_size = min(batch_size, MAX_SUBSCRIPTIONS_PER_QUERY)
+    for i in range(0, len(subscriptions), batch_size):
+        yield from query_rows(client, subscriptions[i:i + batch_size], query, deadline=deadline)
+
+
+def query_rows_shared(client, subscriptions, query, deadline=None, executor=None, batch_size=None):
+    """
+    Like query_rows (or query_rows_batched when batch_size is given), but
+    returns a list and coalesces identical concurrent queries: callers asking
+    for the same query over the same subscriptions share one upstream run.
+    The returned rows are shared and must not be mutated.
+    """
+    if batch_size:
+        load = lambda: list(query_rows_batched(client, subscriptions, query, batch_size, deadline=deadline))
+    else:
+        load = lambda: list(query_rows(client, subscriptions, query, deadline=deadline, executor=executor))
+    return get_coalescer().run(
+        "resource_graph", subscriptions, query, load,
+        timeout=deadline.remaining() if deadline else None
+    )
@@ -0,0 +1,45 @@
+import logging
+
+from cloudone_app.services.directory import list_subscriptions
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+ALL_SUBSCRIPTIONS = "all"
+
+
+def is_multi_scope(scope):
+    """True for 'all' or a comma-separated list of subscription ids."""
+    return scope.lower() == ALL_SUBSCRIPTIONS or "," in scope
+
+
+def resolve_scope(clients, scope):
+    """
+    Expands a URL scope into a list of subscription ids: 'all' lists every
+    subscription the app identity can see, 'a,b,c' is split (duplicates dropped),
+    and a single id is returned as a one-item list.
+    """
+    if scope.lower() == ALL_SUBSCRIPTIONS:
+        return [sub["subscription_id"] for sub in list_subscriptions(clients)]
+
+    subscription_ids = []
+    for subscription_id in scope.split(","):
+        subscription_id = subscription_id.strip()
+        if subscription_id and subscription_id.lower() not in {s.lower() for s in subscription_ids}:
+            subscription_ids.append(subscription_id)
+    return subscription_ids
+
+
+def group_by_subscription(rows, subscription_ids):
+    """
+    Buckets Resource Graph rows by their subscriptionId, keyed by the ids as
+    requested (Resource Graph may return them in a different case). Every
+    requested subscription gets a bucket, even without rows.
+    """
+    by_lower = {subscription_id.lower(): subscription_id for subscription_id in subscription_ids}
+    grouped = {subscription_id: [] for subscription_id in subscription_ids}
+    for row in rows:
+        subscription_id = by_lower.get(str(row.get('subscriptionId', '')).lower())
+        if subscription_id is not None:
+            grouped[subscription_id].append(row)
+    return grouped
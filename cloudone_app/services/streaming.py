@@ -0,0 +1,19 @@
+import json
+
+from flask import Response, stream_with_context
+
+
+def sse_event(event, data):
+    """Formats one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    """
+    Streams an iterable of sse_event() strings as text/event-stream, within the
+    request context and unbuffered by proxies (X-Accel-Buffering: no).
+    """
+    response = Response(stream_with_context(events), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,362 @@
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from threading import BoundedSemaphore, Event, Lock, Thread
+
+from flask import current_app
+
+from cloudone_app.services.directory import list_subscriptions
+
+# Get a logger for this module
+app_logger = logging.getLogger(__name__)
+
+# Refresh cached values once they are past this fraction of their TTL,
+# so a visitor never finds them expired
+REFRESH_AHEAD = 0.8
+
+# Keys in the "coordination" cache: the leader lease, and a pending "run every job now" request
+LEADER_LEASE_KEY = "cache_warmer.leader"
+RUN_NOW_KEY = "cache_warmer.run_now"
+
+
+def _iso(epoch):
+    if not epoch:
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def _warm_dashboard(widget):
+    """Job fn for one dashboard widget, so the widgets of a subscription refresh in parallel."""
+    def warm(clients, subscription_id):
+        from cloudone_app.blueprints.api.dashboard import warm_dashboard
+        from cloudone_app.services.arm_rest import get_arm_client
+        return bool(warm_dashboard(clients, get_arm_client(), subscription_id, REFRESH_AHEAD, widgets=(widget,)))
+    return warm
+
+
+def _warm_orphans(clients, subscription_id):
+    from cloudone_app.blueprints.api.resources import warm_orphan_scan
+    return warm_orphan_scan(clients, subscription_id, REFRESH_AHEAD)
+
+
+def _warm_advisor(clients, subscription_id):
+    from cloudone_app.services.advisor_store import get_advisor_store
+    return get_advisor_store().warm(subscription_id, REFRESH_AHEAD)
+
+
+def _warm_remediations(clients, subscription_id):
+    from cloudone_app.services.advisor_store import get_advisor_store
+    from cloudone_app.services.remediation_store import advisor_problems, get_remediation_store
+    if not current_app.config["REMEDIATION_PREGEN_ENABLED"] or not current_app.config["GOOGLE_API_KEY"]:
+        return False
+    # Only queues the missing guides on the store's own pool; does not wait for Gemini
+    summary = get_remediation_store().pregenerate(advisor_problems(get_advisor_store(), subscription_id))
+    return summary["queued"] > 0
+
+
+# Job kinds run for every subscription: kind -> fn(clients, subscription_id),
+# returning True if it called upstream and False if everything was still fresh.
+# Dashboard widgets add one "dashboard.<widget>" kind each (see warm_jobs).
+WARM_JOBS = {
+    "orphans": _warm_orphans,
+    "advisor": _warm_advisor,
+    "remediations": _warm_remediations,
+}
+
+
+def warm_jobs(widgets):
+    """Every job kind: one per dashboard widget, then WARM_JOBS."""
+    jobs = {f"dashboard.{widget}": _warm_dashboard(widget) for widget in widgets}
+    jobs.update(WARM_JOBS)
+    return jobs
+
+
+class CacheWarmer:
+    """
+    Background scheduler that keeps the dashboard widgets, orphan scans,
+    Advisor data and AI remediation guides of every known subscription warm,
+    so visitors are served from cache instead of waiting on Azure (or Gemini)
+    after a TTL expiry.
+
+    One daemon thread owns the schedule: it relists the subscriptions every
+    subscription_refresh seconds and hands due (kind, subscription) jobs to
+    the shared executor, at most max_concurrency at a time so user requests
+    keep the rest of the pool. Each job runs every interval seconds with
+    +/- jitter (a fraction of the interval); first runs are spread over one
+    interval so a restart does not fire every job at once. Jobs only call
+    Azure for values past REFRESH_AHEAD of their TTL. Each dashboard widget is
+    its own job, so one slow widget does not hold up the others.
+
+    Throughput is bounded: every interval the warmer completes at most
+    max_concurrency * interval / (average job seconds) jobs, and each
+    subscription has len(kinds) of them. stats() reports the time one pass
+    over every job takes (cycle_seconds) and flags when it exceeds the interval.
+
+    Every worker process starts a warmer, but only one of them schedules jobs:
+    the holder of a leader lease in the "coordination" cache, which is an
+    SQLite file shared by all processes on the host. The leader renews the
+    lease every lease/3 seconds; if it dies, another process takes over once
+    the lease lapses. The other warmers stand by.
+    """
+
+    def __init__(self, app, clients, executor, coordination, interval, jitter, max_concurrency,
+                 subscription_refresh, lease):
+        self._app = app
+        self._kinds = warm_jobs(app.config["DASHBOARD_WIDGET_TTLS"])
+        self._clients = clients
+        self._executor = executor
+        self._coordination = coordination
+        self.lease = lease
+        self.interval = interval
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.subscription_refresh = subscription_refresh
+        self._slots = BoundedSemaphore(max_concurrency)
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._stop = Event()
+        self._thread = None
+        self._jobs = {}
+        self._running = set()
+        self._subscriptions_listed_at = 0
+        self._subscription_errors = 0
+        self._leader = Event()
+        self._lease_token = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                Thread(target=self._lease_loop, name="cloudone-cache-warmer-lease", daemon=True).start()
+                self._thread = Thread(target=self._loop, name="cloudone-cache-warmer", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    @property
+    def is_leader(self):
+        return self._leader.is_set()
+
+    def _lease_loop(self):
+        while not self._stop.is_set():
+            try:
+                if self._lease_token and not self._coordination.extend(LEADER_LEASE_KEY, self._lease_token, self.lease):
+                    self._lease_token = None
+                    app_logger.warning("Cache warmer: lost the leader lease, standing by")
+                if not self._lease_token:
+                    self._lease_token = self._coordination.try_lock(LEADER_LEASE_KEY, self.lease)
+                    if self._lease_token:
+                        app_logger.info("Cache warmer: this process is now the leader")
+            except Exception as e:
+                self._lease_token = None
+                app_logger.error(f"Cache warmer: leader lease check failed: {e}")
+            if self._lease_token:
+                if not self._leader.is_set():
+                    self._leader.set()
+                    self._wakeup.set()
+            else:
+                self._leader.clear()
+            self._stop.wait(self.lease / 3)
+        self._leader.clear()
+        if self._lease_token:
+            self._coordination.release(LEADER_LEASE_KEY, self._lease_token)
+
+    def run_all_now(self):
+        """Makes every job due immediately (in the leader process, whichever worker is called)."""
+        self._coordination.set(RUN_NOW_KEY, time.time(), ttl=self.lease)
+        self._wakeup.set()
+
+    def _apply_run_now(self):
+        if self._coordination.get(RUN_NOW_KEY) is None:
+            return
+        self._coordination.delete(RUN_NOW_KEY)
+        with self._lock:
+            for job in self._jobs.values():
+                job["next_run"] = time.time()
+
+    def _next_run(self, now):
+        spread = self.interval * self.jitter
+        return now + self.interval + random.uniform(-spread, spread)
+
+    def _refresh_subscriptions(self):
+        try:
+            with self._app.app_context():
+                subscription_ids = [s["subscription_id"] for s in list_subscriptions(self._clients)]
+        except Exception as e:
+            self._subscription_errors += 1
+            app_logger.error(f"Cache warmer: listing subscriptions failed: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            self._subscriptions_listed_at = now
+            wanted = {(kind, sub) for sub in subscription_ids for kind in self._kinds}
+            for key in list(self._jobs):
+                if key not in wanted and key not in self._running:
+                    del self._jobs[key]
+            for kind, sub in wanted:
+                if (kind, sub) not in self._jobs:
+                    self._jobs[(kind, sub)] = {
+                        "kind": kind,
+                        "subscription_id": sub,
+                        "next_run": now + random.uniform(0, self.interval),
+                        "last_run": None,
+                        "last_duration": None,
+                        "last_refreshed": None,
+                        "last_error": None,
+                        "runs": 0,
+                        "failures": 0,
+                    }
+        app_logger.info(f"Cache warmer: tracking {len(subscription_ids)} subscriptions")
+        cycle = self._cycle_seconds()
+        if cycle is not None and cycle > self.interval:
+            app_logger.warning(
+                f"Cache warmer: one pass over every job takes about {cycle:.0f}s, longer than the "
+                f"{self.interval}s interval; raise CACHE_WARMER_MAX_CONCURRENCY or the interval"
+            )
+
+    def _due_jobs(self, now):
+        with self._lock:
+            due = [
+                key for key, job in self._jobs.items()
+                if job["next_run"] <= now and key not in self._running
+            ]
+            due.sort(key=lambda key: self._jobs[key]["next_run"])
+            return due
+
+    def _seconds_until_next(self, now):
+        with self._lock:
+            pending = [job["next_run"] for key, job in self._jobs.items() if key not in self._running]
+        next_run = min(pending, default=now + self.interval)
+        next_listing = self._subscriptions_listed_at + self.subscription_refresh
+        return max(0.5, min(next_run, next_listing) - now)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if not self._leader.is_set():
+                # Standing by; the lease thread wakes us when this process becomes the leader
+                self._wakeup.wait(self.lease / 3)
+                self._wakeup.clear()
+                continue
+            now = time.time()
+            if now - self._subscriptions_listed_at >= self.subscription_refresh:
+                self._refresh_subscriptions()
+            self._apply_run_now()
+            for key in self._due_jobs(time.time()):
+                # Blocks while max_concurrency jobs are running
+                self._slots.acquire()
+                if self._stop.is_set() or not self._leader.is_set():
+                    self._slots.release()
+                    break
+                with self._lock:
+                    if key not in self._jobs:
+                        self._slots.release()
+                        continue
+                    self._running.add(key)
+                self._executor.submit(self._run_job, key)
+            self._wakeup.wait(min(self._seconds_until_next(time.time()), self.lease / 3))
+            self._wakeup.clear()
+
+    def _run_job(self, key):
+        kind, subscription_id = key
+        start = time.perf_counter()
+        error = None
+        refreshed = False
+        try:
+            refreshed = self._kinds[kind](self._clients, subscription_id)
+        except Exception as e:
+            error = str(e)
+            current_app.logger.error(f"Cache warmer: {kind} for sub {subscription_id} failed: {e}")
+        finally:
+            finished = time.time()
+            with self._lock:
+                job = self._jobs.get(key)
+                if job is not None:
+                    job["last_run"] = finished
+                    job["last_duration"] = round(time.perf_counter() - start, 3)
+                    job["last_error"] = error
+                    job["runs"] += 1
+                    if error:
+                        job["failures"] += 1
+                    if refreshed:
+                        job["last_refreshed"] = finished
+                    job["next_run"] = self._next_run(finished)
+                self._running.discard(key)
+            self._slots.release()
+            self._wakeup.set()
+
+    def jobs(self):
+        """Returns every job with its schedule and last outcome."""
+        with self._lock:
+            jobs = [dict(job, running=key in self._running) for key, job in self._jobs.items()]
+        for job in jobs:
+            for field in ("next_run", "last_run", "last_refreshed"):
+                job[field] = _iso(job[field])
+        jobs.sort(key=lambda job: (job["subscription_id"], job["kind"]))
+        return jobs
+
+    def _cycle_seconds(self):
+        """Estimated seconds for one pass over every job at max_concurrency (None before any job ran)."""
+        with self._lock:
+            durations = [job["last_duration"] for job in self._jobs.values() if job["last_duration"] is not None]
+            jobs = len(self._jobs)
+        if not durations:
+            return None
+        return sum(durations) / len(durations) * jobs / self.max_concurrency
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+            running = len(self._running)
+        durations = [job["last_duration"] for job in jobs if job["last_duration"] is not None]
+        cycle = self._cycle_seconds()
+        return {
+            "leader": self.is_leader,
+            "interval_seconds": self.interval,
+            "max_concurrency": self.max_concurrency,
+            "jobs": len(jobs),
+            "running": running,
+            "subscriptions": len({job["subscription_id"] for job in jobs}),
+            "subscriptions_listed_at": _iso(self._subscriptions_listed_at),
+            "subscription_list_errors": self._subscription_errors,
+            "runs": sum(job["runs"] for job in jobs),
+            "failures": sum(job["failures"] for job in jobs),
+            "max_last_duration": max(durations, default=None),
+            "cycle_seconds": round(cycle, 1) if cycle is not None else None,
+            "behind_schedule": cycle is not None and cycle > self.interval,
+        }
+
+
+def init_app(app):
+    """
+    Creates the cache warmer and starts it, unless disabled by
+    Config.CACHE_WARMER_ENABLED or the app is under test. With several worker
+    processes, only the holder of the leader lease runs jobs.
+    """
+    if not app.config["CACHE_WARMER_ENABLED"] or app.config.get("TESTING"):
+        app.extensions["cache_warmer"] = None
+        return
+    warmer = CacheWarmer(
+        app,
+        app.extensions["azure_clients"],
+        app.extensions["executor"],
+        app.extensions["caches"].get("coordination"),
+        interval=app.config["CACHE_WARMER_INTERVAL_SECONDS"],
+        jitter=app.config["CACHE_WARMER_JITTER"],
+        max_concurrency=app.config["CACHE_WARMER_MAX_CONCURRENCY"],
+        subscription_refresh=app.config["CACHE_WARMER_SUBSCRIPTION_REFRESH_SECONDS"],
+        lease=app.config["CACHE_WARMER_LEASE_SECONDS"]
+    )
+    app.extensions["cache_warmer"] = warmer
+    warmer.start()
+    app_logger.info(
+        f"Cache warmer started: every {warmer.interval}s, at most {warmer.max_concurrency} jobs at a time "
+        f"(jobs run in the process holding the leader lease)"
+    )
+
+
+def get_warmer():
+    """Returns the cache warmer of the current app (None when disabled)."""
+    return current_app.extensions["cache_warmer"]
@@ -0,0 +1,25 @@
+import pytest
+
+from cloudone_app import create_app
+from cloudone_app.config import Config
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app with every on-disk store under tmp_path and no background warmer or snapshot sync."""
+    config = type("TestConfig", (Config,), {
+        "TESTING": True,
+        "GOOGLE_API_KEY": None,
+        "CACHE_BACKEND": "memory",
+        "CACHE_SQLITE_PATH": str(tmp_path / "cache.sqlite3"),
+        "IAC_CACHE_PATH": str(tmp_path / "ai_cache.sqlite3"),
+        "INVENTORY_SNAPSHOT_ENABLED": False,
+        "CACHE_WARMER_ENABLED": False,
+        "EXECUTOR_MAX_WORKERS": 4,
+        "RESOURCE_GRAPH_PAGING_WORKERS": 2,
+    })
+    app = create_app(config)
+    yield app
+    app.extensions["caches"].close()
+    for name in ("executor", "paging_executor", "bootstrap_executor"):
+        app.extensions[name].shutdown(wait=False)
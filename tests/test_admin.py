@@ -0,0 +1,22 @@
+import pytest
+
+from cloudone_app.blueprints.api.admin import ADMIN_TOKEN_HEADER
+
+
+def test_admin_api_is_hidden_without_a_token(app):
+    response = app.test_client().get("/api/admin/metrics")
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("headers", [{}, {ADMIN_TOKEN_HEADER: "wrong"}])
+def test_admin_api_rejects_a_missing_or_wrong_token(app, headers):
+    app.config["ADMIN_TOKEN"] = "s3cret"
+    response = app.test_client().get("/api/admin/metrics", headers=headers)
+    assert response.status_code == 401
+
+
+def test_admin_api_accepts_the_configured_token(app):
+    app.config["ADMIN_TOKEN"] = "s3cret"
+    response = app.test_client().get("/api/admin/metrics", headers={ADMIN_TOKEN_HEADER: "s3cret"})
+    assert response.status_code == 200
+    assert "bootstrap_executor" in response.get_json()
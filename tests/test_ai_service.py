@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from cloudone_app.services.ai_service import IncrementalFileParser
+
+FILES = {
+    "root": {"main.tf": 'resource "x" "y" {\n  name = "a\\\\b"\n}\n', "variables.tf": ""},
+    "modules": {"vnet": {"main.tf": "# vnet é"}},
+}
+
+
+def _parse(text, chunk_size):
+    parser = IncrementalFileParser()
+    files = []
+    for i in range(0, len(text), chunk_size):
+        files.extend(parser.feed(text[i:i + chunk_size]))
+    return files
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 10**6])
+def test_files_are_reported_with_their_paths_for_any_chunking(chunk_size):
+    text = json.dumps(FILES, indent=2)
+    assert _parse(text, chunk_size) == [
+        (("root", "main.tf"), FILES["root"]["main.tf"]),
+        (("root", "variables.tf"), ""),
+        (("modules", "vnet", "main.tf"), "# vnet é"),
+    ]
+
+
+def test_each_file_is_reported_by_the_chunk_that_completes_it():
+    parser = IncrementalFileParser()
+    assert parser.feed('{"a.tf": "one') == []
+    assert parser.feed('", "b.tf": "tw') == [(("a.tf",), "one")]
+    assert parser.feed('o\\"}') == []
+    assert parser.feed('"}') == [(("b.tf",), 'two"}')]
+
+
+def test_strings_inside_arrays_are_not_files():
+    text = json.dumps({"tags": ["a", "b"], "main.tf": "code"})
+    assert _parse(text, 4) == [(("main.tf",), "code")]
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from cloudone_app.services.cache import BoundedCache, CacheBackend, approx_size, wait_for_refresh
+
+
+def test_backend_interface_cannot_be_instantiated_incomplete():
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_approx_size_counts_shared_objects_once():
+    shared = ["x" * 1000]
+    assert approx_size({"a": shared, "b": shared}) < approx_size({"a": ["x" * 1000], "b": ["x" * 1000]})
+    assert approx_size({"data": "x" * 1000}) > 1000
+
+
+def test_least_recently_used_entry_is_evicted_past_max_entries():
+    cache = BoundedCache("test", max_entries=2, max_bytes=10**6)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Reading a makes b the least recently used
+    assert cache.get("a")["data"] == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_and_is_accounted():
+    value = "x" * 1000
+    entry_size = approx_size("k0") + approx_size(value)
+    cache = BoundedCache("test", max_entries=100, max_bytes=entry_size * 3)
+    for i in range(5):
+        cache.set(f"k{i}", value)
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["bytes"] <= stats["max_bytes"]
+    assert cache.get("k0") is None and cache.get("k4") is not None
+    # Replacing and deleting keep the byte count exact
+    cache.set("k4", "small")
+    cache.delete("k3")
+    assert cache.stats()["bytes"] == approx_size("k2") + approx_size(value) + approx_size("k4") + approx_size("small")
+
+
+def test_oversized_value_is_refused_and_drops_the_old_one():
+    cache = BoundedCache("test", max_entries=10, max_bytes=500)
+    assert cache.set("key", "small") is True
+    assert cache.set("key", "x" * 1000) is False
+    assert cache.get("key") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_pinned_entries_are_never_evicted():
+    cache = BoundedCache("test", max_entries=2, max_bytes=10**6)
+    cache.set("running", {"status": "running"}, pin=True)
+    for i in range(5):
+        cache.set(f"k{i}", i)
+    assert cache.get("running") is not None
+    assert cache.stats()["entries"] == 2
+    # Once replaced without pin it is evictable again
+    cache.set("running", {"status": "succeeded"})
+    cache.set("k5", 5)
+    cache.set("k6", 6)
+    assert cache.get("running") is None
+
+
+def test_entries_expire_and_are_swept():
+    cache = BoundedCache("test", max_entries=10, max_bytes=10**6, default_ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+    assert cache.sweep() == 1
+    assert cache.get("short") is None
+    assert cache.get("long")["data"] == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lock_lease_release_and_extend():
+    cache = BoundedCache("test", max_entries=10, max_bytes=10**6)
+    token = cache.try_lock("key", lease=60)
+    assert token is not None
+    assert cache.try_lock("key", lease=60) is None
+    assert cache.extend("key", token, lease=60)
+    assert not cache.extend("key", "someone-else", lease=60)
+    cache.release("key", "someone-else")
+    assert cache.try_lock("key", lease=60) is None
+    cache.release("key", token)
+    assert cache.try_lock("key", lease=60) is not None
+
+
+def test_lapsed_lock_can_be_taken_over():
+    cache = BoundedCache("test", max_entries=10, max_bytes=10**6)
+    stale = cache.try_lock("key", lease=0.01)
+    time.sleep(0.02)
+    assert cache.try_lock("key", lease=60) is not None
+    # The previous holder finds out when it tries to renew
+    assert not cache.extend("key", stale, lease=60)
+
+
+def test_sweep_drops_lapsed_locks():
+    cache = BoundedCache("test", max_entries=10, max_bytes=10**6)
+    cache.try_lock("lapsed", lease=0.01)
+    cache.try_lock("held", lease=60)
+    time.sleep(0.02)
+    cache.sweep()
+    assert set(cache._locks) == {"held"}
+
+
+def test_wait_for_refresh_returns_only_newer_entries():
+    cache = BoundedCache("test", max_entries=10, max_bytes=10**6)
+    cache.set("key", "old")
+    since = time.time()
+    assert wait_for_refresh(cache, "key", since=since + 1, timeout=0.05, poll_interval=0.01) is None
+    cache.set("key", "new")
+    assert wait_for_refresh(cache, "key", since=since, timeout=1, poll_interval=0.01)["data"] == "new"
@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+
+from cloudone_app.services.cache import SQLITE_SCHEMA, CacheRegistry, SqliteCacheBackend
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def test_values_round_trip_as_json(path):
+    cache = SqliteCacheBackend("test", path, max_entries=10, max_bytes=10**6)
+    assert cache.set(("widget", "sub"), {"count": 3, "items": [1, 2]}) is True
+    assert cache.get(("widget", "sub"))["data"] == {"count": 3, "items": [1, 2]}
+    assert cache.get(("widget", "other")) is None
+
+
+def test_two_instances_share_entries_and_locks(path):
+    # Two worker processes open the same file
+    first = SqliteCacheBackend("test", path, max_entries=10, max_bytes=10**6)
+    second = SqliteCacheBackend("test", path, max_entries=10, max_bytes=10**6)
+    first.set("key", "value")
+    assert second.get("key")["data"] == "value"
+
+    token = first.try_lock("key", lease=60)
+    assert token is not None
+    assert second.try_lock("key", lease=60) is None
+    assert not second.extend("key", "not-the-holder", lease=60)
+    first.release("key", token)
+    assert second.try_lock("key", lease=60) is not None
+
+
+def test_caches_in_one_file_are_separate(path):
+    dashboard = SqliteCacheBackend("dashboard", path, max_entries=1, max_bytes=10**6)
+    jobs = SqliteCacheBackend("jobs", path, max_entries=1, max_bytes=10**6)
+    dashboard.set("key", "d")
+    jobs.set("key", "j")
+    # Each cache evicts within its own budget only
+    assert dashboard.get("key")["data"] == "d"
+    assert jobs.get("key")["data"] == "j"
+
+
+def test_entry_and_byte_limits_evict_unpinned_entries(path):
+    cache = SqliteCacheBackend("test", path, max_entries=2, max_bytes=10**6)
+    cache.set("pinned", "running", pin=True)
+    for i in range(4):
+        cache.set(f"k{i}", i)
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert cache.get("pinned") is not None
+    assert cache.get("k3") is not None
+
+    small = SqliteCacheBackend("small", path, max_entries=100, max_bytes=20)
+    small.set("a", "x" * 10)
+    small.set("b", "x" * 10)
+    assert small.get("a") is None
+    assert small.stats()["bytes"] <= 20
+
+
+def test_oversized_value_is_refused_and_drops_the_old_one(path):
+    cache = SqliteCacheBackend("test", path, max_entries=10, max_bytes=100)
+    cache.set("key", "small")
+    assert cache.set("key", "x" * 200) is False
+    assert cache.get("key") is None
+
+
+def test_expired_entries_are_hidden_and_swept(path):
+    cache = SqliteCacheBackend("test", path, max_entries=10, max_bytes=10**6)
+    cache.set("gone", 1, ttl=-1)
+    cache.set("kept", 2, ttl=60)
+    assert cache.get("gone") is None
+    assert cache.sweep() == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_files_without_the_pinned_column_are_upgraded(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(SQLITE_SCHEMA.replace("    pinned INTEGER NOT NULL DEFAULT 0,\n", ""))
+    conn.close()
+    cache = SqliteCacheBackend("test", path, max_entries=10, max_bytes=10**6)
+    assert cache.set("key", "value", pin=True)
+    assert cache.get("key")["data"] == "value"
+
+
+def test_registry_places_caches_on_the_selected_backend(path, tmp_path):
+    registry = CacheRegistry(backend="sqlite", sqlite_path=path, sweep_interval=3600)
+    try:
+        shared = registry.create("shared", max_entries=10, max_bytes=10**6)
+        persistent = registry.create("persistent", max_entries=10, max_bytes=10**6, path=str(tmp_path / "other.sqlite3"))
+        assert shared.path == path
+        assert persistent.path == str(tmp_path / "other.sqlite3")
+        assert registry.create("shared", max_entries=1, max_bytes=1) is shared
+        assert set(registry.stats()) == {"shared", "persistent"}
+    finally:
+        registry.close()
+
+    with pytest.raises(ValueError):
+        CacheRegistry(backend="redis")
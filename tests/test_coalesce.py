@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+
+from cloudone_app.services.coalesce import RequestCoalescer, coalesce_key
+
+
+class Interrupted(BaseException):
+    """Stands in for SystemExit / KeyboardInterrupt raised inside a loader."""
+
+
+def _start_leader(coalescer, fn, outcome):
+    def run():
+        try:
+            outcome["result"] = coalescer.run("op", "scope", "query", fn)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_in_flight(coalescer):
+    for _ in range(500):
+        if coalescer.stats()["in_flight"]:
+            return
+        time.sleep(0.01)
+    raise AssertionError("leader never started")
+
+
+def test_coalesce_key_normalizes_scope_and_query():
+    assert coalesce_key("op", ["B", "a"], "Resources\n  | take 1") == coalesce_key("op", ("A", "b"), "Resources | take 1")
+    assert coalesce_key("op", "SUB") == ("op", "sub", None)
+    assert coalesce_key("op", "a") != coalesce_key("other", "a")
+
+
+def test_concurrent_callers_share_one_call():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    outcome = {}
+    leader = _start_leader(coalescer, load, outcome)
+    _wait_in_flight(coalescer)
+    follower = {}
+    thread = threading.Thread(target=lambda: follower.update(result=coalescer.run("op", "SCOPE", "query", load, timeout=5)))
+    thread.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    thread.join(5)
+
+    assert outcome["result"] == follower["result"] == "value"
+    assert len(calls) == 1
+    stats = coalescer.stats()
+    assert (stats["misses"], stats["coalesced"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_errors_reach_every_waiting_caller():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+
+    def load():
+        release.wait(5)
+        raise ValueError("upstream failed")
+
+    outcome = {}
+    leader = _start_leader(coalescer, load, outcome)
+    _wait_in_flight(coalescer)
+    follower = {}
+
+    def follow():
+        try:
+            coalescer.run("op", "scope", "query", load, timeout=5)
+        except ValueError as e:
+            follower["error"] = e
+
+    thread = threading.Thread(target=follow)
+    thread.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    thread.join(5)
+
+    assert isinstance(outcome["error"], ValueError)
+    assert follower["error"] is outcome["error"]
+    assert coalescer.stats()["errors"] == 1
+
+
+def test_an_interrupted_leader_still_resolves_followers_and_clears_the_flight():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+
+    def load():
+        release.wait(5)
+        raise Interrupted()
+
+    outcome = {}
+    leader = _start_leader(coalescer, load, outcome)
+    _wait_in_flight(coalescer)
+    follower = {}
+
+    def follow():
+        try:
+            coalescer.run("op", "scope", "query", lambda: "unused", timeout=5)
+        except Exception as e:
+            follower["error"] = e
+
+    thread = threading.Thread(target=follow)
+    thread.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    thread.join(5)
+
+    assert isinstance(outcome["error"], Interrupted)
+    assert isinstance(follower["error"], RuntimeError)
+    assert coalescer.stats()["in_flight"] == 0
+    # A later caller starts a new flight instead of joining the dead one
+    assert coalescer.run("op", "scope", "query", lambda: "fresh", timeout=1) == "fresh"
+
+
+def test_results_are_reused_within_the_result_window():
+    coalescer = RequestCoalescer(result_ttl=60)
+    assert coalescer.run("op", "scope", "query", lambda: 1) == 1
+    assert coalescer.run("op", "scope", "query", lambda: 2) == 1
+    assert coalescer.stats()["hits"] == 1
+    # Without a window every call runs
+    plain = RequestCoalescer()
+    assert plain.run("op", "scope", "query", lambda: 1) == 1
+    assert plain.run("op", "scope", "query", lambda: 2) == 2
+
+
+def test_followers_give_up_after_their_timeout():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    outcome = {}
+    leader = _start_leader(coalescer, lambda: release.wait(5), outcome)
+    _wait_in_flight(coalescer)
+    try:
+        with pytest.raises(TimeoutError):
+            coalescer.run("op", "scope", "query", lambda: None, timeout=0.05)
+    finally:
+        release.set()
+        leader.join(5)
@@ -0,0 +1,35 @@
+from concurrent.futures import Future
+
+from cloudone_app.blueprints.api import dashboard
+from cloudone_app.services.cache import get_cache
+
+
+def test_batch_refresh_stores_and_resolves_every_subscription(app):
+    with app.app_context():
+        claimed = {"s1": Future(), "s2": Future()}
+        dashboard._run_batch_refresh("resource_counts", claimed, lambda subs, deadline: {sub: {"n": sub} for sub in subs})
+        assert claimed["s1"].result(timeout=0) == {"n": "s1"}
+        assert claimed["s2"].result(timeout=0) == {"n": "s2"}
+        assert get_cache("dashboard").get(("resource_counts", "s1"))["data"] == {"n": "s1"}
+
+
+def test_batch_refresh_failure_fails_every_claimed_subscription(app):
+    def fail(subs, deadline):
+        raise RuntimeError("Resource Graph unavailable")
+
+    with app.app_context():
+        claimed = {"s1": Future(), "s2": Future()}
+        dashboard._run_batch_refresh("resource_counts", claimed, fail)
+        for future in claimed.values():
+            assert isinstance(future.exception(timeout=0), RuntimeError)
+
+
+def test_batch_refresh_failure_keeps_already_resolved_futures(app):
+    with app.app_context():
+        claimed = {"s1": Future(), "s2": Future()}
+        # Resolving s2 raises InvalidStateError after s1 got its value
+        claimed["s2"].cancel()
+        dashboard._run_batch_refresh("monitoring", claimed, lambda subs, deadline: {sub: [] for sub in subs})
+        assert claimed["s1"].result(timeout=0) == []
+        assert claimed["s2"].cancelled()
+        assert not dashboard._inflight
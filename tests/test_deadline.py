@@ -0,0 +1,56 @@
+import pytest
+
+from cloudone_app.services import deadline as deadline_module
+from cloudone_app.services.deadline import CONNECT_TIMEOUT_CAP_SECONDS, Deadline, DeadlineExceeded, sdk_timeouts
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(deadline_module.time, "monotonic", clock)
+    return clock
+
+
+def test_remaining_counts_down_and_never_goes_negative(clock):
+    deadline = Deadline(10)
+    clock.now += 4
+    assert deadline.remaining() == pytest.approx(6)
+    assert not deadline.expired()
+    clock.now += 20
+    assert deadline.remaining() == 0
+    assert deadline.expired()
+
+
+def test_timeout_is_capped(clock):
+    deadline = Deadline(10)
+    assert deadline.timeout(cap=3) == 3
+    clock.now += 8
+    assert deadline.timeout(cap=3) == pytest.approx(2)
+    assert deadline.timeout() == pytest.approx(2)
+
+
+def test_timeout_raises_once_expired(clock):
+    deadline = Deadline(1)
+    clock.now += 1
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout()
+    # Callers that catch TimeoutError handle it too
+    with pytest.raises(TimeoutError):
+        deadline.timeout()
+
+
+def test_sdk_kwargs_cap_the_connect_phase(clock):
+    kwargs = Deadline(30).sdk_kwargs()
+    assert kwargs == {"connection_timeout": CONNECT_TIMEOUT_CAP_SECONDS, "read_timeout": 30}
+
+
+def test_sdk_timeouts_without_deadline():
+    assert sdk_timeouts(None) == {}
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+from flask import current_app
+
+from cloudone_app.services.executor import AppExecutor
+
+
+@pytest.fixture
+def executor(app):
+    executor = AppExecutor(app, max_workers=2, thread_name_prefix="test-worker")
+    yield executor
+    executor.shutdown()
+
+
+def test_tasks_run_in_the_app_context(app, executor):
+    assert executor.submit(lambda: current_app.name).result(timeout=5) == app.name
+
+
+def test_owns_current_thread_only_on_its_own_workers(app, executor):
+    other = AppExecutor(app, max_workers=1, thread_name_prefix="test-other")
+    try:
+        assert not executor.owns_current_thread()
+        assert executor.submit(executor.owns_current_thread).result(timeout=5)
+        assert not other.submit(executor.owns_current_thread).result(timeout=5)
+    finally:
+        other.shutdown()
+
+
+def test_stats_count_failures_and_queue_depth(executor):
+    release = threading.Event()
+    blockers = [executor.submit(release.wait, 5) for _ in range(2)]
+    queued = executor.submit(lambda: None)
+    stats = executor.stats()
+    assert stats["max_workers"] == 2
+    assert stats["submitted"] == 3
+    assert stats["queued"] >= 1
+    release.set()
+    for future in blockers + [queued]:
+        future.result(timeout=5)
+
+    failing = executor.submit(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        failing.result(timeout=5)
+    stats = executor.stats()
+    assert stats["failed"] == 1
+    assert stats["completed"] == 4
+    assert stats["active"] == 0
+
+
+def test_app_has_separate_paging_and_bootstrap_pools(app):
+    pools = [app.extensions[name] for name in ("executor", "paging_executor", "bootstrap_executor")]
+    assert len({id(pool) for pool in pools}) == 3
+    assert pools[0].max_workers == 4
+    assert pools[1].max_workers == 2
@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from cloudone_app.services.inventory_snapshot import InventorySnapshot
+
+SUBSCRIPTION = "00000000-0000-0000-0000-000000000001"
+
+
+class UnavailableDirectory:
+    """A subscription directory that cannot list, so ready() never schedules a sync."""
+
+    def get(self, name, clients):
+        raise RuntimeError("offline")
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    return InventorySnapshot(
+        str(tmp_path / "inventory.sqlite3"), clients=None, executor=None, directory=UnavailableDirectory(),
+        sync_interval=60, full_resync_interval=3600, max_staleness=600
+    )
+
+
+def test_never_loaded_subscription_is_not_ready(snapshot):
+    assert snapshot.ready(SUBSCRIPTION) is None
+
+
+@pytest.mark.parametrize("age, served", [(30, True), (300, True), (600, False), (5000, False)])
+def test_snapshot_is_served_until_max_staleness(snapshot, monkeypatch, age, served):
+    synced_at = time.time() - age
+    monkeypatch.setattr(snapshot, "as_of", lambda subscription_id: synced_at)
+    assert (snapshot.ready(SUBSCRIPTION) == synced_at) is served
+    assert snapshot.stats()["stale_fallbacks"] == (0 if served else 1)
@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from cloudone_app.services.cache import BoundedCache
+from cloudone_app.services.jobs import JobQueue, QueueFull
+
+
+@pytest.fixture
+def make_queue(app):
+    queues = []
+
+    def make(max_entries=100, max_bytes=10**6, max_queue=10):
+        store = BoundedCache("jobs", max_entries=max_entries, max_bytes=max_bytes)
+        queue = JobQueue(app, store, max_workers=1, max_queue=max_queue, result_ttl=60)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue._pool.shutdown(wait=True)
+
+
+def _wait(queue, job_id):
+    for _ in range(500):
+        job = queue.get(job_id)
+        if job and job["status"] in ("succeeded", "failed"):
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_result_is_stored(make_queue):
+    queue = make_queue()
+    job = queue.submit("test", lambda x: ({"value": x}, 200), 42)
+    done = _wait(queue, job["id"])
+    assert done["status"] == "succeeded"
+    assert done["result"] == {"value": 42}
+    assert queue.stats()["kinds"]["test"]["finished"] == 1
+
+
+def test_raising_job_is_failed(make_queue):
+    queue = make_queue()
+
+    def boom():
+        raise ValueError("boom")
+
+    done = _wait(queue, queue.submit("test", boom)["id"])
+    assert done["status"] == "failed"
+    assert done["result_status"] == 500
+    assert done["error"] == "boom"
+
+
+def test_oversized_result_becomes_a_small_failed_record(make_queue):
+    queue = make_queue(max_bytes=2000)
+    done = _wait(queue, queue.submit("test", lambda: ({"data": "x" * 5000}, 200))["id"])
+    assert done["status"] == "failed"
+    assert done["error"] == "Job result could not be stored"
+
+
+def test_running_job_is_not_evicted_by_finished_ones(make_queue):
+    queue = make_queue(max_entries=2)
+    release = threading.Event()
+    running = queue.submit("slow", lambda: (release.wait(5), ({}, 200))[1])
+    # Plenty of finished records pass through the cache while the first job still runs
+    for i in range(5):
+        queue._store.set(f"done{i}", {"status": "succeeded"})
+    assert queue.get(running["id"])["status"] in ("queued", "running")
+    release.set()
+    assert _wait(queue, running["id"])["status"] == "succeeded"
+
+
+def test_submit_raises_queue_full(make_queue):
+    queue = make_queue(max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return {}, 200
+
+    queue.submit("slow", slow)
+    started.wait(5)
+    queue.submit("slow", slow)
+    with pytest.raises(QueueFull):
+        queue.submit("slow", slow)
+    assert queue.stats()["rejected"] == 1
+    release.set()
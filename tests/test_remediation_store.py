@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from cloudone_app.services import remediation_store as remediation_module
+from cloudone_app.services.cache import get_cache
+from cloudone_app.services.remediation_store import RemediationStore, normalize_problem
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Replaces the Gemini call with one that blocks until released."""
+    release = threading.Event()
+    calls = []
+
+    def fake_remediation(problem):
+        calls.append(problem)
+        release.wait(5)
+        return {"remediation": f"fix {problem}"}
+
+    monkeypatch.setattr(remediation_module, "get_ai_remediation", fake_remediation)
+    yield release, calls
+    release.set()
+
+
+@pytest.fixture
+def store(app):
+    store = RemediationStore(app, max_concurrency=1, max_per_run=3)
+    yield store
+    store._pool.shutdown(wait=True)
+
+
+def _wait_until_idle(store):
+    for _ in range(500):
+        if not store.stats()["queued"]:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("pre-generation did not finish")
+
+
+def test_normalize_problem_ignores_case_and_whitespace():
+    assert normalize_problem("  Enable   MFA\nfor admins ") == "enable mfa for admins"
+
+
+def test_pregenerate_caps_queued_work_at_max_per_run(app, store, gemini):
+    release, calls = gemini
+    with app.app_context():
+        summary = store.pregenerate([f"problem {i}" for i in range(5)] + ["PROBLEM 0"])
+        assert summary["problems"] == 5
+        assert (summary["queued"], summary["deferred"]) == (3, 2)
+
+        # The three in progress are not queued again, and nothing else fits
+        summary = store.pregenerate([f"problem {i}" for i in range(5)])
+        assert (summary["queued"], summary["already_queued"], summary["deferred"]) == (0, 3, 2)
+        assert store.stats()["queued"] == 3
+
+
+def test_pregenerate_limit_is_capped_at_max_per_run(app, store, gemini):
+    with app.app_context():
+        assert store.pregenerate([f"p{i}" for i in range(5)], limit=1)["queued"] == 1
+        assert store.pregenerate([f"p{i}" for i in range(5)], limit=100)["queued"] == 2
+
+
+def test_pregenerated_guides_are_stored_and_skipped_next_time(app, store, gemini):
+    release, calls = gemini
+    release.set()
+    with app.app_context():
+        store.pregenerate(["problem a", "problem b"])
+        _wait_until_idle(store)
+        assert store.stats()["pregenerated"] == 2
+        assert store.stats()["queued"] == 0
+        assert store.lookup("Problem   A")[0] == {"remediation": "fix problem a"}
+        assert get_cache("remediations").get(store.key("problem b")) is not None
+
+        summary = store.pregenerate(["problem a", "problem b", "problem c"])
+        assert (summary["cached"], summary["queued"]) == (2, 1)
@@ -0,0 +1,71 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from cloudone_app.services.executor import AppExecutor
+from cloudone_app.services.resource_graph import kql_string, query_rows
+
+
+class FakeResourceGraph:
+    """Serves rows page by page like Resource Graph, via $skipToken or $skip."""
+
+    def __init__(self, total):
+        self.rows = [{"id": i} for i in range(total)]
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def resources(self, request, **kwargs):
+        options = request.options
+        with self._lock:
+            self.calls.append(("token" if options.skip_token else "skip" if options.skip else "first",
+                               threading.current_thread().name))
+        offset = int(options.skip_token or options.skip or 0)
+        end = offset + options.top
+        return SimpleNamespace(
+            data=self.rows[offset:end],
+            skip_token=str(end) if end < len(self.rows) else None,
+            total_records=len(self.rows)
+        )
+
+
+@pytest.fixture
+def paging(app):
+    executor = AppExecutor(app, max_workers=2, thread_name_prefix="test-paging")
+    yield executor
+    executor.shutdown()
+
+
+def test_pages_are_followed_with_skip_tokens_by_default():
+    client = FakeResourceGraph(25)
+    rows = list(query_rows(client, ["sub"], "Resources", page_size=10))
+    assert rows == client.rows
+    assert [kind for kind, _ in client.calls] == ["first", "token", "token"]
+
+
+def test_remaining_pages_are_fetched_concurrently_on_the_paging_pool(paging):
+    client = FakeResourceGraph(45)
+    rows = list(query_rows(client, ["sub"], "Resources", page_size=10, executor=paging))
+    # Rows still come back in order
+    assert rows == client.rows
+    later = client.calls[1:]
+    assert [kind for kind, _ in later] == ["skip"] * 4
+    assert all(thread.startswith("test-paging") for _, thread in later)
+
+
+def test_a_caller_on_the_paging_pool_pages_serially(paging):
+    client = FakeResourceGraph(25)
+
+    def run():
+        return list(query_rows(client, ["sub"], "Resources", page_size=10, executor=paging))
+
+    # Would deadlock on a saturated pool if it waited on pages queued behind itself
+    rows = paging.submit(run).result(timeout=5)
+    assert rows == client.rows
+    assert [kind for kind, _ in client.calls] == ["first", "token", "token"]
+
+
+def test_kql_string_escapes_quotes_and_backslashes():
+    assert kql_string("plain") == "'plain'"
+    assert kql_string("it's") == "'it\\'s'"
+    assert kql_string("a\\b") == "'a\\\\b'"
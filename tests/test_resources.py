@@ -0,0 +1,20 @@
+from werkzeug.datastructures import MultiDict
+
+from cloudone_app.blueprints.api.resources import _count_filters, _inventory_filters, _request_filters
+
+SUBSCRIPTION = "00000000-0000-0000-0000-000000000001"
+
+
+def test_count_filters_drop_only_the_category():
+    args = MultiDict({"type": "microsoft.compute/virtualmachines", "location": "westeurope",
+                      "category": "Compute", "tag": "env:prod", "name_prefix": ""})
+    assert _count_filters(args) == {"type": "microsoft.compute/virtualmachines", "location": "westeurope",
+                                    "tag": "env:prod"}
+    assert _request_filters(args)["category"] == "Compute"
+
+
+def test_live_counts_use_the_same_filters_as_the_snapshot():
+    args = MultiDict({"location": "westeurope", "category": "Compute"})
+    clauses = _inventory_filters(SUBSCRIPTION, _count_filters(args))
+    assert "westeurope" in clauses
+    assert "Compute" not in clauses
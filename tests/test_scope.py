@@ -0,0 +1,35 @@
+from cloudone_app.services.scope import group_by_subscription, is_multi_scope, resolve_scope
+
+
+def test_is_multi_scope():
+    assert is_multi_scope("all")
+    assert is_multi_scope("ALL")
+    assert is_multi_scope("a,b")
+    assert not is_multi_scope("00000000-0000-0000-0000-000000000000")
+
+
+def test_resolve_scope_splits_lists_and_drops_duplicates():
+    # Lists never touch the directory, so no clients are needed
+    assert resolve_scope(None, "a, B ,b,,c") == ["a", "B", "c"]
+    assert resolve_scope(None, "single") == ["single"]
+
+
+def test_resolve_scope_all_lists_the_directory(monkeypatch):
+    monkeypatch.setattr(
+        "cloudone_app.services.scope.list_subscriptions",
+        lambda clients: [{"subscription_id": "s1"}, {"subscription_id": "s2"}]
+    )
+    assert resolve_scope(object(), "all") == ["s1", "s2"]
+
+
+def test_group_by_subscription_matches_ids_case_insensitively():
+    rows = [
+        {"subscriptionId": "ABC", "name": "vm1"},
+        {"subscriptionId": "abc", "name": "vm2"},
+        {"subscriptionId": "other", "name": "vm3"},
+    ]
+    grouped = group_by_subscription(rows, ["Abc", "empty"])
+    assert [row["name"] for row in grouped["Abc"]] == ["vm1", "vm2"]
+    # Every requested subscription gets a bucket; unrequested rows are dropped
+    assert grouped["empty"] == []
+    assert set(grouped) == {"Abc", "empty"}